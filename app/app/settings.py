@@ -57,6 +57,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django_prometheus.middleware.PrometheusBeforeMiddleware',
+    'core.db_metrics.DatabaseMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -105,16 +106,54 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections stay open DB_CONN_MAX_AGE seconds between requests, and with
+# DB_CONN_HEALTH_CHECKS are pinged before their first query of a request.
+# uWSGI runs single threaded workers, each holding one connection.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+DB_CONN_HEALTH_CHECKS = bool(int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1)))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
     }
 }
 
+# Read replicas as comma separated host or host/name entries, added as
+# replica1, replica2, ... with the credentials of default. Safe requests
+# of the policy and claim APIs read from a replica lagging at most
+# DB_REPLICA_MAX_LAG seconds, measured every DB_REPLICA_LAG_CHECK_INTERVAL
+# seconds. A user's writes pin their reads to default for
+# DB_REPLICA_PIN_SECONDS, shared between workers through the cache alias
+# DB_REPLICA_PIN_CACHE_ALIAS, which must not be local to a process.
+DB_REPLICAS = [
+    replica.strip()
+    for replica in os.environ.get('DB_REPLICAS', '').split(',')
+    if replica.strip()
+]
+for index, replica in enumerate(DB_REPLICAS, start=1):
+    replica_host, _, replica_name = replica.partition('/')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'NAME': replica_name or DATABASES['default']['NAME'],
+    }
+DB_REPLICA_ALIASES = [f'replica{index}' for index in
+                      range(1, len(DB_REPLICAS) + 1)]
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(
+    os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 1))
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 10))
+DB_REPLICA_PIN_CACHE_ALIAS = os.environ.get(
+    'DB_REPLICA_PIN_CACHE_ALIAS', 'default')
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -171,8 +210,102 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # orjson backed JSON, the DRF classes are used when it is missing.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.fast_json.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.fast_json.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Default page size and upper bound for the ?page_size= query parameter.
+API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+# Rows fetched per server-side cursor round trip by the export endpoints.
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Limits for the bulk policy upload endpoint.
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 10000))
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 1000))
+
+# Cache backends. Local memory by default, point CACHE_BACKEND and
+# CACHE_LOCATION at a shared cache such as Redis in production.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Per-user cache of list responses. A sample of hits given by
+# RESPONSE_CACHE_VERIFY_RATE is recomputed to count stale serves.
+RESPONSE_CACHE_ENABLED = bool(int(os.environ.get('RESPONSE_CACHE_ENABLED', 1)))
+RESPONSE_CACHE_ALIAS = os.environ.get('RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+RESPONSE_CACHE_VERIFY_RATE = float(
+    os.environ.get('RESPONSE_CACHE_VERIFY_RATE', 0))
+
+# Cache for token authentication. Set AUTH_TOKEN_CACHE_ALIAS to a CACHES
+# alias to share entries between workers and revoke tokens in all of them
+# at once, otherwise other workers keep a revoked token for up to
+# AUTH_TOKEN_CACHE_TTL seconds.
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(os.environ.get('AUTH_TOKEN_CACHE_TTL', 30))
+AUTH_TOKEN_CACHE_SHARED_TTL = int(
+    os.environ.get('AUTH_TOKEN_CACHE_SHARED_TTL', 300))
+AUTH_TOKEN_CACHE_ALIAS = os.environ.get('AUTH_TOKEN_CACHE_ALIAS') or None
+
+# Seconds a worker keeps tag ids interned. Tag changes in the same worker
+# invalidate at once, other workers see them within this time.
+TAG_CACHE_TTL = int(os.environ.get('TAG_CACHE_TTL', 300))
+
+# Claim image processing. With IMAGE_PROCESSING_SYNC images are processed
+# in the request instead of the background pool.
+IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', 2))
+IMAGE_PROCESSING_MAX_PENDING = int(
+    os.environ.get('IMAGE_PROCESSING_MAX_PENDING', 32))
+IMAGE_PROCESSING_SYNC = bool(int(os.environ.get('IMAGE_PROCESSING_SYNC', 0)))
+# Interpreter starting the pool's worker processes, by default the first
+# python3 on the PATH when the server binary is not Python, e.g. uWSGI.
+IMAGE_PROCESSING_PYTHON = os.environ.get('IMAGE_PROCESSING_PYTHON', '')
+IMAGE_THUMBNAIL_SIZE = (320, 320)
+# Encoder quality of the JPEG variants: thumbnails and stripped copies.
+IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', 90))
+IMAGE_WEBP_QUALITY = 80
+
+# Claim amount model written by the train_claim_model command. The uWSGI
+# master loads it before forking, so workers share its pages copy on
+# write.
+CLAIM_MODEL_PATH = os.environ.get(
+    'CLAIM_MODEL_PATH', '/vol/web/models/claim_model.joblib')
+CLAIM_TRAINING_CACHE_DIR = os.environ.get(
+    'CLAIM_TRAINING_CACHE_DIR', '/vol/web/models/training-cache')
+CLAIM_PREDICTION_BATCH_SIZE = int(
+    os.environ.get('CLAIM_PREDICTION_BATCH_SIZE', 256))
+
+# Log queries slower than this many milliseconds with their fingerprint,
+# unset to disable.
+DB_SLOW_QUERY_LOG_MS = (
+    float(os.environ['DB_SLOW_QUERY_LOG_MS'])
+    if os.environ.get('DB_SLOW_QUERY_LOG_MS') else None
+)
+
+# Import modules, build URL resolvers, connect to the database and prime
+# caches before a server process takes requests.
+WARMUP_ENABLED = bool(int(os.environ.get('WARMUP_ENABLED', 1)))
+
+# Hash uploads while they are received, for content addressed storage.
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.HashingMemoryFileUploadHandler',
+    'core.uploads.HashingTemporaryFileUploadHandler',
+]
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
@@ -14,3 +14,16 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+from core.metrics import setup_multiprocess  # noqa: E402
+from core.prediction import ModelUnavailable, claim_predictor  # noqa: E402
+from core.warmup import setup_warmup  # noqa: E402
+
+setup_multiprocess()
+setup_warmup()
+
+# Load the claim model before uWSGI forks its workers, so they share it.
+try:
+    claim_predictor.load()
+except ModelUnavailable:
+    pass
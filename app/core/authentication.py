@@ -0,0 +1,209 @@
+"""
+Token authentication with an in-process cache.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router, transaction
+from prometheus_client import Counter
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+TOKEN_CACHE_HITS = Counter(
+    'auth_token_cache_hits_total',
+    'Token lookups answered from the cache.',
+    ['tier'],
+)
+TOKEN_CACHE_MISSES = Counter(
+    'auth_token_cache_misses_total',
+    'Token lookups that had to query the database.',
+)
+
+
+class TokenCache:
+    """LRU cache of tokens with a TTL, optionally backed by a shared cache.
+
+    Entries in the local tier live for at most ``ttl`` seconds. With a
+    shared cache, every user has a generation stored there, bumped by
+    revoke. Entries remember the generation they were cached under, so a
+    token revoked in any process misses everywhere on its next use, at
+    the cost of reading the generation from the shared cache on local
+    hits too.
+    """
+
+    def __init__(self, max_size, ttl, shared_alias=None, shared_ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.shared_ttl = shared_ttl or ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        """Return the shared cache backend, if one is configured."""
+        if self.shared_alias:
+            return caches[self.shared_alias]
+        return None
+
+    def _shared_key(self, key):
+        """Return the shared cache key, never storing the raw token."""
+        return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def _generation_key(self, user_id):
+        """Return the shared cache key of a user's generation."""
+        return f'auth-token:generation:{user_id}'
+
+    def _generation(self, user_id):
+        """Return the current generation of a user, None without sharing."""
+        if self.shared is None:
+            return None
+        key = self._generation_key(user_id)
+        generation = self.shared.get(key)
+        if generation is None:
+            # Unlikely to collide with a generation that was evicted.
+            self.shared.add(key, time.time_ns() // 1000, None)
+            generation = self.shared.get(key)
+        return generation
+
+    def get(self, key):
+        """Return the cached value for key or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] <= now:
+                del self._entries[key]
+                entry = None
+        if entry is not None:
+            value, user_id, generation, _ = entry
+            if generation == self._generation(user_id):
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                TOKEN_CACHE_HITS.labels(tier='local').inc()
+                return value
+            with self._lock:
+                self._entries.pop(key, None)
+
+        if self.shared is not None:
+            stored = self.shared.get(self._shared_key(key))
+            if stored is not None:
+                value, user_id, generation = stored
+                if generation == self._generation(user_id):
+                    TOKEN_CACHE_HITS.labels(tier='shared').inc()
+                    self._store(key, value, user_id, generation, now)
+                    return value
+
+        TOKEN_CACHE_MISSES.inc()
+        return None
+
+    def _store(self, key, value, user_id, generation, now):
+        """Store value in the local tier, evicting the oldest entries."""
+        with self._lock:
+            self._entries[key] = (value, user_id, generation, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set(self, key, user_id, value):
+        """Cache the value of a user's token in every tier."""
+        generation = self._generation(user_id)
+        self._store(key, value, user_id, generation, time.monotonic())
+        if self.shared is not None:
+            self.shared.set(
+                self._shared_key(key), (value, user_id, generation),
+                self.shared_ttl)
+
+    def _revoke(self, user_id):
+        """Drop the local entries of a user and bump their generation."""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items()
+                        if entry[1] == user_id]:
+                del self._entries[key]
+        if self.shared is not None:
+            key = self._generation_key(user_id)
+            try:
+                self.shared.incr(key)
+            except ValueError:
+                self.shared.add(key, time.time_ns() // 1000, None)
+
+    def revoke(self, user_id):
+        """Stop serving the cached tokens of a user.
+
+        Like the response cache, the generation is bumped now and again
+        after the current transaction commits, so a token read before the
+        change committed is not served afterwards.
+        """
+        self._revoke(user_id)
+        transaction.on_commit(lambda: self._revoke(user_id))
+
+    def clear(self):
+        """Drop every entry from the local tier."""
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(
+    max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL,
+    shared_alias=settings.AUTH_TOKEN_CACHE_ALIAS,
+    shared_ttl=settings.AUTH_TOKEN_CACHE_SHARED_TTL,
+)
+
+# User fields cached with a token: those authentication and the
+# permission checks read, and the profile the me endpoint renders. Other
+# fields are loaded on first access, and the password hash is never
+# cached.
+AUTH_USER_FIELDS = [
+    'id', 'email', 'name', 'is_active', 'is_staff', 'is_superuser',
+]
+
+
+def _record(token):
+    """Return what is cached of a token and its user."""
+    user = token.user
+    return (token.created,
+            {field: getattr(user, field) for field in AUTH_USER_FIELDS})
+
+
+def _restore(key, record):
+    """Return (user, token) rebuilt from a cached record.
+
+    Fresh instances are built for every request, so requests never share
+    one. Saving the user only writes the cached fields and the fields
+    loaded or set since.
+    """
+    created, fields = record
+    User = get_user_model()
+    user = User.from_db(
+        router.db_for_read(User),
+        [f.attname for f in User._meta.concrete_fields
+         if f.attname in fields],
+        [fields[f.attname] for f in User._meta.concrete_fields
+         if f.attname in fields],
+    )
+    token = Token.from_db(
+        router.db_for_read(Token), ['key', 'user_id', 'created'],
+        [key, user.pk, created])
+    token.user = user
+    return (user, token)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that skips the token/user query on a hit."""
+
+    def authenticate_credentials(self, key):
+        """Return (user, token) for key, from the cache when possible."""
+        record = token_cache.get(key)
+        if record is None:
+            user, token = super().authenticate_credentials(key)
+            record = _record(token)
+            token_cache.set(key, user.pk, record)
+
+        return _restore(key, record)
@@ -0,0 +1,3 @@
+"""
+Database backends with persistent connection health checks.
+"""
@@ -0,0 +1,42 @@
+"""
+Connection handling shared by the database backends.
+"""
+
+
+class HealthCheckMixin:
+    """Check a persistent connection works before a request first uses it.
+
+    Enabled with CONN_HEALTH_CHECKS, like the setting Django 4.1 adds: a
+    connection that went stale between requests is replaced instead of
+    failing the request's first query.
+    """
+    health_check_done = False
+
+    @property
+    def health_check_enabled(self):
+        """Return True if persistent connections are checked."""
+        return self.settings_dict.get('CONN_HEALTH_CHECKS', False)
+
+    def connect(self):
+        """Connect, a new connection needs no check."""
+        super().connect()
+        self.health_check_done = True
+
+    def close_if_unusable_or_obsolete(self):
+        """Close an obsolete connection and check the kept one on use."""
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Close the connection if it no longer responds."""
+        if (self.connection is None or not self.health_check_enabled
+                or self.health_check_done):
+            return
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        """Return a cursor, after checking a reused connection."""
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
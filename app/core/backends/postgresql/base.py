@@ -0,0 +1,10 @@
+"""
+PostgreSQL backend with connection health checks.
+"""
+from django.db.backends.postgresql import base
+
+from core.backends.mixins import HealthCheckMixin
+
+
+class DatabaseWrapper(HealthCheckMixin, base.DatabaseWrapper):
+    """PostgreSQL connections checked before their reuse by a request."""
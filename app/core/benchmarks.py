@@ -0,0 +1,269 @@
+"""
+In-process latency and load benchmarks of the API routes.
+"""
+import io
+import statistics
+import time
+import tracemalloc
+
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.fast_json import FastJSONParser, FastJSONRenderer
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmarked request does not succeed."""
+
+
+class Scenario:
+    """A request to benchmark against one route.
+
+    build is called before every request, outside the timing, with the
+    context and returns the keyword arguments of the request. overrides
+    are settings applied while the scenario runs. skip is called with the
+    context and returns why the scenario cannot run, or None.
+    """
+
+    def __init__(self, name, method, route, build, overrides=None,
+                 skip=None):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.build = build
+        self.overrides = overrides or {}
+        self.skip = skip
+
+
+def percentile(samples, percent):
+    """Return a percentile of samples, interpolating between ranks."""
+    if len(samples) == 1:
+        return samples[0]
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return cuts[percent - 1]
+
+
+def _send(client, scenario, request):
+    """Send one request of a scenario and read the whole response."""
+    response = getattr(client, scenario.method)(**request)
+    if not 200 <= response.status_code < 300:
+        # An error response is no measurement of the route.
+        raise BenchmarkError(
+            f'{scenario.name}: {scenario.method.upper()} '
+            f'{request["path"]} answered {response.status_code}.')
+    if response.streaming:
+        # Streamed exports only query the database while being read.
+        b''.join(response.streaming_content)
+    return response
+
+
+def run_scenario(client, scenario, ctx, iterations, warmup=2,
+                 memory_iterations=3):
+    """Benchmark one scenario and return its measurements.
+
+    Latencies and query counts come from a pass without tracemalloc,
+    whose overhead would skew the timings. A shorter second pass traces
+    the peak memory allocated while handling a request. Raises
+    BenchmarkError if a response is not a success.
+    """
+    for _ in range(warmup):
+        _send(client, scenario, scenario.build(ctx))
+
+    latencies = []
+    queries = []
+    statuses = set()
+    elapsed = 0.0
+    for _ in range(iterations):
+        request = scenario.build(ctx)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = _send(client, scenario, request)
+            latency = time.perf_counter() - started
+        elapsed += latency
+        latencies.append(latency * 1000)
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(memory_iterations):
+            request = scenario.build(ctx)
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            _send(client, scenario, request)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'route': scenario.route,
+        'method': scenario.method.upper(),
+        'status': sorted(statuses),
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'throughput_rps': round(iterations / elapsed, 1) if elapsed else None,
+        'queries': max(queries),
+        'peak_alloc_kb': round(max(peaks, default=0) / 1024, 1),
+    }
+
+
+def run(ctx, scenarios, iterations=50, only=None):
+    """Benchmark every scenario and return the results by name.
+
+    Scenarios that cannot run are recorded with the reason they were
+    skipped instead of measurements.
+    """
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Token {ctx.token.key}')
+    results = {}
+    for scenario in scenarios:
+        if only and scenario.name not in only:
+            continue
+        reason = scenario.skip(ctx) if scenario.skip else None
+        if reason:
+            results[scenario.name] = {
+                'route': scenario.route,
+                'method': scenario.method.upper(),
+                'skipped': reason,
+            }
+            continue
+        with override_settings(**scenario.overrides):
+            results[scenario.name] = run_scenario(
+                client, scenario, ctx, iterations)
+    return results
+
+
+# Connection settings compared by run_connections.
+CONNECTION_MODES = {
+    'fresh': {'CONN_MAX_AGE': 0},
+    'persistent': {'CONN_MAX_AGE': None},
+}
+
+
+def time_connection_requests(wrapper, iterations, sql='SELECT 1'):
+    """Return the latency in ms of requests running one query each.
+
+    Each request runs the connection handling Django hooks to the
+    request_started and request_finished signals around its query.
+    """
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute(sql)
+            cursor.fetchall()
+        wrapper.close_if_unusable_or_obsolete()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def run_connections(alias='default', iterations=200, modes=None):
+    """Compare per-request latency of the connection modes of alias.
+
+    Each mode gets its own connection to the database, configured like
+    alias except for the connection reuse settings.
+    """
+    configured = connections[alias]
+    results = {}
+    for name in modes or CONNECTION_MODES:
+        settings_dict = {**configured.settings_dict,
+                         **CONNECTION_MODES[name]}
+        bench_alias = f'{alias}-benchmark-{name}'
+        wrapper = type(configured)(settings_dict, alias=bench_alias)
+        try:
+            latencies = time_connection_requests(wrapper, iterations)
+        finally:
+            wrapper.close()
+        results[name] = {
+            'iterations': iterations,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+        }
+    return results
+
+
+# Codecs compared by run_json.
+JSON_CODECS = {
+    'drf': (JSONRenderer, JSONParser),
+    'fast': (FastJSONRenderer, FastJSONParser),
+}
+
+
+def _best_ms(func, repeat):
+    """Return the fastest of repeat runs of func in ms."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings), 3)
+
+
+def run_json(payloads, repeat=5):
+    """Compare rendering and parsing payloads with each JSON codec.
+
+    payloads maps names to lists of items. Every codec renders each
+    payload; identical tells whether its bytes equal the DRF renderer's.
+    """
+    results = {}
+    for name, payload in payloads.items():
+        expected = JSONRenderer().render(payload)
+        result = results[name] = {
+            'items': len(payload),
+            'bytes': len(expected),
+        }
+        for codec, (renderer_class, parser_class) in JSON_CODECS.items():
+            renderer, parser = renderer_class(), parser_class()
+            rendered = renderer.render(payload)
+            result[codec] = {
+                'identical': rendered == expected,
+                'render_ms': _best_ms(
+                    lambda: renderer.render(payload), repeat),
+                'parse_ms': _best_ms(
+                    lambda: parser.parse(io.BytesIO(rendered)), repeat),
+            }
+    return results
+
+
+# Measurements compared with the baseline and how much they may grow.
+GATED_METRICS = {
+    'p95_ms': 'threshold',
+    'peak_alloc_kb': 'threshold',
+    'queries': 'exact',
+}
+
+
+def compare(results, baseline, threshold):
+    """Return the regressions of results against a baseline.
+
+    Latency and memory may grow by threshold (a fraction) before they
+    count; query counts are deterministic and may not grow at all.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, rule in GATED_METRICS.items():
+            before, after = previous.get(metric), result.get(metric)
+            if before is None or after is None:
+                continue
+            limit = before if rule == 'exact' else before * (1 + threshold)
+            if after > limit:
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': before,
+                    'current': after,
+                })
+    return regressions
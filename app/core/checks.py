@@ -0,0 +1,36 @@
+"""
+System checks for the core settings.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Require a cache shared by all workers for the replica pins.
+
+    A user's write is usually followed by a read in another worker, which
+    only sees the pin through a shared cache.
+    """
+    if not settings.DB_REPLICA_ALIASES:
+        return []
+    alias = settings.DB_REPLICA_PIN_CACHE_ALIAS
+    if alias not in settings.CACHES:
+        return [Error(
+            f'DB_REPLICA_PIN_CACHE_ALIAS refers to the unknown cache '
+            f'{alias!r}.',
+            id='core.E001',
+        )]
+    if isinstance(caches[alias], (LocMemCache, DummyCache)):
+        return [Error(
+            f'Read replicas need a cache shared between processes for '
+            f'DB_REPLICA_PIN_CACHE_ALIAS, {alias!r} is local to a process.',
+            hint='Point CACHE_BACKEND at a shared cache such as Redis or '
+                 'Memcached, or DB_REPLICA_PIN_CACHE_ALIAS at another '
+                 'alias.',
+            id='core.E002',
+        )]
+    return []
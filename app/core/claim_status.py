@@ -0,0 +1,63 @@
+"""
+Current claim status derived from the claim's status tags.
+"""
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Claim, ClaimStatusTransition
+
+
+DEFAULT_STATUS = 'RAISED'
+
+
+def latest_tag_status():
+    """Return an expression of the status of a claim's newest tag link."""
+    links = Claim.tags.through.objects.filter(
+        claim_id=OuterRef('pk')).order_by('-id')
+    return Coalesce(
+        Subquery(links.values('tag__claim_status')[:1]),
+        Value(DEFAULT_STATUS))
+
+
+def status_for_tags(keys):
+    """Return the status of a claim linked to tag keys in that order.
+
+    Keys are the (claim_status, description) pairs of core.tags.tag_key.
+    """
+    return keys[-1][0] if keys else DEFAULT_STATUS
+
+
+def sync_statuses(claim_ids):
+    """Update claims whose tags moved them to another status.
+
+    Each change updates the claim's status columns and appends a
+    transition. Returns the number of claims that changed.
+    """
+    claims = list(
+        Claim.objects.filter(pk__in=claim_ids)
+        .annotate(tag_status=latest_tag_status())
+        .only('id', 'status')
+    )
+    changed = [claim for claim in claims if claim.status != claim.tag_status]
+    if not changed:
+        return 0
+
+    now = timezone.now()
+    transitions = []
+    for claim in changed:
+        transitions.append(ClaimStatusTransition(
+            claim=claim,
+            from_status=claim.status,
+            to_status=claim.tag_status,
+            created_at=now,
+        ))
+        claim.status = claim.tag_status
+        claim.status_changed_at = now
+        claim.updated_at = now
+    # bulk_update skips the claim save handlers, which only track amounts
+    # and images.
+    Claim.objects.bulk_update(
+        changed, ['status', 'status_changed_at', 'updated_at'])
+    ClaimStatusTransition.objects.bulk_create(transitions)
+    return len(changed)
@@ -0,0 +1,168 @@
+"""
+Per-view database query metrics.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from prometheus_client import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, float('inf'))
+TIME_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+    float('inf'),
+)
+
+VIEW_DB_QUERIES = Histogram(
+    'django_view_db_queries',
+    'Database queries run per request, by view.',
+    ['view'],
+    buckets=QUERY_BUCKETS,
+)
+VIEW_DB_SECONDS = Histogram(
+    'django_view_db_seconds',
+    'Total database time per request, by view.',
+    ['view'],
+    buckets=TIME_BUCKETS,
+)
+VIEW_DB_SLOWEST_SECONDS = Histogram(
+    'django_view_db_slowest_query_seconds',
+    'Duration of the slowest query of a request, by view.',
+    ['view'],
+    buckets=TIME_BUCKETS,
+)
+
+_STRING = re.compile(r"'(?:''|[^'])*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_PLACEHOLDER = re.compile(r'%s|\?')
+_SPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """Return sql with literals and placeholders replaced by ``?``."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    """Return a short hash identifying statements of the same shape."""
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """execute_wrapper recording the queries of one request."""
+
+    def __init__(self, slow_ms=None):
+        self.slow_ms = slow_ms
+        self.view = None
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.total += duration
+            self.slowest = max(self.slowest, duration)
+            if self.slow_ms is not None and duration * 1000 >= self.slow_ms:
+                logger.warning(
+                    'Slow query %.1f ms in %s [%s]: %s',
+                    duration * 1000, self.view or 'unresolved',
+                    fingerprint(sql), normalize(sql),
+                )
+
+    @contextmanager
+    def installed(self):
+        """Record the queries of every connection in the block."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield
+
+    def observe(self):
+        """Export the recorded totals to the histograms."""
+        view = self.view or 'unresolved'
+        VIEW_DB_QUERIES.labels(view=view).observe(self.count)
+        VIEW_DB_SECONDS.labels(view=view).observe(self.total)
+        if self.count:
+            VIEW_DB_SLOWEST_SECONDS.labels(view=view).observe(self.slowest)
+
+
+class DatabaseMetricsMiddleware:
+    """Record query count and time of each request by resolved view name.
+
+    Streaming responses are measured until their content is consumed,
+    since their queries run while it is being read. Under ASGI the
+    middleware runs on the event loop, rather than making Django adapt
+    the rest of the chain to sync.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(self.get_response):
+            # Mark the instance async like MiddlewareMixin does.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder = QueryRecorder(slow_ms=settings.DB_SLOW_QUERY_LOG_MS)
+        request._db_recorder = recorder
+        with recorder.installed():
+            response = self.get_response(request)
+        return self._finish(response, recorder)
+
+    async def __acall__(self, request):
+        """Async version of __call__, used when serving under ASGI."""
+        recorder = QueryRecorder(slow_ms=settings.DB_SLOW_QUERY_LOG_MS)
+        request._db_recorder = recorder
+        # Connections belong to a thread. The views query from the thread
+        # sync_to_async runs the request's sync code on, so the wrappers
+        # are installed and removed there too.
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(recorder.installed())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._finish(response, recorder)
+
+    def _finish(self, response, recorder):
+        """Observe the recorder now, or once streamed content is read."""
+        if response.streaming:
+            response.streaming_content = self._stream(
+                response.streaming_content, recorder)
+        else:
+            recorder.observe()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Label the recorder with the resolved view name."""
+        request._db_recorder.view = request.resolver_match.view_name
+
+    def _stream(self, content, recorder):
+        """Yield the streamed content with the recorder installed."""
+        try:
+            with recorder.installed():
+                yield from content
+        finally:
+            recorder.observe()
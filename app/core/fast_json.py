@@ -0,0 +1,107 @@
+"""
+JSON renderer and parser backed by orjson, with DRF's output.
+"""
+import codecs
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson reads integers beyond 64 bits as floats. Documents with digit
+# runs that long are left to JSONParser, which keeps them exact. Mapping
+# digits to 0 first finds them much faster than a regular expression.
+DIGITS = bytes(
+    ord('0') if ord('0') <= byte <= ord('9') else ord(' ')
+    for byte in range(256))
+LONG_NUMBER = b'0' * 19
+
+# Floats Python prints in exponent notation, below 1e-4 or from 1e16 on,
+# which orjson prints as 0.00001 or 1e16. Number tokens follow one of
+# ":,[". Mapping those to "," and digits to 0 first lets the expression
+# skip most of the output quickly. Text inside strings can match too,
+# which only costs a fallback.
+NUMBER_CHARS = bytes(
+    ord('0') if ord('0') <= byte <= ord('9')
+    else ord(',') if byte in b':,['
+    else byte if byte in b'.e-'
+    else ord(' ')
+    for byte in range(256))
+EXPONENT_FLOAT = re.compile(rb',-?0(?:\.0000|[0.]*e)')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Render JSON with orjson, byte for byte like JSONRenderer.
+
+    UUIDs, strings and numbers are encoded natively. Decimals, dates and
+    times, which orjson would format differently, and every other type go
+    through DRF's encoder, so a Decimal still renders as a float and a
+    datetime with millisecond precision. Indented, ASCII-only or spaced
+    output, integers beyond 64 bits, floats Python prints in exponent
+    notation and a missing orjson fall back to JSONRenderer. The one
+    difference left is that NaN and infinite floats render as null where
+    JSONRenderer raises ValueError.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render data into JSON bytes."""
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self._encoder.default,
+                option=(orjson.OPT_PASSTHROUGH_DATETIME
+                        | orjson.OPT_NON_STR_KEYS),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if EXPONENT_FLOAT.search(ret.translate(NUMBER_CHARS)):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, keep the output a strict JavaScript subset.
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """Parse JSON with orjson, falling back to JSONParser.
+
+    Documents orjson rejects are parsed again by JSONParser, which reports
+    the errors. Documents that may hold integers beyond 64 bits go to
+    JSONParser directly.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Parse the request body into Python data."""
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        if LONG_NUMBER in body.translate(DIGITS):
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context)
+        try:
+            if codecs.lookup(encoding).name == 'utf-8':
+                return orjson.loads(body)
+            return orjson.loads(body.decode(encoding))
+        except (LookupError, UnicodeDecodeError, orjson.JSONDecodeError):
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,71 @@
+"""
+Image variant generation run inside the image worker processes.
+
+This module only depends on Pillow so worker processes can import it
+without setting up Django.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+
+def variant_names(name):
+    """Return the names of the variants stored next to an image."""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}_thumb.jpg', f'{stem}.webp', f'{stem}_stripped{ext}'
+
+
+def _save(image, path, **params):
+    """Write image to path through a temporary file.
+
+    Several processes may write the variants of the same content at once,
+    readers only ever see one of the complete files.
+    """
+    partial = f'{path}.{os.getpid()}.partial'
+    try:
+        image.save(partial, **params)
+        os.replace(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def process_image(root, name, thumbnail_size, jpeg_quality, webp_quality):
+    """Write the variants of an image without its metadata.
+
+    The original is named after its content and left as uploaded. A copy
+    in the original format without EXIF data, after applying its
+    orientation tag, a thumbnail and a WebP copy are written next to it.
+    Returns the dimensions and the storage names of the variants.
+    """
+    with Image.open(os.path.join(root, name)) as source:
+        image_format = source.format
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    thumbnail_name, webp_name, stripped_name = variant_names(name)
+
+    # Saving without the exif argument drops the metadata.
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    params = {'quality': jpeg_quality} if image_format == 'JPEG' else {}
+    _save(image, os.path.join(root, stripped_name),
+          format=image_format, **params)
+
+    _save(image, os.path.join(root, webp_name),
+          format='WEBP', quality=webp_quality)
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail(thumbnail_size)
+    if thumbnail.mode not in ('RGB', 'L'):
+        thumbnail = thumbnail.convert('RGB')
+    _save(thumbnail, os.path.join(root, thumbnail_name),
+          format='JPEG', quality=jpeg_quality)
+
+    return {
+        'image_width': image.width,
+        'image_height': image.height,
+        'thumbnail': thumbnail_name,
+        'image_webp': webp_name,
+        'image_stripped': stripped_name,
+    }
@@ -0,0 +1,222 @@
+"""
+Background processing of uploaded claim images.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.image_variants import process_image, variant_names
+from core.models import Claim, StoredFile
+from core.response_cache import invalidate_claims
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolFull(Exception):
+    """Raised when too many images are already waiting to be processed."""
+
+
+def worker_python():
+    """Return the Python interpreter that starts the image workers.
+
+    Spawned workers run sys.executable, which under uWSGI is the uwsgi
+    binary and cannot start them. IMAGE_PROCESSING_PYTHON overrides the
+    choice, otherwise the first python3 on the PATH is used.
+    """
+    if settings.IMAGE_PROCESSING_PYTHON:
+        return settings.IMAGE_PROCESSING_PYTHON
+    if os.path.basename(sys.executable).startswith('python'):
+        return sys.executable
+    return shutil.which('python3') or sys.executable
+
+
+class ImagePool:
+    """Bounded process pool generating claim image variants.
+
+    At most max_pending images are queued or running at a time; further
+    submissions raise PoolFull instead of growing the queue. Claims whose
+    image is already being processed wait for that job instead of
+    starting another one.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self.max_workers = max_workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        # Claim ids waiting for the job of each storage name.
+        self._waiting = {}
+
+    @property
+    def executor(self):
+        """Start the worker processes on first use."""
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the server's threads or
+                # open connections.
+                context = multiprocessing.get_context('spawn')
+                context.set_executable(worker_python())
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=context)
+            return self._executor
+
+    def submit(self, claim_id, name):
+        """Queue the image of a claim for processing."""
+        with self._lock:
+            if name in self._waiting:
+                self._waiting[name].append(claim_id)
+                return
+            if not self._slots.acquire(blocking=False):
+                raise PoolFull()
+            self._waiting[name] = [claim_id]
+        try:
+            future = self.executor.submit(process_image, *_job_args(name))
+        except Exception:
+            with self._lock:
+                del self._waiting[name]
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda future: self._finish(name, future))
+
+    def _finish(self, name, future):
+        """Record the result of a job, runs on a pool thread."""
+        with self._lock:
+            claim_ids = self._waiting.pop(name)
+        self._slots.release()
+        try:
+            result = future.result()
+            for claim_id in claim_ids:
+                record_result(claim_id, name, result)
+        except Exception:
+            logger.exception('Processing image %s failed.', name)
+            for claim_id in claim_ids:
+                record_failure(claim_id, name)
+        finally:
+            connection.close()
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def _job_args(name):
+    """Return the arguments of process_image for a stored file."""
+    return (
+        settings.MEDIA_ROOT,
+        name,
+        settings.IMAGE_THUMBNAIL_SIZE,
+        settings.IMAGE_JPEG_QUALITY,
+        settings.IMAGE_WEBP_QUALITY,
+    )
+
+
+RESULT_FIELDS = [
+    'image_width', 'image_height', 'thumbnail', 'image_webp', 'image_stripped',
+]
+
+
+def record_result(claim_id, name, result):
+    """Store the processed variants, unless the image was replaced."""
+    claims = Claim.objects.filter(pk=claim_id, image=name)
+    claims.update(
+        image_status=Claim.IMAGE_READY, updated_at=timezone.now(), **result)
+    invalidate_claims(claims)
+
+
+def record_failure(claim_id, name):
+    """Mark the image of a claim as failed."""
+    claims = Claim.objects.filter(pk=claim_id, image=name)
+    claims.update(image_status=Claim.IMAGE_FAILED, updated_at=timezone.now())
+    invalidate_claims(claims)
+
+
+image_pool = ImagePool(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    max_pending=settings.IMAGE_PROCESSING_MAX_PENDING,
+)
+
+
+def process_claim_image(claim):
+    """Process the image of claim now, in the current process."""
+    name = claim.image.name
+    try:
+        result = process_image(*_job_args(name))
+    except Exception:
+        logger.exception('Processing image %s failed.', name)
+        record_failure(claim.pk, name)
+    else:
+        record_result(claim.pk, name, result)
+    claim.refresh_from_db()
+
+
+def schedule_claim_image(claim):
+    """Hand the image of claim to the pool and mark it pending.
+
+    When the pool is full the claim stays pending, so the
+    process_claim_images command can pick it up later.
+    """
+    claims = Claim.objects.filter(pk=claim.pk)
+    claims.update(image_status=Claim.IMAGE_PENDING)
+    invalidate_claims(claims)
+    claim.image_status = Claim.IMAGE_PENDING
+
+    # The same content was processed for another claim already. Images
+    # processed before stripped copies were kept are processed again.
+    done = Claim.objects.filter(
+        image=claim.image.name, image_status=Claim.IMAGE_READY,
+        image_stripped__isnull=False,
+    ).exclude(pk=claim.pk).values(*RESULT_FIELDS).first()
+    if done is not None:
+        record_result(claim.pk, claim.image.name, done)
+        claim.refresh_from_db()
+        return
+
+    if settings.IMAGE_PROCESSING_SYNC:
+        process_claim_image(claim)
+        return
+
+    try:
+        image_pool.submit(claim.pk, claim.image.name)
+    except PoolFull:
+        logger.warning('Image pool full, claim %s left pending.', claim.pk)
+
+
+def retain_image(name):
+    """Add a reference to a stored image."""
+    StoredFile.objects.get_or_create(name=name)
+    StoredFile.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+
+
+def _delete_unreferenced(name):
+    """Delete an image and its variants unless it was referenced again."""
+    if StoredFile.objects.filter(name=name).exists():
+        return
+    storage = Claim._meta.get_field('image').storage
+    storage.delete(name)
+    for variant in variant_names(name):
+        default_storage.delete(variant)
+
+
+def release_image(name):
+    """Drop a reference to a stored image, deleting it at zero."""
+    with transaction.atomic():
+        StoredFile.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1)
+        deleted, _ = StoredFile.objects.filter(
+            name=name, ref_count=0).delete()
+    if deleted:
+        transaction.on_commit(lambda: _delete_unreferenced(name))
@@ -0,0 +1,58 @@
+"""
+Import time profiling with ``python -X importtime``.
+"""
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse(text):
+    """Return the imports listed in -X importtime output, in order.
+
+    Each import is a dict with the module, its depth in the import tree
+    and its own and cumulative time in microseconds.
+    """
+    imports = []
+    for line in text.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            imports.append({
+                'module': module,
+                'depth': (len(indent) - 1) // 2,
+                'self_us': int(own),
+                'cumulative_us': int(cumulative),
+            })
+    return imports
+
+
+def profile(module):
+    """Import module in a fresh interpreter and return its imports."""
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=settings.BASE_DIR,
+        env=dict(os.environ),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    if process.returncode:
+        raise RuntimeError(
+            f'Importing {module} failed:\n{process.stderr[-2000:]}')
+    return parse(process.stderr)
+
+
+def by_package(imports):
+    """Return the own import time of each top level package, largest first."""
+    totals = {}
+    for entry in imports:
+        package = entry['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + entry['self_us']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,55 @@
+"""
+Django command to compare database connection reuse settings.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    """Django command to time requests with each connection mode."""
+
+    help = ('Time requests running one query each against the configured '
+            'database with a fresh connection per request and with a '
+            'persistent connection, and report the saving per request.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument(
+            '--modes',
+            nargs='+',
+            choices=list(benchmarks.CONNECTION_MODES),
+            help='Only run the named connection modes.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this path.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        settings_dict = connections[options['database']].settings_dict
+        self.stdout.write(
+            f'Benchmarking {settings_dict["ENGINE"]} database '
+            f'{settings_dict["NAME"]} at {settings_dict["HOST"] or "-"}.')
+
+        results = benchmarks.run_connections(
+            options['database'], options['iterations'], options['modes'])
+        fresh = results.get('fresh')
+        for name, result in results.items():
+            line = (f'{name:12} p50 {result["p50_ms"]:8.3f} ms  '
+                    f'p95 {result["p95_ms"]:8.3f} ms  '
+                    f'mean {result["mean_ms"]:8.3f} ms')
+            if fresh and name != 'fresh':
+                saving = fresh['mean_ms'] - result['mean_ms']
+                line += f'  saves {saving:8.3f} ms per request'
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
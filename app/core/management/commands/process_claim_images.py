@@ -0,0 +1,37 @@
+"""
+Django command to process claim images left pending.
+"""
+from django.core.management.base import BaseCommand
+
+from core.images import process_claim_image
+from core.models import Claim
+
+
+class Command(BaseCommand):
+    """Django command to generate variants for pending claim images."""
+
+    help = ('Process claim images that are still pending, for example '
+            'after a worker restart or when the pool was full.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry images whose processing failed.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        statuses = [Claim.IMAGE_PENDING]
+        if options['retry_failed']:
+            statuses.append(Claim.IMAGE_FAILED)
+
+        claims = Claim.objects.filter(
+            image_status__in=statuses).exclude(image='')
+        processed = 0
+        for claim in claims.iterator():
+            process_claim_image(claim)
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} claim images.'))
@@ -0,0 +1,68 @@
+"""
+Django command to profile the imports of a server process.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import importtime
+
+
+class Command(BaseCommand):
+    """Django command to list the slowest imports at startup."""
+
+    help = ('Import the WSGI module in a fresh interpreter with '
+            '-X importtime and list the modules and packages that take '
+            'the longest, to find candidates for lazy imports.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--module',
+            default='app.wsgi',
+            help='Module to import, defaults to the WSGI application.',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=25,
+            help='Number of modules and packages to list.',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=['self', 'cumulative'],
+            default='cumulative',
+            help='Order modules by their own or cumulative time.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write every import as JSON to this path.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        try:
+            imports = importtime.profile(options['module'])
+        except RuntimeError as error:
+            raise CommandError(str(error))
+
+        total = sum(entry['self_us'] for entry in imports)
+        self.stdout.write(
+            f'{len(imports)} modules imported in {total / 1000:.1f} ms.')
+
+        key = f'{options["sort"]}_us'
+        self.stdout.write('\nModules:')
+        slowest = sorted(imports, key=lambda entry: entry[key], reverse=True)
+        for entry in slowest[:options['top']]:
+            self.stdout.write(
+                f'{entry["cumulative_us"] / 1000:9.1f} ms cumulative  '
+                f'{entry["self_us"] / 1000:8.1f} ms self  '
+                f'{entry["module"]}')
+
+        self.stdout.write('\nPackages:')
+        for package, own in importtime.by_package(imports)[:options['top']]:
+            self.stdout.write(f'{own / 1000:9.1f} ms  {package}')
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(imports, file, indent=2)
+            self.stdout.write(f'Imports written to {options["output"]}.')
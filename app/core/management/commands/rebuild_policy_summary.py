@@ -0,0 +1,39 @@
+"""
+Django command to rebuild the policy portfolio summary.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import summary
+
+
+class Command(BaseCommand):
+    """Django command to check and rebuild the policy summary table."""
+
+    help = ('Compare the policy summary table with totals computed from '
+            'scratch and rebuild it.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, fail if any row differs.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        drifted = summary.drift()
+        for (user_id, title), (stored, expected) in sorted(
+                drifted.items(), key=str):
+            self.stdout.write(
+                f'Drift for user {user_id} {title}: '
+                f'stored {stored} expected {expected}')
+
+        if options['check']:
+            if drifted:
+                raise CommandError(f'{len(drifted)} summary rows drifted.')
+            self.stdout.write(self.style.SUCCESS('Policy summary is in sync.'))
+            return
+
+        rows = summary.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} summary rows, {len(drifted)} had drifted.'))
@@ -0,0 +1,74 @@
+"""
+Django command to create renewals for policies about to expire.
+"""
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import renewals
+
+
+class Command(BaseCommand):
+    """Django command to renew policies ending inside a window."""
+
+    help = ('Create renewal offers for policies whose end date falls in '
+            'the window, in resumable id-range chunks.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='First end date of the window (YYYY-MM-DD), default today.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Length of the window in days.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Number of policy ids per chunk.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per cursor fetch and per bulk write.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of chunks processed in parallel.',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoints of an earlier run of the window.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        if options['days'] < 0 or options['chunk_size'] < 1:
+            raise CommandError('--days and --chunk-size must be positive.')
+        window_start = options['start'] or date.today()
+        window_end = window_start + timedelta(days=options['days'])
+
+        checkpoints = renewals.renew_policies(
+            window_start,
+            window_end,
+            chunk_size=options['chunk_size'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            restart=options['restart'],
+        )
+        processed = sum(checkpoint.processed for checkpoint in checkpoints)
+        created = sum(checkpoint.created for checkpoint in checkpoints)
+        updated = sum(checkpoint.updated for checkpoint in checkpoints)
+        self.stdout.write(self.style.SUCCESS(
+            f'Renewed policies ending {window_start} to {window_end}: '
+            f'{len(checkpoints)} chunks, {processed} policies, '
+            f'{created} created, {updated} updated.'))
@@ -0,0 +1,94 @@
+"""
+Django command to train the claim amount prediction model.
+"""
+import os
+import resource
+import time
+
+import joblib
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+
+from core import training
+
+
+class Command(BaseCommand):
+    """Django command to train the claim model from the database."""
+
+    help = ('Train the claim amount model on the stored claims, reading '
+            'them in chunks, and save it for the predict endpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=settings.CLAIM_MODEL_PATH,
+            help='Path the trained pipeline is written to.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Number of claim ids read per chunk.',
+        )
+        parser.add_argument(
+            '--cache-dir',
+            default=settings.CLAIM_TRAINING_CACHE_DIR,
+            help='Directory caching featurized chunks between runs.',
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Featurize every chunk from the database.',
+        )
+        parser.add_argument('--n-estimators', type=int, default=100)
+        parser.add_argument('--max-depth', type=int, default=10)
+        parser.add_argument(
+            '--n-jobs',
+            type=int,
+            default=-1,
+            help='Cores used to fit the trees, -1 for all of them.',
+        )
+        parser.add_argument('--test-size', type=float, default=0.3)
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        started = time.perf_counter()
+        cache_dir = None if options['no_cache'] else options['cache_dir']
+        features, target, stats = training.training_data(
+            options['chunk_size'], cache_dir=cache_dir)
+        if features.shape[0] < 2:
+            raise CommandError('At least two claims are needed to train.')
+        self.stdout.write(
+            f'Loaded {features.shape[0]} claims in {stats["chunks"]} '
+            f'chunks, {stats["cached"]} from the cache.')
+
+        X_train, X_test, y_train, y_test = train_test_split(
+            features, target, test_size=options['test_size'],
+            random_state=42)
+        pipeline = Pipeline(steps=[('rf', RandomForestRegressor(
+            n_estimators=options['n_estimators'],
+            max_depth=options['max_depth'],
+            n_jobs=options['n_jobs'],
+        ))])
+        pipeline.fit(X_train, y_train)
+
+        if X_test.shape[0]:
+            rmse = mean_squared_error(
+                y_test, pipeline.predict(X_test)) ** 0.5
+            self.stdout.write(f'Root Mean Squared Error (RMSE) = {rmse:.2f}')
+
+        output_dir = os.path.dirname(options['output'])
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        joblib.dump(pipeline, options['output'])
+
+        elapsed = time.perf_counter() - started
+        # ru_maxrss is in kilobytes on Linux.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(self.style.SUCCESS(
+            f'Saved model to {options["output"]} in {elapsed:.1f} s, '
+            f'peak RSS {peak_rss:.0f} MiB.'))
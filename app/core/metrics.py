@@ -0,0 +1,31 @@
+"""
+Prometheus setup for multi-process servers.
+"""
+import os
+
+from prometheus_client import multiprocess
+
+
+def multiprocess_dir():
+    """Return the shared metrics directory, None in single process mode."""
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+
+def mark_worker_dead():
+    """Remove the live gauge files of the exiting worker.
+
+    Counter and histogram files are kept, so the totals of a worker that
+    exited stay part of the aggregated scrape.
+    """
+    multiprocess.mark_process_dead(os.getpid())
+
+
+def setup_multiprocess():
+    """Clean up a uWSGI worker's metric files when it exits."""
+    if not multiprocess_dir():
+        return
+    try:
+        import uwsgi
+    except ImportError:
+        return
+    uwsgi.atexit = mark_worker_dead
@@ -0,0 +1,19 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_rename_claimer_claim_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='claim',
+            name='policy',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claims', to='core.policy'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_claim_policy_related_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PolicySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(choices=[('None', 'None'), ('VEHICLE', 'Vehicle'), ('EMPLOYMENT', 'Employment'), ('HEALTH', 'Health'), ('TRAVEL', 'Travel')], max_length=15)),
+                ('policy_count', models.IntegerField(default=0)),
+                ('premium_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('sum_assured_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('claimed_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('claim_count', models.IntegerField(default=0)),
+                ('claim_amount_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='policy_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='policysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'title'), name='unique_policy_summary'),
+        ),
+    ]
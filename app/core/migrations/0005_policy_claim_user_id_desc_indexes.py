@@ -0,0 +1,21 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_policysummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['user', '-id'], name='claim_user_id_desc'),
+        ),
+        migrations.AddIndex(
+            model_name='policy',
+            index=models.Index(fields=['user', '-id'], name='policy_user_id_desc'),
+        ),
+    ]
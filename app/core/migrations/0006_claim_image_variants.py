@@ -0,0 +1,38 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_policy_claim_user_id_desc_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claim',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='image_webp',
+            field=models.FileField(editable=False, null=True, upload_to=''),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='thumbnail',
+            field=models.ImageField(editable=False, null=True, upload_to=''),
+        ),
+    ]
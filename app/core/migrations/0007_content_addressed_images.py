@@ -0,0 +1,42 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:23
+
+import core.models
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_references(apps, schema_editor):
+    """Create reference counts for images uploaded before this change."""
+    Claim = apps.get_model('core', 'Claim')
+    StoredFile = apps.get_model('core', 'StoredFile')
+    counts = Claim.objects.exclude(image='').exclude(
+        image__isnull=True).values('image').annotate(refs=Count('id'))
+    StoredFile.objects.bulk_create(
+        StoredFile(name=row['image'], ref_count=row['refs'])
+        for row in counts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_claim_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='claim',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.policy_image_file_path),
+        ),
+        migrations.RunPython(count_references, migrations.RunPython.noop),
+    ]
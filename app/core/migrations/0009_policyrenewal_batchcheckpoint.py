@@ -0,0 +1,48 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_policy_claim_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job', models.CharField(max_length=100)),
+                ('start_id', models.BigIntegerField()),
+                ('end_id', models.BigIntegerField()),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('updated', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PolicyRenewal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('startDate', models.DateField()),
+                ('endDate', models.DateField()),
+                ('premiumAmt', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('ACCEPTED', 'Accepted'), ('DECLINED', 'Declined')], default='PENDING', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('policy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renewals', to='core.policy')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='batchcheckpoint',
+            constraint=models.UniqueConstraint(fields=('job', 'start_id'), name='unique_batch_checkpoint'),
+        ),
+        migrations.AddConstraint(
+            model_name='policyrenewal',
+            constraint=models.UniqueConstraint(fields=('policy', 'startDate'), name='unique_policy_renewal'),
+        ),
+    ]
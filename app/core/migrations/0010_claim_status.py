@@ -0,0 +1,51 @@
+# Generated by Django 4.0.1 on 2026-10-17 18:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_policyrenewal_batchcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaimStatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('RAISED', 'Raised'), ('IN_PROGRESS', 'In Progress'), ('ACCEPTED', 'Accepted'), ('REJECTED', 'Rejected')], max_length=15)),
+                ('to_status', models.CharField(choices=[('RAISED', 'Raised'), ('IN_PROGRESS', 'In Progress'), ('ACCEPTED', 'Accepted'), ('REJECTED', 'Rejected')], max_length=15)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='status',
+            field=models.CharField(choices=[('RAISED', 'Raised'), ('IN_PROGRESS', 'In Progress'), ('ACCEPTED', 'Accepted'), ('REJECTED', 'Rejected')], default='RAISED', max_length=15),
+        ),
+        migrations.AddField(
+            model_name='claim',
+            name='status_changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='claim',
+            index=models.Index(fields=['status', 'status_changed_at'], name='claim_status_queue'),
+        ),
+        migrations.AddField(
+            model_name='claimstatustransition',
+            name='claim',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='core.claim'),
+        ),
+        migrations.AddIndex(
+            model_name='claimstatustransition',
+            index=models.Index(fields=['claim', 'created_at'], name='transition_claim_created'),
+        ),
+        migrations.AddIndex(
+            model_name='claimstatustransition',
+            index=models.Index(fields=['to_status', 'created_at'], name='transition_status_created'),
+        ),
+    ]
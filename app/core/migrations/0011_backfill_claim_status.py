@@ -0,0 +1,83 @@
+"""
+Set the status of existing claims from their status tags, in batches.
+"""
+from django.db import migrations, transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_claim_status(apps, schema_editor):
+    """Set each claim's status from its newest tag link.
+
+    Batches commit on their own, so a large table is not locked in one
+    transaction. Claims that already have a transition were converted by
+    an earlier, interrupted run and are skipped. Only the current status
+    is known, so each moved claim gets one transition from RAISED, dated
+    at its last update.
+    """
+    Claim = apps.get_model('core', 'Claim')
+    ClaimStatusTransition = apps.get_model('core', 'ClaimStatusTransition')
+    ClaimTag = Claim.tags.through
+    db_alias = schema_editor.connection.alias
+
+    links = ClaimTag.objects.using(db_alias).filter(
+        claim_id=OuterRef('pk')).order_by('-id')
+    tag_status = Coalesce(
+        Subquery(links.values('tag__claim_status')[:1]), Value('RAISED'))
+
+    last_id = 0
+    while True:
+        claims = list(
+            Claim.objects.using(db_alias)
+            .filter(id__gt=last_id)
+            .order_by('id')
+            .annotate(tag_status=tag_status)
+            .only('id', 'status', 'updated_at')[:BATCH_SIZE]
+        )
+        if not claims:
+            break
+        last_id = claims[-1].id
+
+        converted = set(
+            ClaimStatusTransition.objects.using(db_alias)
+            .filter(claim_id__in=[claim.id for claim in claims])
+            .values_list('claim_id', flat=True)
+        )
+        moved = [
+            claim for claim in claims
+            if claim.id not in converted and claim.tag_status != 'RAISED'
+        ]
+        for claim in claims:
+            claim.status = claim.tag_status
+            claim.status_changed_at = claim.updated_at
+
+        with transaction.atomic(using=db_alias):
+            Claim.objects.using(db_alias).bulk_update(
+                [claim for claim in claims if claim.id not in converted],
+                ['status', 'status_changed_at'],
+            )
+            ClaimStatusTransition.objects.using(db_alias).bulk_create([
+                ClaimStatusTransition(
+                    claim_id=claim.id,
+                    from_status='RAISED',
+                    to_status=claim.status,
+                    created_at=claim.updated_at,
+                )
+                for claim in moved
+            ])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0010_claim_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_claim_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+"""
+Merge duplicate tags before they are made unique.
+"""
+from django.db import migrations
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Merge tags sharing a status and description into the oldest one.
+
+    Links to a duplicate move to the kept tag, unless the claim already
+    has it. Moved links keep their ids, so claim statuses do not change.
+    """
+    Tag = apps.get_model('core', 'Tag')
+    ClaimTag = apps.get_model('core', 'Claim').tags.through
+    db_alias = schema_editor.connection.alias
+
+    kept = {}
+    duplicates = {}
+    for tag_id, claim_status, description in (
+            Tag.objects.using(db_alias).order_by('id')
+            .values_list('id', 'claim_status', 'description')):
+        key = (claim_status, description)
+        if key in kept:
+            duplicates[tag_id] = kept[key]
+        else:
+            kept[key] = tag_id
+    if not duplicates:
+        return
+
+    links = ClaimTag.objects.using(db_alias)
+    for duplicate_id, tag_id in duplicates.items():
+        linked = links.filter(tag_id=tag_id).values('claim_id')
+        links.filter(tag_id=duplicate_id, claim_id__in=linked).delete()
+        links.filter(tag_id=duplicate_id).update(tag_id=tag_id)
+    Tag.objects.using(db_alias).filter(pk__in=list(duplicates)).delete()
+
+
+class Migration(migrations.Migration):
+    # The unique constraint is added by the next migration: Postgres
+    # refuses to alter a table with pending deferred FK checks.
+
+    dependencies = [
+        ('core', '0011_backfill_claim_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_tags, migrations.RunPython.noop),
+    ]
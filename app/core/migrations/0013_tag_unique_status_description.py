@@ -0,0 +1,17 @@
+# Generated by Django 4.0.1 on 2026-10-17 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_merge_duplicate_tags'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('claim_status', 'description'), name='tag_status_description_unique'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-17 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_tag_unique_status_description'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='claim',
+            name='image_stripped',
+            field=models.ImageField(editable=False, null=True, upload_to=''),
+        ),
+    ]
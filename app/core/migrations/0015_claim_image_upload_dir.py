@@ -0,0 +1,19 @@
+# Generated by Django 4.0.1 on 2026-10-17 19:50
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_claim_image_stripped'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='claim',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to='uploads/policy'),
+        ),
+    ]
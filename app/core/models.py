@@ -2,25 +2,28 @@
 Database models.
 """
 import uuid
-import os
 
 from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.storage import ContentAddressedStorage
+
 
 def policy_image_file_path(instance, filename):
-    """Generate file path for new policy image."""
-    ext = os.path.splitext(filename)[1]
-    filename = f'{uuid.uuid4()}{ext}'
+    """Return the upload path of a claim image.
 
-    return os.path.join('uploads', 'policy', filename)
+    Kept for the migrations that reference it. Claim images are stored
+    under a hash of their content, so only the directory is used.
+    """
+    return f'uploads/policy/{filename}'
 
 
 class UserManager(BaseUserManager):
@@ -81,6 +84,14 @@ class Tag(models.Model):
         default='RAISED',)
     description = models.TextField(blank=True)
 
+    class Meta:
+        constraints = [
+            # Tags are interned by status and description, see core.tags.
+            models.UniqueConstraint(
+                fields=['claim_status', 'description'],
+                name='tag_status_description_unique'),
+        ]
+
     def __str__(self):
         return self.get_claim_status_display()
 
@@ -113,6 +124,13 @@ class Policy(models.Model):
     premiumAmt = models.DecimalField(max_digits=6, decimal_places=2)
     sumAssured = models.DecimalField(max_digits=10, decimal_places=2)
     claimedAmt = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Serves the per-user list ordered by -id and its cursor pages.
+            models.Index(fields=['user', '-id'], name='policy_user_id_desc'),
+        ]
 
     def save(self, *args, **kwargs):
         """Ovride save method to generate a new UUID for policy_id"""
@@ -144,6 +162,7 @@ class Claim(models.Model):
     policy = models.ForeignKey(
         Policy,
         on_delete=models.CASCADE,
+        related_name='claims',
     )
 
     claim_id = models.CharField(max_length=50, unique=True, editable=False)
@@ -153,11 +172,49 @@ class Claim(models.Model):
         validators=[MinValueValidator(0)])
     description = models.TextField(blank=True)
 
+    IMAGE_PENDING = 'PENDING'
+    IMAGE_READY = 'READY'
+    IMAGE_FAILED = 'FAILED'
+    IMAGE_STATUS_CHOICES = [
+        (IMAGE_PENDING, 'Pending'),
+        (IMAGE_READY, 'Ready'),
+        (IMAGE_FAILED, 'Failed'),
+    ]
+
+    # Stored under a hash of its bytes and never rewritten, other files
+    # derived from it are stored next to it under their own names.
     image = models.ImageField(
         null=True,
-        upload_to=policy_image_file_path
+        upload_to='uploads/policy',
+        storage=ContentAddressedStorage(),
     )
+    image_status = models.CharField(
+        max_length=10,
+        choices=IMAGE_STATUS_CHOICES,
+        blank=True,)
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    thumbnail = models.ImageField(null=True, editable=False)
+    image_webp = models.FileField(null=True, editable=False)
+    image_stripped = models.ImageField(null=True, editable=False)
     tags = models.ManyToManyField('Tag')
+    # Status of the most recently linked status tag, kept in sync by the
+    # core signal handlers so status queues need no join through tags.
+    status = models.CharField(
+        max_length=15,
+        choices=Tag.CLAIM_STATUS_CHOICES,
+        default='RAISED',)
+    status_changed_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='claim_user_id_desc'),
+            # Serves status queues, oldest first.
+            models.Index(
+                fields=['status', 'status_changed_at'],
+                name='claim_status_queue'),
+        ]
 
     def save(self, *args, **kwargs):
 
@@ -167,3 +224,131 @@ class Claim(models.Model):
 
     def __str__(self):
         return f"Claim for Policy {self.id} by User {self.user.email}"
+
+
+class PolicySummary(models.Model):
+    """Running totals of a user's policies and claims per policy title."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='policy_summaries',
+    )
+    title = models.CharField(max_length=15, choices=Policy.POLICY_CHOICES)
+    policy_count = models.IntegerField(default=0)
+    premium_total = models.DecimalField(
+        max_digits=16, decimal_places=2, default=0)
+    sum_assured_total = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0)
+    claimed_total = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0)
+    claim_count = models.IntegerField(default=0)
+    claim_amount_total = models.DecimalField(
+        max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'title'], name='unique_policy_summary'),
+        ]
+
+    def __str__(self):
+        return f"Summary of {self.title} policies for User {self.user_id}"
+
+
+class StoredFile(models.Model):
+    """Reference count of a content addressed file shared by claims."""
+    name = models.CharField(max_length=255, unique=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class PolicyRenewal(models.Model):
+    """Renewal offer for the term following a policy's end date."""
+    STATUS_PENDING = 'PENDING'
+    STATUS_ACCEPTED = 'ACCEPTED'
+    STATUS_DECLINED = 'DECLINED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_ACCEPTED, 'Accepted'),
+        (STATUS_DECLINED, 'Declined'),
+    ]
+
+    policy = models.ForeignKey(
+        Policy,
+        on_delete=models.CASCADE,
+        related_name='renewals',
+    )
+    startDate = models.DateField()
+    endDate = models.DateField()
+    premiumAmt = models.DecimalField(max_digits=6, decimal_places=2)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['policy', 'startDate'], name='unique_policy_renewal'),
+        ]
+
+    def __str__(self):
+        return f"Renewal of {self.policy_id} from {self.startDate}"
+
+
+class BatchCheckpoint(models.Model):
+    """Completed id-range chunk of a resumable batch job."""
+    job = models.CharField(max_length=100)
+    start_id = models.BigIntegerField()
+    end_id = models.BigIntegerField()
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['job', 'start_id'], name='unique_batch_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} ids {self.start_id}-{self.end_id}"
+
+
+class ClaimStatusTransition(models.Model):
+    """Append-only history of claim status changes."""
+    claim = models.ForeignKey(
+        Claim,
+        on_delete=models.CASCADE,
+        related_name='status_transitions',
+    )
+    from_status = models.CharField(
+        max_length=15, choices=Tag.CLAIM_STATUS_CHOICES)
+    to_status = models.CharField(
+        max_length=15, choices=Tag.CLAIM_STATUS_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['claim', 'created_at'],
+                name='transition_claim_created'),
+            models.Index(
+                fields=['to_status', 'created_at'],
+                name='transition_status_created'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Insert the transition, refusing to change a recorded one."""
+        if not self._state.adding:
+            raise ValueError('Claim status transitions are append-only.')
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return (f"Claim {self.claim_id}: {self.from_status} -> "
+                f"{self.to_status}")
@@ -0,0 +1,125 @@
+"""
+Claim amount prediction with the model trained by train_claim_model.
+"""
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+from django.conf import settings
+from prometheus_client import Histogram
+
+from core.models import Policy
+
+
+PREDICTION_LATENCY = Histogram(
+    'claim_prediction_latency_seconds',
+    'Time to predict one batch of claims.',
+    ['batch_size'],
+)
+
+TITLES = [title for title, _ in Policy.POLICY_CHOICES]
+TITLE_INDEX = {title: index for index, title in enumerate(TITLES)}
+FEATURE_NAMES = [f'title_{title}' for title in TITLES] + [
+    'premiumAmt', 'sumAssured', 'term_days',
+]
+# Claim lookups the features are built from, in featurize order.
+SOURCE_FIELDS = [
+    'policy__title',
+    'policy__premiumAmt',
+    'policy__sumAssured',
+    'policy__startDate',
+    'policy__endDate',
+]
+
+
+class ModelUnavailable(Exception):
+    """Raised when no trained model is stored at the configured path."""
+
+
+def featurize(rows):
+    """Return the feature matrix of rows of SOURCE_FIELDS values.
+
+    Titles are one-hot encoded in the order of Policy.POLICY_CHOICES,
+    followed by the premium, the sum assured and the term in days.
+    """
+    features = np.zeros((len(rows), len(FEATURE_NAMES)))
+    if not rows:
+        return features
+    titles, premiums, sums_assured, starts, ends = zip(*rows)
+
+    codes = np.array([TITLE_INDEX.get(title, -1) for title in titles])
+    known = np.flatnonzero(codes >= 0)
+    features[known, codes[known]] = 1
+
+    offset = len(TITLES)
+    features[:, offset] = np.array(premiums, dtype=np.float64)
+    features[:, offset + 1] = np.array(sums_assured, dtype=np.float64)
+    term = (np.array(ends, dtype='datetime64[D]')
+            - np.array(starts, dtype='datetime64[D]'))
+    features[:, offset + 2] = term.astype(np.float64)
+    return features
+
+
+# Upper bounds of the batch_size label, whatever the configured size.
+BATCH_BUCKETS = [1, 16, 64, 256, 1024]
+
+
+def batch_label(size):
+    """Return the histogram label of a batch, its size's bucket."""
+    for bucket in BATCH_BUCKETS:
+        if size <= bucket:
+            return str(bucket)
+    return f'>{BATCH_BUCKETS[-1]}'
+
+
+class ClaimPredictor:
+    """Trained claim amount model, loaded once per process.
+
+    The tree arrays are copied into memory when the model is unpickled,
+    so every process holds its own copy. uWSGI workers share the copy of
+    the master, which loads the model before forking, until the pages
+    are written to.
+    """
+
+    def __init__(self, path, batch_size=256):
+        self.path = path
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return the model, loading it on first use."""
+        with self._lock:
+            if self._model is None:
+                if not os.path.exists(self.path):
+                    raise ModelUnavailable(self.path)
+                self._model = joblib.load(self.path)
+            return self._model
+
+    def predict(self, features):
+        """Predict claim amounts for a feature matrix in batches."""
+        model = self.load()
+        predictions = np.empty(len(features))
+        for start in range(0, len(features), self.batch_size):
+            batch = features[start:start + self.batch_size]
+            began = time.perf_counter()
+            predictions[start:start + len(batch)] = model.predict(batch)
+            elapsed = time.perf_counter() - began
+            label = batch_label(len(batch))
+            PREDICTION_LATENCY.labels(batch_size=label).observe(elapsed)
+        return predictions
+
+    def predict_rows(self, rows):
+        """Return the predicted amount of every value row of a claim."""
+        features = featurize([
+            tuple(row[field] for field in SOURCE_FIELDS) for row in rows
+        ])
+        return self.predict(features)
+
+
+claim_predictor = ClaimPredictor(
+    settings.CLAIM_MODEL_PATH,
+    batch_size=settings.CLAIM_PREDICTION_BATCH_SIZE,
+)
@@ -0,0 +1,146 @@
+"""
+Resumable batch creation of policy renewals.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from core.models import BatchCheckpoint, Policy, PolicyRenewal
+
+
+def job_name(window_start, window_end):
+    """Return the checkpoint name of a renewal run over a window."""
+    return f'renew_policies:{window_start}:{window_end}'
+
+
+def candidates(window_start, window_end):
+    """Return the policies ending inside the window."""
+    return Policy.objects.filter(
+        endDate__gte=window_start, endDate__lte=window_end)
+
+
+def chunk_ranges(queryset, chunk_size, done=()):
+    """Split the id span of queryset into [start, end) ranges.
+
+    Ids inside the [start, end) ranges in done are left out, so ranges
+    checkpointed with another chunk size are not redone and ids added
+    beyond the last checkpoint are still covered.
+    """
+    bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    stop = bounds['high'] + 1
+    ranges = []
+    start = bounds['low']
+    for done_start, done_end in [*sorted(done), (stop, stop)]:
+        gap_end = min(done_start, stop)
+        ranges.extend(
+            (chunk, min(chunk + chunk_size, gap_end))
+            for chunk in range(start, gap_end, chunk_size)
+        )
+        start = max(start, done_end)
+        if start >= stop:
+            break
+    return ranges
+
+
+def renewal_for(policy):
+    """Return the unsaved renewal for the term following a policy."""
+    start = policy.endDate + timedelta(days=1)
+    return PolicyRenewal(
+        policy_id=policy.id,
+        startDate=start,
+        endDate=start + (policy.endDate - policy.startDate),
+        premiumAmt=policy.premiumAmt,
+    )
+
+
+def renew_chunk(job, queryset, start_id, end_id, batch_size):
+    """Create or refresh the renewals of one id range and checkpoint it.
+
+    Pending renewals are brought in line with the current premium. The
+    writes and the checkpoint commit together, so a crashed chunk is
+    redone from scratch on the next run.
+    """
+    policies = queryset.filter(id__gte=start_id, id__lt=end_id).only(
+        'id', 'startDate', 'endDate', 'premiumAmt')
+    wanted = {}
+    for policy in policies.iterator(chunk_size=batch_size):
+        renewal = renewal_for(policy)
+        wanted[(renewal.policy_id, renewal.startDate)] = renewal
+
+    with transaction.atomic():
+        existing = {
+            (renewal.policy_id, renewal.startDate): renewal
+            for renewal in PolicyRenewal.objects.select_for_update().filter(
+                policy_id__gte=start_id, policy_id__lt=end_id,
+                startDate__in={key[1] for key in wanted},
+            )
+        }
+        missing = [
+            renewal for key, renewal in wanted.items()
+            if key not in existing
+        ]
+        stale = []
+        now = timezone.now()
+        for key, renewal in wanted.items():
+            current = existing.get(key)
+            if (current is not None
+                    and current.status == PolicyRenewal.STATUS_PENDING
+                    and (current.endDate, current.premiumAmt)
+                    != (renewal.endDate, renewal.premiumAmt)):
+                current.endDate = renewal.endDate
+                current.premiumAmt = renewal.premiumAmt
+                current.updated_at = now
+                stale.append(current)
+
+        PolicyRenewal.objects.bulk_create(missing, batch_size=batch_size)
+        PolicyRenewal.objects.bulk_update(
+            stale, ['endDate', 'premiumAmt', 'updated_at'],
+            batch_size=batch_size)
+        return BatchCheckpoint.objects.create(
+            job=job,
+            start_id=start_id,
+            end_id=end_id,
+            processed=len(wanted),
+            created=len(missing),
+            updated=len(stale),
+        )
+
+
+def _run_chunk(*args):
+    """Run a chunk on a worker thread, closing its connection after."""
+    try:
+        return renew_chunk(*args)
+    finally:
+        connection.close()
+
+
+def renew_policies(window_start, window_end, chunk_size, batch_size,
+                   workers=1, restart=False):
+    """Renew the policies ending inside the window.
+
+    Id ranges already checkpointed by an earlier run of the same window
+    are skipped unless restart is set. Returns the checkpoints written by
+    this run.
+    """
+    job = job_name(window_start, window_end)
+    if restart:
+        BatchCheckpoint.objects.filter(job=job).delete()
+
+    queryset = candidates(window_start, window_end)
+    done = BatchCheckpoint.objects.filter(job=job).values_list(
+        'start_id', 'end_id')
+    args = [
+        (job, queryset, start, end, batch_size)
+        for start, end in chunk_ranges(queryset, chunk_size, done)
+    ]
+
+    if workers <= 1:
+        return [renew_chunk(*chunk) for chunk in args]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda chunk: _run_chunk(*chunk), args))
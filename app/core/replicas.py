@@ -0,0 +1,197 @@
+"""
+Routing of safe API reads to lag-checked read replicas.
+"""
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from prometheus_client import Counter, Gauge
+
+
+logger = logging.getLogger(__name__)
+
+READ_ROUTING = Counter(
+    'db_read_routing_total',
+    'Routing decisions for safe API requests, by database and reason.',
+    ['alias', 'reason'],
+)
+# One series per live process, a worker's last measurement, which may
+# be +Inf, leaves with it. Aggregate with max by (alias).
+REPLICA_LAG = Gauge(
+    'db_replica_lag_seconds',
+    'Last replication lag of each replica measured by a process.',
+    ['alias'],
+    multiprocess_mode='liveall',
+)
+
+# Seconds since the last replayed transaction, 0 when fully caught up or
+# when the database is not a standby.
+POSTGRES_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM
+            now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def measure_lag(alias):
+    """Return how many seconds the replica alias lags behind."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+class LagMonitor:
+    """Replica lag measurements, refreshed at most once per interval.
+
+    A replica that cannot be measured counts as infinitely behind.
+    """
+
+    def __init__(self):
+        self._measured = {}
+        self._lock = threading.Lock()
+
+    def lag(self, alias):
+        """Return the recent lag of alias in seconds."""
+        now = time.monotonic()
+        with self._lock:
+            measured = self._measured.get(alias)
+        if measured and now - measured[1] < (
+                settings.DB_REPLICA_LAG_CHECK_INTERVAL):
+            return measured[0]
+
+        try:
+            lag = measure_lag(alias)
+        except DatabaseError:
+            logger.warning('Measuring the lag of %s failed.', alias,
+                           exc_info=True)
+            lag = math.inf
+        REPLICA_LAG.labels(alias=alias).set(lag)
+        with self._lock:
+            self._measured[alias] = (lag, now)
+        return lag
+
+    def clear(self):
+        """Forget every measurement."""
+        with self._lock:
+            self._measured.clear()
+
+
+lag_monitor = LagMonitor()
+
+
+def _pin_key(user_id):
+    """Return the cache key pinning a user to the primary."""
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Read a user's requests from the primary for the pin window.
+
+    Gives users who just wrote their own writes back while replicas catch
+    up. Workers only see each other's pins through a shared cache.
+    """
+    caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].set(
+        _pin_key(user_id), 1, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    """Return True if a user wrote within the pin window."""
+    return caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].get(
+        _pin_key(user_id)) is not None
+
+
+def choose_read_alias(user_id):
+    """Return the replica to read a user's request from, None for primary.
+
+    Replicas lagging more than DB_REPLICA_MAX_LAG seconds are skipped;
+    without a replica within budget reads fall back to the primary.
+    """
+    replicas = settings.DB_REPLICA_ALIASES
+    if not replicas:
+        return None
+    if user_id is not None and is_pinned(user_id):
+        READ_ROUTING.labels(alias=DEFAULT_DB_ALIAS, reason='pinned').inc()
+        return None
+
+    candidates = [
+        alias for alias in replicas
+        if lag_monitor.lag(alias) <= settings.DB_REPLICA_MAX_LAG
+    ]
+    if not candidates:
+        READ_ROUTING.labels(alias=DEFAULT_DB_ALIAS, reason='lagging').inc()
+        return None
+    alias = random.choice(candidates)
+    READ_ROUTING.labels(alias=alias, reason='replica').inc()
+    return alias
+
+
+@contextmanager
+def read_scope():
+    """Forget the read database chosen inside the block on exit."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def route_reads(alias):
+    """Send the reads of the current scope to alias, None for default."""
+    _read_alias.set(alias)
+
+
+def current_read_alias():
+    """Return the replica the current scope reads from, None for default."""
+    return _read_alias.get()
+
+
+def iterate_routed(iterable, alias):
+    """Yield the items of iterable with its reads routed to alias.
+
+    Streaming responses are iterated after the view's scope has closed.
+    Each item is produced in a scope of its own, so the routing does not
+    leak into the code consuming the items.
+    """
+    iterator = iter(iterable)
+    while True:
+        with read_scope():
+            route_reads(alias)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class ReplicaRouter:
+    """Database router sending reads of a routed scope to its replica.
+
+    Outside a scope routed by route_reads, and for every write, the
+    default database is used.
+    """
+
+    def db_for_read(self, model, **hints):
+        """Return the replica chosen for the current scope, if any."""
+        return current_read_alias()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations between rows of the primary and its replicas."""
+        databases = {DEFAULT_DB_ALIAS, *settings.DB_REPLICA_ALIASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
@@ -0,0 +1,123 @@
+"""
+Per-user cache of list responses with generation based invalidation.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from prometheus_client import Counter
+
+
+RESPONSE_CACHE_HITS = Counter(
+    'response_cache_hits_total',
+    'List responses served from the response cache.',
+    ['view'],
+)
+RESPONSE_CACHE_MISSES = Counter(
+    'response_cache_misses_total',
+    'List responses that had to be computed.',
+    ['view'],
+)
+RESPONSE_CACHE_STALE = Counter(
+    'response_cache_stale_serves_total',
+    'Sampled cache hits that differed from a freshly computed response.',
+    ['view'],
+)
+
+ALL_USERS = 'all'
+
+
+class ResponseCache:
+    """Cache of serialized responses scoped to a user.
+
+    Every user has a generation number stored in the cache backend and
+    part of each key. Invalidating a user bumps the generation, so their
+    old entries are never read again and simply expire. Staff responses
+    can span every user and also depend on the ``all`` generation, which
+    is bumped on any invalidation.
+    """
+
+    def __init__(self, alias, ttl, prefix='response'):
+        self.alias = alias
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @property
+    def backend(self):
+        """Return the configured cache backend."""
+        return caches[self.alias]
+
+    def _generation_key(self, scope):
+        """Return the cache key of a user's generation."""
+        return f'{self.prefix}:generation:{scope}'
+
+    def _initial_generation(self):
+        """Return a generation unlikely to collide with an evicted one."""
+        return time.time_ns() // 1000
+
+    def generations(self, scopes):
+        """Return the current generation of every scope."""
+        keys = {self._generation_key(scope): scope for scope in scopes}
+        found = self.backend.get_many(list(keys))
+        for key in keys.keys() - found.keys():
+            self.backend.add(key, self._initial_generation(), None)
+            found[key] = self.backend.get(key)
+        return tuple(found[key] for key in keys)
+
+    def scopes(self, user):
+        """Return the generation scopes a user's responses depend on."""
+        if user.is_staff:
+            return (user.pk, ALL_USERS)
+        return (user.pk,)
+
+    def key(self, user, view, params):
+        """Return the cache key of a response."""
+        generations = self.generations(self.scopes(user))
+        digest = hashlib.sha256(repr(params).encode()).hexdigest()
+        versions = '.'.join(str(generation) for generation in generations)
+        return f'{self.prefix}:{view}:{user.pk}:{versions}:{digest}'
+
+    def get(self, key):
+        """Return the cached response data for key or None."""
+        return self.backend.get(key)
+
+    def set(self, key, data):
+        """Cache response data under key."""
+        self.backend.set(key, data, self.ttl)
+
+    def _bump(self, scopes):
+        """Move every scope to a new generation."""
+        for scope in scopes:
+            key = self._generation_key(scope)
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                self.backend.add(key, self._initial_generation(), None)
+
+    def invalidate(self, *user_ids):
+        """Invalidate the cached responses of users.
+
+        The generations are bumped now and again after the current
+        transaction commits, so a response computed from data that was
+        not yet committed is not served afterwards.
+        """
+        scopes = {user_id for user_id in user_ids if user_id is not None}
+        if not scopes:
+            return
+        scopes.add(ALL_USERS)
+        self._bump(scopes)
+        transaction.on_commit(lambda: self._bump(scopes))
+
+
+response_cache = ResponseCache(
+    alias=settings.RESPONSE_CACHE_ALIAS,
+    ttl=settings.RESPONSE_CACHE_TTL,
+)
+
+
+def invalidate_claims(claims):
+    """Invalidate the responses of the users owning claims or their policy."""
+    owners = claims.values_list('user_id', 'policy__user_id')
+    response_cache.invalidate(*{user_id for row in owners for user_id in row})
@@ -0,0 +1,280 @@
+"""
+Signal handlers for the core models.
+"""
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import claim_status, images, summary
+from core.authentication import token_cache
+from core.models import Policy, Claim, Tag
+from core.response_cache import invalidate_claims, response_cache
+from core.tags import tag_cache
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a deleted token from the cache."""
+    token_cache.revoke(instance.user_id)
+
+
+@receiver(pre_save, sender=Token)
+def revoke_changed_token(sender, instance, raw, **kwargs):
+    """Stop serving a token about to change, cached under its old owner."""
+    if raw:
+        return
+    owner = Token.objects.filter(
+        pk=instance.pk).values_list('user_id', flat=True).first()
+    if owner is not None:
+        token_cache.revoke(owner)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_user_tokens(sender, instance, created, **kwargs):
+    """Drop cached tokens of a changed user, e.g. when deactivated."""
+    if not created:
+        token_cache.revoke(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_new_user_responses(sender, instance, created, **kwargs):
+    """Start a new user on a fresh generation, in case its id is reused."""
+    if created:
+        response_cache.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=Policy)
+def capture_policy_state(sender, instance, raw, **kwargs):
+    """Remember what an existing policy added to the summary and its owner."""
+    instance._summary_before = {}
+    instance._owner_before = None
+    if raw or instance.pk is None:
+        return
+    old = Policy.objects.filter(pk=instance.pk).first()
+    if old is None:
+        return
+    instance._owner_before = old.user_id
+
+    before = [summary.policy_contribution(old, sign=-1)]
+    if (old.user_id, old.title) != (instance.user_id, instance.title):
+        # The policy's claims move to the new user/title as well.
+        claims = Claim.objects.filter(policy=old).aggregate(
+            claim_count=Count('id'),
+            claim_amount_total=Sum('claimedAmt'),
+        )
+        if claims['claim_count']:
+            before.append({
+                (old.user_id, old.title): {
+                    field: -value for field, value in claims.items()},
+                (instance.user_id, instance.title): claims,
+            })
+    instance._summary_before = summary.merge(*before)
+
+
+@receiver(post_save, sender=Policy)
+def update_policy_summary(sender, instance, raw, **kwargs):
+    """Apply a saved policy to the summary."""
+    if raw:
+        return
+    summary.apply(summary.merge(
+        getattr(instance, '_summary_before', {}),
+        summary.policy_contribution(instance),
+    ))
+
+
+@receiver(post_delete, sender=Policy)
+def remove_policy_summary(sender, instance, **kwargs):
+    """Remove a deleted policy from the summary."""
+    summary.apply(
+        summary.policy_contribution(instance, sign=-1), create=False)
+
+
+@receiver(pre_save, sender=Claim)
+def capture_claim_state(sender, instance, raw, **kwargs):
+    """Remember an existing claim's summary values, image and owners."""
+    instance._summary_before = {}
+    instance._image_before = ''
+    instance._owners_before = ()
+    if raw or instance.pk is None:
+        return
+    old = Claim.objects.filter(pk=instance.pk).select_related(
+        'policy').first()
+    if old is not None:
+        instance._summary_before = summary.claim_contribution(
+            old, old.policy.user_id, old.policy.title, sign=-1)
+        instance._image_before = old.image.name or ''
+        instance._owners_before = (old.user_id, old.policy.user_id)
+
+
+@receiver(post_save, sender=Claim)
+def update_claim_summary(sender, instance, raw, **kwargs):
+    """Apply a saved claim to the summary."""
+    if raw:
+        return
+    policy = instance.policy
+    summary.apply(summary.merge(
+        getattr(instance, '_summary_before', {}),
+        summary.claim_contribution(instance, policy.user_id, policy.title),
+    ))
+
+
+@receiver(post_delete, sender=Claim)
+def remove_claim_summary(sender, instance, **kwargs):
+    """Remove a deleted claim from the summary."""
+    policy = instance.policy
+    summary.apply(summary.claim_contribution(
+        instance, policy.user_id, policy.title, sign=-1), create=False)
+
+
+@receiver(post_save, sender=Claim)
+def update_image_references(sender, instance, raw, **kwargs):
+    """Move the image reference when a claim's image changes."""
+    if raw:
+        return
+    before = getattr(instance, '_image_before', '')
+    after = instance.image.name or ''
+    if before == after:
+        return
+    if after:
+        images.retain_image(after)
+    if before:
+        images.release_image(before)
+
+
+@receiver(post_delete, sender=Claim)
+def release_image_reference(sender, instance, **kwargs):
+    """Drop the image reference of a deleted claim."""
+    if instance.image.name:
+        images.release_image(instance.image.name)
+
+
+def _claims_with_changed_tags(instance, action, reverse, pk_set):
+    """Return the claims whose tags an m2m_changed signal is about."""
+    if reverse:
+        if action in ('post_add', 'post_remove'):
+            return Claim.objects.filter(pk__in=pk_set)
+        if action == 'pre_clear':
+            return Claim.objects.filter(tags=instance)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        return Claim.objects.filter(pk=instance.pk)
+    return None
+
+
+@receiver(m2m_changed, sender=Claim.tags.through)
+def touch_claims_on_tag_change(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    """Bump updated_at of claims whose tags were added or removed."""
+    claims = _claims_with_changed_tags(instance, action, reverse, pk_set)
+    if claims is not None:
+        claims.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Tag)
+def touch_claims_on_tag_save(sender, instance, created, raw, **kwargs):
+    """Bump updated_at of claims showing a changed tag."""
+    if created or raw:
+        return
+    Claim.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Claim.tags.through)
+def sync_status_on_tag_change(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Move claims whose status tags were added or removed."""
+    if reverse and action == 'pre_clear':
+        # The links are gone by post_clear.
+        instance._cleared_claim_ids = list(
+            Claim.objects.filter(tags=instance).values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        claim_ids = [instance.pk]
+    elif action == 'post_clear':
+        claim_ids = getattr(instance, '_cleared_claim_ids', [])
+    else:
+        claim_ids = pk_set
+    claim_status.sync_statuses(claim_ids)
+
+
+@receiver(post_save, sender=Tag)
+def sync_status_on_tag_save(sender, instance, created, raw, **kwargs):
+    """Move claims whose status tag changed its status."""
+    if created or raw:
+        return
+    claim_status.sync_statuses(
+        Claim.objects.filter(tags=instance).values('id'))
+
+
+@receiver(pre_delete, sender=Tag)
+def capture_tag_claims(sender, instance, **kwargs):
+    """Remember the claims of a tag about to be deleted."""
+    instance._claim_ids = list(
+        Claim.objects.filter(tags=instance).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def sync_status_on_tag_delete(sender, instance, **kwargs):
+    """Touch and move claims that lost a tag with its deletion.
+
+    The links are deleted without an m2m_changed signal, so the claims'
+    updated_at, and with it their ETags, is bumped here.
+    """
+    claim_ids = getattr(instance, '_claim_ids', [])
+    Claim.objects.filter(pk__in=claim_ids).update(updated_at=timezone.now())
+    claim_status.sync_statuses(claim_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_migrate)
+def invalidate_interned_tags(sender, **kwargs):
+    """Forget interned tag ids once tags change or the database is reset."""
+    tag_cache.invalidate()
+
+
+@receiver(post_save, sender=Policy)
+@receiver(post_delete, sender=Policy)
+def invalidate_policy_responses(sender, instance, **kwargs):
+    """Invalidate cached responses of the policy's old and new owner."""
+    response_cache.invalidate(
+        instance.user_id, getattr(instance, '_owner_before', None))
+
+
+@receiver(post_save, sender=Claim)
+@receiver(post_delete, sender=Claim)
+def invalidate_claim_responses(sender, instance, **kwargs):
+    """Invalidate cached responses of the claim's old and new owners."""
+    response_cache.invalidate(
+        instance.user_id,
+        instance.policy.user_id,
+        *getattr(instance, '_owners_before', ()),
+    )
+
+
+@receiver(m2m_changed, sender=Claim.tags.through)
+def invalidate_tag_link_responses(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    """Invalidate cached responses showing claims whose tags changed."""
+    claims = _claims_with_changed_tags(instance, action, reverse, pk_set)
+    if claims is not None:
+        invalidate_claims(claims)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def invalidate_tag_responses(sender, instance, **kwargs):
+    """Invalidate cached responses showing a changed or deleted tag."""
+    if kwargs.get('created'):
+        return
+    invalidate_claims(Claim.objects.filter(tags=instance))
@@ -0,0 +1,45 @@
+"""
+Content addressed storage for uploaded files.
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_hash(content):
+    """Return the SHA-256 of content, reusing the upload handler's digest."""
+    digest = getattr(content, 'content_hash', None)
+    if digest:
+        return digest
+
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    content.seek(0)
+    return hasher.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming files after a hash of their content.
+
+    Identical uploads map to the same name, so a file that already
+    exists is not written again.
+    """
+
+    def save(self, name, content, max_length=None):
+        """Save content under its hash, skipping the write if it exists."""
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = content_hash(content)
+        ext = os.path.splitext(name)[1].lower()
+        name = os.path.join(
+            os.path.dirname(name), digest[:2], f'{digest}{ext}')
+        if self.exists(name):
+            return name
+
+        return self._save(name, content)
@@ -0,0 +1,134 @@
+"""
+Incremental maintenance of the policy portfolio summary.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from core.models import Policy, Claim, PolicySummary
+
+
+POLICY_FIELDS = {
+    'policy_count': None,
+    'premium_total': 'premiumAmt',
+    'sum_assured_total': 'sumAssured',
+    'claimed_total': 'claimedAmt',
+}
+CLAIM_FIELDS = {
+    'claim_count': None,
+    'claim_amount_total': 'claimedAmt',
+}
+SUMMARY_FIELDS = list(POLICY_FIELDS) + list(CLAIM_FIELDS)
+
+
+def _values(instance, fields, sign):
+    """Return the signed summary values of a model instance."""
+    return {
+        field: sign * (Decimal(str(getattr(instance, attr))) if attr else 1)
+        for field, attr in fields.items()
+    }
+
+
+def policy_contribution(policy, sign=1):
+    """Return {(user_id, title): {field: delta}} for a policy."""
+    return {
+        (policy.user_id, policy.title): _values(policy, POLICY_FIELDS, sign)
+    }
+
+
+def claim_contribution(claim, user_id, title, sign=1):
+    """Return {(user_id, title): {field: delta}} for a claim."""
+    return {(user_id, title): _values(claim, CLAIM_FIELDS, sign)}
+
+
+def merge(*contributions):
+    """Add contributions together, dropping keys that cancel out."""
+    merged = defaultdict(lambda: defaultdict(int))
+    for contribution in contributions:
+        for key, values in contribution.items():
+            for field, delta in values.items():
+                merged[key][field] += delta
+
+    return {
+        key: values for key, values in merged.items()
+        if any(values.values())
+    }
+
+
+def apply(deltas, create=True):
+    """Apply merged deltas to the summary rows.
+
+    Missing rows are created unless create is False, which is used for
+    deletions where the row may already be gone with its user.
+    """
+    with transaction.atomic():
+        for (user_id, title), values in deltas.items():
+            rows = PolicySummary.objects.filter(user_id=user_id, title=title)
+            changes = {
+                field: F(field) + delta for field, delta in values.items()
+            }
+            if rows.update(**changes) or not create:
+                continue
+            PolicySummary.objects.get_or_create(user_id=user_id, title=title)
+            rows.update(**changes)
+
+
+def compute():
+    """Compute the summary rows from scratch."""
+    rows = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+    policies = Policy.objects.values('user_id', 'title').annotate(
+        policy_count=Count('id'),
+        premium_total=Sum('premiumAmt'),
+        sum_assured_total=Sum('sumAssured'),
+        claimed_total=Sum('claimedAmt'),
+    ).order_by()
+    for row in policies:
+        rows[(row.pop('user_id'), row.pop('title'))].update(row)
+
+    claims = Claim.objects.values('policy__user_id', 'policy__title').annotate(
+        claim_count=Count('id'),
+        claim_amount_total=Sum('claimedAmt'),
+    ).order_by()
+    for row in claims:
+        key = (row.pop('policy__user_id'), row.pop('policy__title'))
+        rows[key].update(row)
+
+    return rows
+
+
+def _normalize(values):
+    """Return values with Decimal totals for comparison."""
+    return {
+        field: Decimal(values.get(field) or 0) for field in SUMMARY_FIELDS
+    }
+
+
+def drift():
+    """Return {(user_id, title): (stored, expected)} for rows that differ."""
+    expected = {key: _normalize(values) for key, values in compute().items()}
+    stored = {
+        (row.pop('user_id'), row.pop('title')): _normalize(row)
+        for row in PolicySummary.objects.values(
+            'user_id', 'title', *SUMMARY_FIELDS)
+    }
+    empty = _normalize({})
+    return {
+        key: (stored.get(key, empty), expected.get(key, empty))
+        for key in stored.keys() | expected.keys()
+        if stored.get(key, empty) != expected.get(key, empty)
+    }
+
+
+def rebuild():
+    """Replace the summary table with freshly computed rows."""
+    rows = compute()
+    with transaction.atomic():
+        PolicySummary.objects.all().delete()
+        PolicySummary.objects.bulk_create(
+            PolicySummary(user_id=user_id, title=title, **values)
+            for (user_id, title), values in rows.items()
+        )
+
+    return len(rows)
@@ -0,0 +1,117 @@
+"""
+Process-wide interning of tag payloads and bulk linking of claim tags.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from prometheus_client import Counter
+
+from core.models import Claim, Tag
+
+
+TAG_CACHE_HITS = Counter(
+    'tag_cache_hits_total',
+    'Tag payloads resolved from the cache.',
+)
+TAG_CACHE_MISSES = Counter(
+    'tag_cache_misses_total',
+    'Tag payloads that had to be read or created in the database.',
+)
+
+
+def tag_key(tag_data):
+    """Return the interning key of a validated tag payload."""
+    return (
+        tag_data.get('claim_status', 'RAISED'),
+        tag_data.get('description', ''),
+    )
+
+
+class TagCache:
+    """Map of (claim_status, description) to tag id, filled on demand.
+
+    Unknown keys are read in one query and the missing ones inserted in
+    another. The unique constraint on tags makes concurrent inserts of a
+    key skip instead of duplicating it, so the ids are read back after
+    inserting. Entries are kept once the reading transaction commits and
+    live for ``ttl`` seconds, so tag changes in other processes are seen
+    within that time.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, keys):
+        """Return a mapping of each key to its tag id, creating tags."""
+        now = time.monotonic()
+        ids = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    ids[key] = entry[0]
+        TAG_CACHE_HITS.inc(len(ids))
+
+        missing = [key for key in keys if key not in ids]
+        if not missing:
+            return ids
+        TAG_CACHE_MISSES.inc(len(missing))
+
+        found = self._select(missing)
+        created = [key for key in missing if key not in found]
+        if created:
+            Tag.objects.bulk_create([
+                Tag(claim_status=status, description=description)
+                for status, description in created
+            ], ignore_conflicts=True)
+            found.update(self._select(created))
+        # Ids read in a transaction that rolls back may never have existed.
+        transaction.on_commit(lambda: self._store(found, now))
+        ids.update(found)
+        return ids
+
+    def _select(self, keys):
+        """Return the ids of the existing tags among keys."""
+        keys = set(keys)
+        rows = Tag.objects.filter(
+            claim_status__in={status for status, _ in keys},
+            description__in={description for _, description in keys},
+        ).values_list('claim_status', 'description', 'id')
+        return {
+            (status, description): tag_id
+            for status, description, tag_id in rows
+            if (status, description) in keys
+        }
+
+    def _store(self, ids, now):
+        """Cache the tag ids of keys read at now."""
+        with self._lock:
+            for key, tag_id in ids.items():
+                self._entries[key] = (tag_id, now + self.ttl)
+
+    def invalidate(self):
+        """Forget every entry; the vocabulary is cheap to reload."""
+        with self._lock:
+            self._entries.clear()
+
+
+tag_cache = TagCache(ttl=settings.TAG_CACHE_TTL)
+
+
+def link_claim_tags(claim_tag_ids, batch_size=None):
+    """Link claims to tags with one insert into the through table.
+
+    claim_tag_ids pairs each claim with its tag ids in link order. Unlike
+    claim.tags.add this sends no m2m_changed signal, so it is meant for
+    claims that were just created in the status of their tags.
+    """
+    through = Claim.tags.through
+    through.objects.bulk_create([
+        through(claim_id=claim.id, tag_id=tag_id)
+        for claim, tag_ids in claim_tag_ids
+        for tag_id in tag_ids
+    ], batch_size=batch_size)
@@ -0,0 +1,77 @@
+"""
+Helpers shared by the core and policy tests.
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.urls import reverse
+
+from core.models import Claim, Policy
+
+
+def detail_url(policy_id):
+    """Create and return a policy detail URL."""
+    return reverse('policy:policy-detail', args=[policy_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    defaults = {'email': 'user@example.com', 'password': 'testpass123'}
+    defaults.update(params)
+    return get_user_model().objects.create_user(**defaults)
+
+
+def create_policy(user, **params):
+    """Create and return a sample policy."""
+    defaults = {
+        'title': 'HEALTH',
+        'startDate': date(2024, 1, 1),
+        'endDate': date(2025, 1, 1),
+        'premiumAmt': Decimal('120.50'),
+        'sumAssured': Decimal('10000.00'),
+        'claimedAmt': Decimal('0.00'),
+    }
+    defaults.update(params)
+    return Policy.objects.create(user=user, **defaults)
+
+
+def create_claim(user, policy, tags=(), **params):
+    """Create and return a sample claim with tags."""
+    defaults = {'claimedAmt': Decimal('250.00')}
+    defaults.update(params)
+    claim = Claim.objects.create(user=user, policy=policy, **defaults)
+    claim.tags.add(*tags)
+    return claim
+
+
+def bulk_item(**params):
+    """Return a sample bulk upload item."""
+    item = {
+        'title': 'VEHICLE',
+        'startDate': '2024-01-01',
+        'endDate': '2025-01-01',
+        'premiumAmt': '99.00',
+        'sumAssured': '5000.00',
+        'claimedAmt': '0.00',
+        'claims': [{
+            'claimedAmt': '100.00',
+            'tags': [{'claim_status': 'RAISED'}],
+        }],
+    }
+    item.update(params)
+    return item
+
+
+def explain(queryset):
+    """Return the query plan, discouraging sequential scans on Postgres.
+
+    Test tables are tiny, so Postgres would rather scan them than use an
+    index. Disabling seq scans shows which index it can use.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
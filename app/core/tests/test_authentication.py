@@ -0,0 +1,152 @@
+"""
+Tests for the cached token authentication.
+"""
+import pickle
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.core.cache import caches
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.authentication import (
+    AUTH_USER_FIELDS,
+    TokenCache,
+    token_cache,
+    TOKEN_CACHE_HITS,
+    TOKEN_CACHE_MISSES,
+)
+from core.tests.helpers import create_user
+
+
+ME_URL = reverse('user:me')
+POLICIES_URL = reverse('policy:policy-list')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test authenticating with cached tokens."""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user(name='Test Name')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_second_request_skips_token_query(self):
+        """Test a cached token does not query the database."""
+        self.client.get(ME_URL)
+        hits = TOKEN_CACHE_HITS.labels(tier='local')._value.get()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(
+            TOKEN_CACHE_HITS.labels(tier='local')._value.get(), hits + 1)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cache entry."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(POLICIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates their cached tokens."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_visible(self):
+        """Test updating the profile is not hidden by the cache."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_cached_user_saves_only_loaded_fields(self):
+        """Test a user rebuilt from the cache keeps its password hash."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Cached'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Cached')
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    def test_shared_entries_hold_no_credentials(self):
+        """Test the shared tier stores the auth fields, not the user."""
+        cache = TokenCache(max_size=2, ttl=60, shared_alias='default')
+
+        with patch('core.authentication.token_cache', cache):
+            self.client.get(ME_URL)
+
+        stored = caches['default'].get(cache._shared_key(self.token.key))
+        (_, fields), user_id, _ = stored
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(set(fields), set(AUTH_USER_FIELDS))
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(stored))
+
+
+class TokenCacheTests(TestCase):
+    """Test the token cache itself."""
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted."""
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', 1, 1)
+        cache.set('b', 1, 2)
+        cache.get('a')
+        cache.set('c', 1, 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_ttl_expiry(self):
+        """Test entries expire after the TTL."""
+        cache = TokenCache(max_size=2, ttl=0)
+        misses = TOKEN_CACHE_MISSES._value.get()
+        cache.set('a', 1, 1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(TOKEN_CACHE_MISSES._value.get(), misses + 1)
+
+    def test_shared_tier(self):
+        """Test entries are read back from the shared cache."""
+        writer = TokenCache(max_size=2, ttl=60, shared_alias='default')
+        reader = TokenCache(max_size=2, ttl=60, shared_alias='default')
+        writer.set('a', 1, 'token')
+
+        self.assertEqual(reader.get('a'), 'token')
+
+    def test_revoke_reaches_other_local_tiers(self):
+        """Test revoking a user drops their tokens in every process."""
+        writer = TokenCache(max_size=2, ttl=60, shared_alias='default')
+        reader = TokenCache(max_size=2, ttl=60, shared_alias='default')
+        writer.set('a', 1, 'token')
+        writer.set('b', 2, 'other')
+        reader.get('a')
+        reader.get('b')
+
+        writer.revoke(1)
+
+        self.assertIsNone(reader.get('a'))
+        self.assertIsNone(writer.get('a'))
+        self.assertEqual(reader.get('b'), 'other')
@@ -0,0 +1,72 @@
+"""
+Tests for the connection health checks of the database backends.
+"""
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.sqlite3 import base as sqlite
+from django.test import SimpleTestCase
+
+from core.backends.mixins import HealthCheckMixin
+
+
+class CheckedSQLiteWrapper(HealthCheckMixin, sqlite.DatabaseWrapper):
+    """SQLite wrapper with the mixin of the PostgreSQL backend."""
+
+
+class HealthCheckTests(SimpleTestCase):
+    """Test the health checks against an SQLite database."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def wrapper(self, **settings):
+        """Return a new persistent SQLite wrapper."""
+        settings_dict = {
+            **connections[DEFAULT_DB_ALIAS].settings_dict,
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+            'CONN_MAX_AGE': None,
+            'CONN_HEALTH_CHECKS': True,
+            **settings,
+        }
+        wrapper = CheckedSQLiteWrapper(settings_dict, 'checked')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def query(self, wrapper):
+        """Run a request's worth of connection handling and a query."""
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+        return raw
+
+    def test_stale_persistent_connection_replaced(self):
+        """Test the health check reconnects before the first query."""
+        wrapper = self.wrapper()
+        first = self.query(wrapper)
+
+        with patch.object(CheckedSQLiteWrapper, 'is_usable',
+                          return_value=False):
+            second = self.query(wrapper)
+
+        self.assertIsNot(second, first)
+        # Checked once per request, not before every query.
+        self.assertIs(self.query(wrapper), second)
+
+    def test_unchecked_connection_kept(self):
+        """Test connections are not pinged without CONN_HEALTH_CHECKS."""
+        wrapper = self.wrapper(CONN_HEALTH_CHECKS=False)
+        first = self.query(wrapper)
+
+        with patch.object(CheckedSQLiteWrapper, 'is_usable',
+                          return_value=False) as is_usable:
+            second = self.query(wrapper)
+
+        self.assertIs(second, first)
+        is_usable.assert_not_called()
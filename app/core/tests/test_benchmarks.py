@@ -0,0 +1,75 @@
+"""
+Tests for the benchmark runner.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core import benchmarks
+
+
+class BenchmarkContext:
+    """Context holding only the token requests are sent with."""
+
+    def __init__(self, token):
+        self.token = token
+
+
+class BenchmarkRunnerTests(TestCase):
+    """Test running scenarios and comparing them with a baseline."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            'bench@example.com', 'testpass123')
+        self.context = BenchmarkContext(Token.objects.create(user=user))
+
+    def test_error_responses_fail(self):
+        """Test a scenario answered with an error is not measured."""
+        scenario = benchmarks.Scenario(
+            'policy-missing', 'get', 'policy:policy-detail',
+            lambda ctx: {'path': reverse(
+                'policy:policy-detail', args=[0])})
+
+        with self.assertRaisesMessage(benchmarks.BenchmarkError, '404'):
+            benchmarks.run(self.context, [scenario], iterations=2)
+
+    def test_skipped_scenarios_recorded(self):
+        """Test a scenario that cannot run is recorded as skipped."""
+        scenario = benchmarks.Scenario(
+            'policy-list', 'get', 'policy:policy-list',
+            lambda ctx: {'path': reverse('policy:policy-list')},
+            skip=lambda ctx: 'Not today.')
+
+        results = benchmarks.run(self.context, [scenario], iterations=2)
+
+        self.assertEqual(results['policy-list']['skipped'], 'Not today.')
+        self.assertNotIn('p95_ms', results['policy-list'])
+
+    def test_run_connections(self):
+        """Test each connection mode is timed on its own connection."""
+        results = benchmarks.run_connections(iterations=5)
+
+        self.assertEqual(set(results), set(benchmarks.CONNECTION_MODES))
+        for result in results.values():
+            self.assertEqual(result['iterations'], 5)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_compare_flags_regressions(self):
+        """Test latency past the threshold and extra queries regress."""
+        baseline = {
+            'policy-list': {'p95_ms': 10, 'queries': 4, 'peak_alloc_kb': 100},
+            'claim-list': {'p95_ms': 10, 'queries': 3, 'peak_alloc_kb': 100},
+        }
+        results = {
+            'policy-list': {'p95_ms': 11, 'queries': 5, 'peak_alloc_kb': 90},
+            'claim-list': {'p95_ms': 13, 'queries': 3, 'peak_alloc_kb': 100},
+            'tag-list': {'p95_ms': 99, 'queries': 9, 'peak_alloc_kb': 999},
+        }
+
+        regressions = benchmarks.compare(results, baseline, threshold=0.2)
+
+        self.assertEqual(
+            [(item['scenario'], item['metric']) for item in regressions],
+            [('claim-list', 'p95_ms'), ('policy-list', 'queries')],
+        )
@@ -0,0 +1,161 @@
+"""
+Tests for the denormalized claim status and its transition history.
+"""
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Claim, ClaimStatusTransition, Tag
+from core.tests.helpers import (
+    create_claim,
+    create_policy,
+    create_user,
+    explain,
+)
+from policy.bulk import write_items
+
+
+CLAIMS_URL = reverse('policy:claim-list')
+
+
+def transitions(claim):
+    """Return the (from, to) status pairs of a claim, oldest first."""
+    return list(
+        claim.status_transitions.order_by('id')
+        .values_list('from_status', 'to_status'))
+
+
+class ClaimStatusTests(TestCase):
+    """Test claims follow their status tags."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.policy = create_policy(self.user)
+        self.in_progress = Tag.objects.create(claim_status='IN_PROGRESS')
+        self.accepted = Tag.objects.create(claim_status='ACCEPTED')
+
+    def test_new_claim_is_raised(self):
+        """Test a claim without tags is raised and has no history."""
+        claim = create_claim(self.user, self.policy)
+
+        self.assertEqual(claim.status, 'RAISED')
+        self.assertEqual(transitions(claim), [])
+
+    def test_adding_tags_moves_claim(self):
+        """Test the newest status tag sets the claim status."""
+        claim = create_claim(self.user, self.policy)
+
+        claim.tags.add(self.in_progress)
+        claim.tags.add(self.accepted)
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.status, 'ACCEPTED')
+        self.assertEqual(transitions(claim), [
+            ('RAISED', 'IN_PROGRESS'),
+            ('IN_PROGRESS', 'ACCEPTED'),
+        ])
+
+    def test_removing_tag_moves_claim_back(self):
+        """Test removing the newest tag restores the previous status."""
+        claim = create_claim(
+            self.user, self.policy, tags=[self.in_progress])
+        claim.tags.add(self.accepted)
+
+        claim.tags.remove(self.accepted)
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.status, 'IN_PROGRESS')
+        self.assertEqual(
+            transitions(claim)[-1], ('ACCEPTED', 'IN_PROGRESS'))
+
+    def test_clearing_tag_claims_moves_claims(self):
+        """Test clearing a tag's claims from the tag side."""
+        claim = create_claim(
+            self.user, self.policy, tags=[self.in_progress])
+
+        self.in_progress.claim_set.clear()
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.status, 'RAISED')
+
+    def test_editing_tag_moves_claims(self):
+        """Test changing a tag's status moves the claims showing it."""
+        claim = create_claim(
+            self.user, self.policy, tags=[self.in_progress])
+
+        self.in_progress.claim_status = 'REJECTED'
+        self.in_progress.save()
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.status, 'REJECTED')
+
+    def test_deleting_tag_moves_claims(self):
+        """Test deleting a status tag moves the claims it was linked to."""
+        claim = create_claim(
+            self.user, self.policy, tags=[self.in_progress, self.accepted])
+
+        self.accepted.delete()
+
+        claim.refresh_from_db()
+        self.assertEqual(claim.status, 'IN_PROGRESS')
+
+    def test_transitions_are_append_only(self):
+        """Test a recorded transition cannot be changed."""
+        claim = create_claim(
+            self.user, self.policy, tags=[self.in_progress])
+        transition = claim.status_transitions.get()
+
+        transition.to_status = 'ACCEPTED'
+        with self.assertRaises(ValueError):
+            transition.save()
+
+    def test_bulk_claims_start_in_tag_status(self):
+        """Test bulk written claims take the status of their last tag."""
+        write_items(self.user, [{
+            'title': 'HEALTH',
+            'startDate': self.policy.startDate,
+            'endDate': self.policy.endDate,
+            'premiumAmt': self.policy.premiumAmt,
+            'sumAssured': self.policy.sumAssured,
+            'claimedAmt': 0,
+            'claims': [{
+                'claimedAmt': 10,
+                'tags': [
+                    {'claim_status': 'IN_PROGRESS', 'description': ''},
+                    {'claim_status': 'REJECTED', 'description': ''},
+                ],
+            }],
+        }])
+
+        claim = Claim.objects.get(user=self.user)
+        self.assertEqual(claim.status, 'REJECTED')
+
+    def test_filter_claims_by_status(self):
+        """Test the claim list filters on the status column."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        raised = create_claim(self.user, self.policy)
+        moved = create_claim(
+            self.user, create_policy(self.user), tags=[self.in_progress])
+
+        res = client.get(CLAIMS_URL, {'status': 'IN_PROGRESS'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [claim['id'] for claim in res.data['results']]
+        self.assertIn(moved.id, ids)
+        self.assertNotIn(raised.id, ids)
+
+    def test_status_queue_uses_index(self):
+        """Test a status queue is read through (status, changed_at)."""
+        queryset = Claim.objects.filter(
+            status='IN_PROGRESS').order_by('status_changed_at')
+
+        self.assertIn('claim_status_queue', explain(queryset))
+
+    def test_status_history_uses_index(self):
+        """Test a status's transitions are read through their index."""
+        queryset = ClaimStatusTransition.objects.filter(
+            to_status='ACCEPTED').order_by('created_at')
+
+        self.assertIn('transition_status_created', explain(queryset))
@@ -0,0 +1,128 @@
+"""
+Tests for the per-view database metrics.
+"""
+import asyncio
+
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import token_cache
+from core.db_metrics import (
+    DatabaseMetricsMiddleware,
+    fingerprint,
+    normalize,
+)
+from core.tests.helpers import create_policy, create_user
+
+
+POLICIES_URL = reverse('policy:policy-list')
+POLICY_EXPORT_URL = reverse('policy:policy-export')
+
+
+def sample(name, view):
+    """Return the value of a per-view histogram sample."""
+    return REGISTRY.get_sample_value(name, {'view': view}) or 0
+
+
+class NormalizeTests(TestCase):
+    """Test SQL fingerprints."""
+
+    def test_literals_replaced(self):
+        """Test literals, placeholders and IN lists are normalized."""
+        sql = ("SELECT * FROM core_policy WHERE id IN (%s, %s, %s)\n"
+               "  AND title = 'HEALTH' AND premiumAmt > 10.5")
+
+        self.assertEqual(
+            normalize(sql),
+            'SELECT * FROM core_policy WHERE id IN (...) '
+            'AND title = ? AND premiumAmt > ?',
+        )
+
+    def test_same_shape_same_fingerprint(self):
+        """Test statements differing in values share a fingerprint."""
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s)'),
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s)'),
+        )
+        self.assertNotEqual(
+            fingerprint('SELECT 1 FROM t WHERE id = %s'),
+            fingerprint('SELECT 1 FROM u WHERE id = %s'),
+        )
+
+
+class DatabaseMetricsMiddlewareTests(TestCase):
+    """Test queries are recorded per resolved view."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        create_policy(self.user)
+        token_cache.clear()
+        self.token = Token.objects.create(user=self.user)
+
+    def test_queries_recorded_by_view(self):
+        """Test a request observes its query count under the view name."""
+        view = 'policy:policy-list'
+        count = sample('django_view_db_queries_count', view)
+        queries = sample('django_view_db_queries_sum', view)
+
+        with self.assertNumQueries(3):
+            self.client.get(POLICIES_URL)
+
+        self.assertEqual(
+            sample('django_view_db_queries_count', view), count + 1)
+        self.assertEqual(
+            sample('django_view_db_queries_sum', view), queries + 3)
+        self.assertGreater(sample('django_view_db_seconds_sum', view), 0)
+
+    def test_streamed_queries_recorded(self):
+        """Test queries of a streamed response count once it is read."""
+        view = 'policy:policy-export'
+        queries = sample('django_view_db_queries_sum', view)
+
+        res = self.client.get(POLICY_EXPORT_URL)
+        b''.join(res.streaming_content)
+
+        self.assertEqual(
+            sample('django_view_db_queries_sum', view), queries + 1)
+
+    @override_settings(DB_SLOW_QUERY_LOG_MS=0)
+    def test_slow_queries_logged(self):
+        """Test queries above the threshold are logged with a fingerprint."""
+        with self.assertLogs('core.db_metrics', 'WARNING') as logs:
+            res = self.client.get(POLICY_EXPORT_URL)
+            b''.join(res.streaming_content)
+
+        self.assertIn('in policy:policy-export [', logs.output[0])
+        self.assertIn('WHERE "core_policy"."user_id" = ?', logs.output[0])
+
+    def test_async_mode(self):
+        """Test the middleware is a coroutine in an async chain only."""
+        async def get_response_async(request):
+            return HttpResponse()
+
+        self.assertTrue(asyncio.iscoroutinefunction(
+            DatabaseMetricsMiddleware(get_response_async)))
+        self.assertFalse(asyncio.iscoroutinefunction(
+            DatabaseMetricsMiddleware(lambda request: HttpResponse())))
+
+    async def test_async_queries_recorded(self):
+        """Test queries of a view are recorded under ASGI."""
+        view = 'policy:policy-list'
+        count = sample('django_view_db_queries_count', view)
+        queries = sample('django_view_db_queries_sum', view)
+
+        res = await self.async_client.get(
+            POLICIES_URL, AUTHORIZATION=f'Token {self.token.key}')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            sample('django_view_db_queries_count', view), count + 1)
+        self.assertGreater(
+            sample('django_view_db_queries_sum', view), queries)
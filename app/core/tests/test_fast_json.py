@@ -0,0 +1,143 @@
+"""
+Tests for the orjson backed renderer and parser.
+"""
+import io
+import uuid
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.fast_json import FastJSONParser, FastJSONRenderer
+from core.tests.helpers import (
+    create_claim,
+    create_policy,
+    create_user,
+)
+
+
+POLICIES_URL = reverse('policy:policy-list')
+
+PAYLOAD = {
+    'premiumAmt': Decimal('120.50'),
+    'sumAssured': Decimal('10000'),
+    'policy_id': uuid.UUID('6f1c1a3e-5a7b-4e8f-9d2c-0b1e2f3a4b5c'),
+    'updated_at': datetime(2024, 5, 1, 8, 30, 15, 123456,
+                           tzinfo=timezone.utc),
+    'startDate': date(2024, 1, 1),
+    'at': time(9, 15, 30, 500000),
+    'title': gettext_lazy('Health'),
+    'description': 'Café   line   break',
+    'counts': {1: 2, 'total': [1, 2.5, None, True]},
+}
+
+
+class FastJSONRendererTests(TestCase):
+    """Test the renderer output equals JSONRenderer's."""
+
+    def test_matches_json_renderer(self):
+        """Test decimals, UUIDs, dates and text render like DRF."""
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD),
+            JSONRenderer().render(PAYLOAD),
+        )
+
+    def test_exponent_floats_match(self):
+        """Test floats Python prints with an exponent render like DRF."""
+        for value in (1e16, -2.5e22, 1e-07, 1.5e-05, Decimal('1E+16')):
+            data = {'amt': value, 'list': [0.1, value]}
+
+            self.assertEqual(
+                FastJSONRenderer().render(data),
+                JSONRenderer().render(data),
+            )
+
+    def test_big_integers_fall_back(self):
+        """Test integers beyond 64 bits render like DRF instead of failing."""
+        data = {'id': 2 ** 64, 'ids': [-(2 ** 70)]}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data),
+        )
+
+    def test_non_finite_floats_render_null(self):
+        """Test NaN and infinity render null where JSONRenderer raises."""
+        data = {'amt': float('nan'), 'max': float('inf')}
+
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+        self.assertEqual(
+            FastJSONRenderer().render(data), b'{"amt":null,"max":null}')
+
+    def test_indent_falls_back(self):
+        """Test indented output is left to JSONRenderer."""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(PAYLOAD, media_type),
+            JSONRenderer().render(PAYLOAD, media_type),
+        )
+
+    def test_without_orjson(self):
+        """Test a missing orjson falls back to the DRF classes."""
+        rendered = JSONRenderer().render(PAYLOAD)
+
+        with patch('core.fast_json.orjson', None):
+            self.assertEqual(FastJSONRenderer().render(PAYLOAD), rendered)
+            data = FastJSONParser().parse(io.BytesIO(rendered))
+
+        self.assertEqual(data['policy_id'], str(PAYLOAD['policy_id']))
+
+    def test_api_response_matches(self):
+        """Test a policy list renders the same bytes as with DRF."""
+        user = create_user()
+        create_claim(user, create_policy(user))
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(POLICIES_URL, {'expand': 'claims.tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+
+
+class FastJSONParserTests(TestCase):
+    """Test the parser reads what JSONParser reads."""
+
+    def parse(self, body, encoding='utf-8'):
+        """Return body parsed by FastJSONParser."""
+        return FastJSONParser().parse(
+            io.BytesIO(body), parser_context={'encoding': encoding})
+
+    def test_parse(self):
+        """Test a UTF-8 document is parsed."""
+        data = self.parse('{"title": "Café", "amt": 1.5}'.encode())
+
+        self.assertEqual(data, {'title': 'Café', 'amt': 1.5})
+
+    def test_other_encoding(self):
+        """Test the request encoding is honoured."""
+        data = self.parse('{"title": "Café"}'.encode('latin-1'),
+                          encoding='latin-1')
+
+        self.assertEqual(data, {'title': 'Café'})
+
+    def test_big_integers_fall_back(self):
+        """Test integers orjson rejects are parsed by JSONParser."""
+        data = self.parse(b'{"id": 123456789012345678901234567890}')
+
+        self.assertEqual(data['id'], 123456789012345678901234567890)
+
+    def test_invalid_json(self):
+        """Test invalid and non-strict JSON are parse errors."""
+        for body in (b'{"title": ', b'{"amt": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
@@ -0,0 +1,239 @@
+"""
+Tests for claim image processing.
+"""
+import hashlib
+import io
+import multiprocessing.spawn
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from PIL import Image
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.image_variants import process_image
+from core.images import ImagePool, PoolFull
+from core.models import Policy, Claim
+
+
+def image_upload_url(claim_id):
+    """Create and return a claim image upload URL."""
+    return reverse('policy:claim-upload-image', args=[claim_id])
+
+
+def make_jpeg(size=(800, 600)):
+    """Return the bytes of a JPEG image carrying EXIF data."""
+    exif = Image.Exif()
+    exif[0x010f] = 'TestCamera'
+    with tempfile.SpooledTemporaryFile() as buffer:
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        buffer.seek(0)
+        return buffer.read()
+
+
+class ProcessImageTests(TestCase):
+    """Test generating image variants."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'uploads'))
+        self.name = 'uploads/photo.jpg'
+        with open(os.path.join(self.root, self.name), 'wb') as image_file:
+            image_file.write(make_jpeg())
+
+    def test_variants_written(self):
+        """Test thumbnail and WebP variants are written."""
+        result = process_image(self.root, self.name, (320, 320), 90, 80)
+
+        self.assertEqual(result['image_width'], 800)
+        self.assertEqual(result['image_height'], 600)
+        with Image.open(os.path.join(self.root, result['thumbnail'])) as img:
+            self.assertLessEqual(max(img.size), 320)
+        with Image.open(os.path.join(self.root, result['image_webp'])) as img:
+            self.assertEqual(img.format, 'WEBP')
+
+    def digest(self, name):
+        """Return the SHA-256 of a file under the root."""
+        with open(os.path.join(self.root, name), 'rb') as image_file:
+            return hashlib.sha256(image_file.read()).hexdigest()
+
+    def test_exif_stripped_from_copy(self):
+        """Test a copy is written without EXIF and the original kept."""
+        before = self.digest(self.name)
+
+        result = process_image(self.root, self.name, (320, 320), 90, 80)
+
+        stripped = result['image_stripped']
+        self.assertEqual(stripped, 'uploads/photo_stripped.jpg')
+        path = os.path.join(self.root, stripped)
+        with Image.open(path) as img:
+            self.assertEqual(img.format, 'JPEG')
+            self.assertEqual(len(img.getexif()), 0)
+        self.assertEqual(self.digest(self.name), before)
+
+    def test_jpeg_quality_applied(self):
+        """Test JPEG variants are encoded at the configured quality."""
+        reference = io.BytesIO()
+        Image.new('RGB', (8, 8)).save(reference, 'JPEG', quality=95)
+        with Image.open(reference) as img:
+            expected = img.quantization
+
+        result = process_image(self.root, self.name, (320, 320), 95, 80)
+
+        for name in (result['image_stripped'], result['thumbnail']):
+            with Image.open(os.path.join(self.root, name)) as img:
+                self.assertEqual(img.quantization, expected)
+
+    def test_reprocessing_rewrites_variants(self):
+        """Test processing again replaces the variants in place."""
+        first = process_image(self.root, self.name, (320, 320), 90, 80)
+
+        second = process_image(self.root, self.name, (320, 320), 90, 80)
+
+        self.assertEqual(second, first)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.root, 'uploads'))),
+            ['photo.jpg', 'photo.webp', 'photo_stripped.jpg',
+             'photo_thumb.jpg'],
+        )
+
+
+class ImagePoolTests(TestCase):
+    """Test the bounded image pool."""
+
+    def test_workers_start_without_python_executable(self):
+        """Test workers start when the server binary is not Python.
+
+        Under uWSGI sys.executable is the uwsgi binary, which multiprocessing
+        would otherwise use to start the spawned workers.
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with open(os.path.join(root, 'photo.jpg'), 'wb') as image_file:
+            image_file.write(make_jpeg())
+        self.addCleanup(
+            multiprocessing.spawn.set_executable,
+            multiprocessing.spawn.get_executable())
+        multiprocessing.spawn.set_executable('/nonexistent/uwsgi')
+        pool = ImagePool(max_workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+
+        with patch('sys.executable', '/nonexistent/uwsgi'):
+            future = pool.executor.submit(
+                process_image, root, 'photo.jpg', (32, 32), 90, 80)
+            result = future.result(timeout=60)
+
+        self.assertEqual(result['image_width'], 800)
+
+    def test_pool_full(self):
+        """Test submissions beyond max_pending are refused."""
+        pool = ImagePool(max_workers=1, max_pending=1)
+        with patch.object(ImagePool, 'executor') as executor:
+            pool.submit(1, 'a.jpg')
+            with self.assertRaises(PoolFull):
+                pool.submit(2, 'b.jpg')
+
+        self.assertEqual(executor.submit.call_count, 1)
+
+    def test_same_image_processed_once(self):
+        """Test claims sharing an image in flight wait for one job."""
+        pool = ImagePool(max_workers=1, max_pending=1)
+        result = {'image_width': 1}
+        with patch.object(ImagePool, 'executor') as executor, \
+                patch('core.images.record_result') as record:
+            pool.submit(1, 'a.jpg')
+            pool.submit(2, 'a.jpg')
+            future = executor.submit.return_value
+            future.result.return_value = result
+            done = future.add_done_callback.call_args.args[0]
+            done(future)
+            pool.submit(3, 'b.jpg')
+
+        self.assertEqual(executor.submit.call_count, 2)
+        record.assert_any_call(1, 'a.jpg', result)
+        record.assert_any_call(2, 'a.jpg', result)
+        self.assertEqual(record.call_count, 2)
+
+
+class ClaimImageUploadTests(TestCase):
+    """Test uploading claim images."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        policy = Policy.objects.create(
+            user=self.user,
+            startDate=date(2024, 1, 1),
+            endDate=date(2025, 1, 1),
+            premiumAmt=Decimal('10.00'),
+            sumAssured=Decimal('100.00'),
+            claimedAmt=Decimal('0.00'),
+        )
+        self.claim = Claim.objects.create(
+            user=self.user, policy=policy, claimedAmt=Decimal('5.00'))
+
+    def _upload(self):
+        image = SimpleUploadedFile(
+            'photo.jpg', make_jpeg(), content_type='image/jpeg')
+        return self.client.post(
+            image_upload_url(self.claim.id), {'image': image},
+            format='multipart')
+
+    def test_upload_returns_before_processing(self):
+        """Test the upload is accepted and handed to the pool."""
+        with override_settings(MEDIA_ROOT=self.media_root), \
+                patch('core.images.image_pool') as pool:
+            res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['image_status'], Claim.IMAGE_PENDING)
+        pool.submit.assert_called_once()
+
+    def test_upload_processed_inline(self):
+        """Test the variants are recorded on the claim."""
+        with override_settings(
+                MEDIA_ROOT=self.media_root, IMAGE_PROCESSING_SYNC=True):
+            res = self._upload()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.claim.refresh_from_db()
+        self.assertEqual(self.claim.image_status, Claim.IMAGE_READY)
+        self.assertEqual(self.claim.image_width, 800)
+        self.assertTrue(self.claim.thumbnail.name.endswith('_thumb.jpg'))
+        self.assertTrue(self.claim.image_webp.name.endswith('.webp'))
+        self.assertTrue(
+            self.claim.image_stripped.name.endswith('_stripped.jpg'))
+
+    def test_original_image_not_served(self):
+        """Test responses serve the stripped copy, never the original."""
+        with override_settings(
+                MEDIA_ROOT=self.media_root, IMAGE_PROCESSING_SYNC=True):
+            res = self._upload()
+        self.claim.refresh_from_db()
+        detail = self.client.get(
+            reverse('policy:claim-list'), {'fields': 'id,image'})
+        export = self.client.get(reverse('policy:claim-export'))
+
+        self.assertTrue(res.data['image'].endswith('_stripped.jpg'))
+        self.assertEqual(
+            detail.data['results'][0]['image'], res.data['image'])
+        self.assertNotIn(self.claim.image.name, str(res.data))
+        self.assertNotIn(self.claim.image.name, str(detail.data))
+        content = b''.join(export.streaming_content).decode()
+        self.assertIn(self.claim.image_stripped.name, content)
+        self.assertNotIn(self.claim.image.name, content)
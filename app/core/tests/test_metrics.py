@@ -0,0 +1,70 @@
+"""
+Tests for Prometheus metrics collected from several worker processes.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Run in a fresh interpreter, like a uWSGI worker with the shared
+# directory set before prometheus_client is imported.
+WORKER = '''
+import sys
+import django
+
+django.setup()
+
+from core.metrics import mark_worker_dead
+from core.replicas import REPLICA_LAG
+from core.response_cache import RESPONSE_CACHE_HITS
+
+RESPONSE_CACHE_HITS.labels(view='multiprocess-test').inc(int(sys.argv[1]))
+REPLICA_LAG.labels(alias='multiprocess-test').set(float('inf'))
+mark_worker_dead()
+'''
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    """Test /metrics aggregates the counters of every worker."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_workers(self, increments):
+        """Run one worker process per increment, in parallel."""
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=self.directory)
+        workers = [
+            subprocess.Popen(
+                [sys.executable, '-c', WORKER, str(increment)],
+                cwd=settings.BASE_DIR,
+                env=env,
+            )
+            for increment in increments
+        ]
+        for worker in workers:
+            self.assertEqual(worker.wait(timeout=60), 0)
+
+    def test_scrape_aggregates_workers(self):
+        """Test one scrape sums the counters of exited workers."""
+        self.run_workers([1, 2, 3, 4])
+
+        with patch.dict(
+                os.environ, {'PROMETHEUS_MULTIPROC_DIR': self.directory}):
+            res = self.client.get('/metrics')
+
+        self.assertIn(
+            'response_cache_hits_total{view="multiprocess-test"} 10.0',
+            res.content.decode(),
+        )
+        # The lag measured by exited workers is gone with them.
+        self.assertNotIn('alias="multiprocess-test"', res.content.decode())
+        # One file per worker, no live gauge files left behind.
+        self.assertEqual(len(os.listdir(self.directory)), 4)
@@ -0,0 +1,161 @@
+"""
+Tests for claim amount prediction.
+"""
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import joblib
+import numpy as np
+from prometheus_client import REGISTRY
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Claim
+from core.prediction import (
+    FEATURE_NAMES,
+    ClaimPredictor,
+    batch_label,
+    featurize,
+)
+from core.tests.helpers import create_policy, create_user
+
+
+PREDICT_URL = reverse('policy:claim-predict')
+
+
+def train_model(path):
+    """Train a small model predicting a tenth of the premium and save it."""
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0, 1000, size=(200, len(FEATURE_NAMES)))
+    target = features[:, FEATURE_NAMES.index('premiumAmt')] / 10
+    pipeline = Pipeline(steps=[
+        ('rf', RandomForestRegressor(n_estimators=5, random_state=0)),
+    ])
+    pipeline.fit(features, target)
+    joblib.dump(pipeline, path)
+
+
+class FeaturizeTests(TestCase):
+    """Test building feature vectors."""
+
+    def test_featurize_rows(self):
+        """Test titles are one-hot encoded and the term is in days."""
+        rows = [
+            ('HEALTH', Decimal('100.00'), Decimal('1000.00'),
+             date(2024, 1, 1), date(2024, 1, 31)),
+            ('UNKNOWN', Decimal('50.00'), Decimal('500.00'),
+             date(2024, 1, 1), date(2024, 1, 2)),
+        ]
+
+        features = featurize(rows)
+
+        self.assertEqual(features.shape, (2, len(FEATURE_NAMES)))
+        self.assertEqual(features[0, FEATURE_NAMES.index('title_HEALTH')], 1)
+        self.assertEqual(features[0, :5].sum(), 1)
+        self.assertEqual(features[1, :5].sum(), 0)
+        self.assertEqual(list(features[0, 5:]), [100, 1000, 30])
+
+    def test_batch_label(self):
+        """Test batch sizes map to a fixed set of buckets."""
+        self.assertEqual(
+            [batch_label(size) for size in (1, 2, 16, 200, 256, 5000)],
+            ['1', '16', '16', '256', '256', '>1024'],
+        )
+        self.assertEqual(
+            {batch_label(size) for size in range(1, 5000)},
+            {'1', '16', '64', '256', '1024', '>1024'},
+        )
+
+
+class ClaimPredictorTests(TestCase):
+    """Test the prediction service."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'model.joblib')
+        train_model(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_predict_in_batches(self):
+        """Test predictions are made and timed per batch."""
+        predictor = ClaimPredictor(self.path, batch_size=4)
+        labels = {'batch_size': '16'}
+        before = REGISTRY.get_sample_value(
+            'claim_prediction_latency_seconds_count', labels) or 0
+
+        predictions = predictor.predict(np.zeros((10, len(FEATURE_NAMES))))
+
+        self.assertEqual(predictions.shape, (10,))
+        # Batches of 4, 4 and 2 rows.
+        self.assertEqual(REGISTRY.get_sample_value(
+            'claim_prediction_latency_seconds_count', labels), before + 3)
+
+    def test_model_loaded_once(self):
+        """Test the model file is read on first use only."""
+        predictor = ClaimPredictor(self.path)
+
+        with patch('core.prediction.joblib.load', wraps=joblib.load) as load:
+            predictor.load()
+            predictor.load()
+
+        load.assert_called_once_with(self.path)
+
+
+class PredictApiTests(TestCase):
+    """Test the claim predict action."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'model.joblib')
+        train_model(path)
+        self.predictor = ClaimPredictor(path, batch_size=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_predict_user_claims(self):
+        """Test predictions are returned for the user's claims only."""
+        claims = [
+            Claim.objects.create(
+                user=self.user,
+                policy=create_policy(self.user),
+                claimedAmt=Decimal('10.00'),
+            )
+            for _ in range(3)
+        ]
+        other = create_user(email='other@example.com')
+        Claim.objects.create(
+            user=other, policy=create_policy(other), claimedAmt=1)
+
+        with patch('policy.views.claim_predictor', self.predictor):
+            res = self.client.get(PREDICT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [row['id'] for row in res.data['results']]
+        self.assertEqual(ids, [claim.id for claim in reversed(claims)])
+        for row in res.data['results']:
+            self.assertGreater(Decimal(row['predicted_amount']), 0)
+
+    def test_predict_without_model(self):
+        """Test a missing model answers 503."""
+        predictor = ClaimPredictor(os.path.join(self.directory, 'missing'))
+
+        with patch('policy.views.claim_predictor', predictor):
+            res = self.client.get(PREDICT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,166 @@
+"""
+Tests for the policy renewal batch command.
+"""
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import skipIf
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from core import renewals
+from core.models import BatchCheckpoint, PolicyRenewal
+from core.tests.helpers import create_policy, create_user
+
+
+def renew(*args):
+    """Run the renew_policies command over January 2025."""
+    out = StringIO()
+    call_command(
+        'renew_policies', '--start', '2025-01-01', '--days', '30',
+        *args, stdout=out)
+    return out.getvalue()
+
+
+class RenewPoliciesCommandTests(TestCase):
+    """Test the renew_policies management command."""
+
+    def setUp(self):
+        self.user = create_user()
+
+    def test_renews_policies_in_window(self):
+        """Test only policies ending inside the window are renewed."""
+        due = create_policy(self.user, endDate=date(2025, 1, 10))
+        create_policy(self.user, endDate=date(2025, 3, 1))
+
+        renew()
+
+        renewal = PolicyRenewal.objects.get()
+        self.assertEqual(renewal.policy, due)
+        self.assertEqual(renewal.startDate, date(2025, 1, 11))
+        self.assertEqual(renewal.endDate, date(2026, 1, 21))
+        self.assertEqual(renewal.premiumAmt, due.premiumAmt)
+
+    def test_chunks_are_checkpointed(self):
+        """Test every id-range chunk is recorded once."""
+        for _ in range(5):
+            create_policy(self.user, endDate=date(2025, 1, 10))
+
+        out = renew('--chunk-size', '2')
+
+        self.assertEqual(PolicyRenewal.objects.count(), 5)
+        self.assertEqual(BatchCheckpoint.objects.count(), 3)
+        self.assertIn('5 created', out)
+
+    def test_resume_skips_completed_chunks(self):
+        """Test a rerun after a crash only redoes unfinished chunks."""
+        for _ in range(4):
+            create_policy(self.user, endDate=date(2025, 1, 10))
+
+        real = renewals.renew_chunk
+        calls = []
+
+        def crash_on_second(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('worker died')
+            return real(*args)
+
+        with patch('core.renewals.renew_chunk', side_effect=crash_on_second):
+            with self.assertRaises(RuntimeError):
+                renew('--chunk-size', '2')
+        self.assertEqual(PolicyRenewal.objects.count(), 2)
+
+        out = renew('--chunk-size', '2')
+
+        self.assertIn('1 chunks', out)
+        self.assertEqual(PolicyRenewal.objects.count(), 4)
+
+    def test_resume_covers_added_policies(self):
+        """Test policies added after the last checkpoint are renewed."""
+        for _ in range(3):
+            create_policy(self.user, endDate=date(2025, 1, 10))
+        renew('--chunk-size', '2')
+
+        for _ in range(2):
+            create_policy(self.user, endDate=date(2025, 1, 10))
+        out = renew('--chunk-size', '2')
+
+        self.assertIn('1 chunks, 2 policies, 2 created', out)
+        self.assertEqual(PolicyRenewal.objects.count(), 5)
+
+    def test_resume_with_other_chunk_size(self):
+        """Test a rerun with a new chunk size only covers new ids."""
+        for _ in range(4):
+            create_policy(self.user, endDate=date(2025, 1, 10))
+        renew('--chunk-size', '3')
+
+        create_policy(self.user, endDate=date(2025, 1, 10))
+        out = renew('--chunk-size', '2')
+
+        self.assertIn('1 chunks, 1 policies, 1 created', out)
+        self.assertEqual(PolicyRenewal.objects.count(), 5)
+
+    def test_chunk_ranges_skip_done(self):
+        """Test ids covered by done ranges are left out."""
+        policies = [
+            create_policy(self.user, endDate=date(2025, 1, 10))
+            for _ in range(10)
+        ]
+        low = policies[0].id
+        queryset = renewals.candidates(date(2025, 1, 1), date(2025, 1, 31))
+
+        ranges = renewals.chunk_ranges(
+            queryset, 3, [(low + 2, low + 4), (low - 5, low + 1)])
+
+        self.assertEqual(ranges, [
+            (low + 1, low + 2),
+            (low + 4, low + 7),
+            (low + 7, low + 10),
+        ])
+
+    def test_rerun_updates_pending_premium(self):
+        """Test a restarted run refreshes pending renewals in bulk."""
+        policy = create_policy(self.user, endDate=date(2025, 1, 10))
+        renew()
+
+        policy.premiumAmt = Decimal('150.00')
+        policy.save()
+        out = renew('--restart')
+
+        renewal = PolicyRenewal.objects.get()
+        self.assertEqual(renewal.premiumAmt, Decimal('150.00'))
+        self.assertIn('0 created, 1 updated', out)
+
+    def test_accepted_renewal_left_alone(self):
+        """Test renewals no longer pending are not changed."""
+        policy = create_policy(
+            self.user, endDate=date(2025, 1, 10), premiumAmt=Decimal('100.00'))
+        renew()
+        PolicyRenewal.objects.update(status=PolicyRenewal.STATUS_ACCEPTED)
+
+        policy.premiumAmt = Decimal('150.00')
+        policy.save()
+        renew('--restart')
+
+        renewal = PolicyRenewal.objects.get()
+        self.assertEqual(renewal.premiumAmt, Decimal('100.00'))
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite locks tables across threads.')
+class ParallelRenewalTests(TransactionTestCase):
+    """Test chunks processed by several workers."""
+
+    def test_parallel_workers(self):
+        """Test every chunk is processed once with several workers."""
+        user = create_user()
+        for _ in range(6):
+            create_policy(user, endDate=date(2025, 1, 10))
+
+        renew('--chunk-size', '2', '--workers', '3')
+
+        self.assertEqual(PolicyRenewal.objects.count(), 6)
+        self.assertEqual(BatchCheckpoint.objects.count(), 3)
@@ -0,0 +1,279 @@
+"""
+Tests for routing reads to read replicas.
+"""
+import math
+import unittest
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import replicas
+from core.checks import check_replica_pin_cache
+from core.models import Policy
+from core.response_cache import response_cache
+from core.tests.helpers import create_policy, create_user
+
+
+POLICIES_URL = reverse('policy:policy-list')
+POLICY_EXPORT_URL = reverse('policy:policy-export')
+CLAIM_CREATE_URL = reverse('policy:claim-create-claim')
+
+
+def routed(alias, reason):
+    """Return how many requests were routed to alias for reason."""
+    return REGISTRY.get_sample_value(
+        'db_read_routing_total', {'alias': alias, 'reason': reason}) or 0
+
+
+@override_settings(
+    DB_REPLICA_ALIASES=['replica1', 'replica2'],
+    DB_REPLICA_MAX_LAG=5,
+    DB_REPLICA_LAG_CHECK_INTERVAL=60,
+)
+class ChooseReadAliasTests(TestCase):
+    """Test replicas are chosen by lag and recent writes.
+
+    Pins of earlier tests may belong to a reused user id, so every test
+    starts from an empty cache.
+    """
+
+    def setUp(self):
+        replicas.lag_monitor.clear()
+        self.addCleanup(replicas.lag_monitor.clear)
+        caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].clear()
+
+    def choose(self, lags, user_id=1):
+        """Choose a replica with the given measured lags."""
+        with patch.object(replicas, 'measure_lag', side_effect=lags.get):
+            return replicas.choose_read_alias(user_id)
+
+    def test_replica_within_budget_chosen(self):
+        """Test reads go to a replica whose lag is within budget."""
+        alias = self.choose({'replica1': 0.5, 'replica2': 30})
+
+        self.assertEqual(alias, 'replica1')
+
+    def test_all_lagging_falls_back_to_primary(self):
+        """Test reads go to the primary when every replica lags."""
+        lagging = routed('default', 'lagging')
+
+        alias = self.choose({'replica1': 6, 'replica2': 30})
+
+        self.assertIsNone(alias)
+        self.assertEqual(routed('default', 'lagging'), lagging + 1)
+
+    def test_unmeasurable_replica_skipped(self):
+        """Test a replica whose lag query fails is treated as behind."""
+        with patch.object(replicas, 'measure_lag',
+                          side_effect=DatabaseError('down')), \
+                self.assertLogs('core.replicas', 'WARNING'):
+            lag = replicas.lag_monitor.lag('replica1')
+
+        self.assertEqual(lag, math.inf)
+
+    def test_lag_measured_once_per_interval(self):
+        """Test lag is cached between checks."""
+        with patch.object(replicas, 'measure_lag',
+                          return_value=0.0) as measure:
+            for _ in range(3):
+                replicas.lag_monitor.lag('replica1')
+
+        measure.assert_called_once_with('replica1')
+
+    def test_pinned_user_reads_primary(self):
+        """Test a user who just wrote reads from the primary."""
+        replicas.pin_to_primary(42)
+
+        self.assertIsNone(self.choose({'replica1': 0, 'replica2': 0}, 42))
+        self.assertIsNotNone(self.choose({'replica1': 0, 'replica2': 0}, 7))
+
+    @override_settings(DB_REPLICA_ALIASES=[])
+    def test_no_replicas(self):
+        """Test reads stay on the primary without replicas."""
+        self.assertIsNone(self.choose({}))
+
+
+class ReplicaRouterTests(TestCase):
+    """Test the router follows the read scope."""
+
+    def test_reads_follow_scope(self):
+        """Test reads use the scope's replica and writes the default."""
+        router = replicas.ReplicaRouter()
+
+        with replicas.read_scope():
+            replicas.route_reads('replica1')
+            self.assertEqual(router.db_for_read(Policy), 'replica1')
+
+        self.assertIsNone(router.db_for_read(Policy))
+
+
+@override_settings(DB_REPLICA_ALIASES=['default'])
+class ReplicaReadApiTests(TestCase):
+    """Test API reads are routed and writes pin the user.
+
+    The default database doubles as the replica.
+    """
+
+    def setUp(self):
+        replicas.lag_monitor.clear()
+        self.addCleanup(replicas.lag_monitor.clear)
+        caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_routed_until_write(self):
+        """Test a write pins the user's next reads to the primary."""
+        policy = create_policy(self.user)
+        replica_reads = routed('default', 'replica')
+        pinned_reads = routed('default', 'pinned')
+
+        self.client.get(POLICIES_URL)
+        res = self.client.post(
+            CLAIM_CREATE_URL, {'policy': policy.id, 'claimedAmt': '5.00'})
+        self.client.get(POLICIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(routed('default', 'replica'), replica_reads + 1)
+        self.assertEqual(routed('default', 'pinned'), pinned_reads + 1)
+
+    def list_cache_key(self):
+        """Return the response cache key of the unfiltered policy list."""
+        return response_cache.key(
+            self.user, 'policy', ('http', 'testserver', POLICIES_URL, ()))
+
+    def test_replica_reads_not_cached(self):
+        """Test responses read from a replica are tagged but not stored."""
+        create_policy(self.user)
+
+        res = self.client.get(POLICIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertIsNone(response_cache.get(self.list_cache_key()))
+
+        res = self.client.get(POLICIES_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_primary_reads_cached(self):
+        """Test responses read from the primary are stored and tagged."""
+        replicas.pin_to_primary(self.user.id)
+
+        res = self.client.get(POLICIES_URL)
+
+        self.assertIn('ETag', res)
+        self.assertEqual(
+            response_cache.get(self.list_cache_key()), res.data)
+
+    def test_export_streams_from_replica(self):
+        """Test an export keeps reading from the replica while streaming."""
+        create_policy(self.user)
+        aliases = []
+
+        def db_for_read(router, model, **hints):
+            aliases.append(replicas.current_read_alias())
+            return aliases[-1]
+
+        res = self.client.get(POLICY_EXPORT_URL)
+        with patch.object(replicas.ReplicaRouter, 'db_for_read',
+                          db_for_read):
+            body = b''.join(res.streaming_content)
+
+        self.assertEqual(len(body.splitlines()), 1)
+        self.assertEqual(set(aliases), {'default'})
+        self.assertIsNone(replicas.current_read_alias())
+
+    def test_failed_write_does_not_pin(self):
+        """Test a rejected write leaves reads on the replica."""
+        res = self.client.post(CLAIM_CREATE_URL, {'policy': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(replicas.is_pinned(self.user.id))
+
+
+class ReplicaPinCacheCheckTests(TestCase):
+    """Test replicas require a pin cache shared between processes."""
+
+    @override_settings(DB_REPLICA_ALIASES=[])
+    def test_no_replicas(self):
+        """Test the pin cache does not matter without replicas."""
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    @override_settings(
+        DB_REPLICA_ALIASES=['replica1'],
+        DB_REPLICA_PIN_CACHE_ALIAS='default',
+        CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_local_cache_rejected(self):
+        """Test a cache local to the process is an error."""
+        errors = check_replica_pin_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E002'])
+
+    @override_settings(
+        DB_REPLICA_ALIASES=['replica1'],
+        DB_REPLICA_PIN_CACHE_ALIAS='pins',
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pins': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': '/tmp/replica-pins'},
+        },
+    )
+    def test_shared_cache_accepted(self):
+        """Test a cache shared between processes passes."""
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    @override_settings(
+        DB_REPLICA_ALIASES=['replica1'], DB_REPLICA_PIN_CACHE_ALIAS='pins')
+    def test_unknown_alias_rejected(self):
+        """Test a missing cache alias is an error."""
+        errors = check_replica_pin_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+
+@unittest.skipUnless(
+    settings.DB_REPLICA_ALIASES,
+    'Run this module alone with DB_REPLICAS set to a second database.')
+class TwoDatabaseTests(TestCase):
+    """Test routing against a separate replica database.
+
+    The replica's test database is created empty and never written to,
+    so rows read back show which database served the request.
+    """
+    databases = {'default', *settings.DB_REPLICA_ALIASES}
+
+    def setUp(self):
+        replicas.lag_monitor.clear()
+        self.addCleanup(replicas.lag_monitor.clear)
+        caches[settings.DB_REPLICA_PIN_CACHE_ALIAS].clear()
+        self.alias = settings.DB_REPLICA_ALIASES[0]
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_read_your_writes(self):
+        """Test rows missing on the replica appear once the user writes."""
+        policy = create_policy(self.user)
+
+        with CaptureQueriesContext(connections[self.alias]) as replica:
+            before = self.client.get(POLICIES_URL)
+        self.assertGreater(len(replica), 0)
+        self.client.post(
+            CLAIM_CREATE_URL, {'policy': policy.id, 'claimedAmt': '5.00'})
+        after = self.client.get(POLICIES_URL)
+
+        self.assertEqual(before.data['results'], [])
+        self.assertEqual(after.data['results'][0]['id'], policy.id)
@@ -0,0 +1,118 @@
+"""
+Tests for content addressed image storage.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Policy, Claim, StoredFile
+from core.storage import ContentAddressedStorage
+from core.tests.test_images import make_jpeg
+
+
+def image_upload_url(claim_id):
+    """Create and return a claim image upload URL."""
+    return reverse('policy:claim-upload-image', args=[claim_id])
+
+
+class ContentAddressedImageTests(TestCase):
+    """Test deduplication of uploaded claim images."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(
+            MEDIA_ROOT=self.media_root, IMAGE_PROCESSING_SYNC=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.claims = [self._create_claim() for _ in range(2)]
+        self.content = make_jpeg()
+        self.digest = hashlib.sha256(self.content).hexdigest()
+
+    def _create_claim(self):
+        policy = Policy.objects.create(
+            user=self.user,
+            startDate=date(2024, 1, 1),
+            endDate=date(2025, 1, 1),
+            premiumAmt=Decimal('10.00'),
+            sumAssured=Decimal('100.00'),
+            claimedAmt=Decimal('0.00'),
+        )
+        return Claim.objects.create(
+            user=self.user, policy=policy, claimedAmt=Decimal('5.00'))
+
+    def _upload(self, claim):
+        image = SimpleUploadedFile(
+            'photo.JPG', self.content, content_type='image/jpeg')
+        res = self.client.post(
+            image_upload_url(claim.id), {'image': image}, format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        claim.refresh_from_db()
+        return claim
+
+    def test_image_named_after_content(self):
+        """Test the stored name is the hash computed during upload."""
+        claim = self._upload(self.claims[0])
+
+        self.assertEqual(
+            claim.image.name,
+            f'uploads/policy/{self.digest[:2]}/{self.digest}.jpg',
+        )
+
+    def test_original_kept_as_uploaded(self):
+        """Test processing leaves the content addressed file unchanged."""
+        claim = self._upload(self.claims[0])
+
+        with open(os.path.join(self.media_root, claim.image.name),
+                  'rb') as image_file:
+            self.assertEqual(
+                hashlib.sha256(image_file.read()).hexdigest(), self.digest)
+
+    def test_repeat_upload_skips_write(self):
+        """Test uploading the same bytes again writes nothing."""
+        self._upload(self.claims[0])
+
+        with patch.object(ContentAddressedStorage, '_save') as save, \
+                patch('core.images.process_image') as process:
+            claim = self._upload(self.claims[1])
+
+        save.assert_not_called()
+        process.assert_not_called()
+        self.assertEqual(claim.image.name, self.claims[0].image.name)
+        self.assertEqual(claim.image_status, Claim.IMAGE_READY)
+        self.assertEqual(StoredFile.objects.get().ref_count, 2)
+
+    def test_file_deleted_with_last_reference(self):
+        """Test the file is deleted when its last claim is deleted."""
+        first = self._upload(self.claims[0])
+        self._upload(self.claims[1])
+        path = os.path.join(self.media_root, first.image.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.claims[0].delete()
+        self.assertTrue(os.path.exists(path))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.claims[1].delete()
+        self.assertFalse(os.path.exists(path))
+        for variant in (first.thumbnail, first.image_stripped):
+            self.assertFalse(os.path.exists(
+                os.path.join(self.media_root, variant.name)))
+        self.assertFalse(StoredFile.objects.exists())
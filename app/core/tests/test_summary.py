@@ -0,0 +1,121 @@
+"""
+Tests for the policy portfolio summary.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Claim, PolicySummary
+from core.tests.helpers import create_policy, create_user
+
+
+SUMMARY_URL = reverse('policy:policy-summary')
+
+
+class PolicySummaryTests(TestCase):
+    """Test the incrementally maintained summary."""
+
+    def setUp(self):
+        self.user = create_user()
+
+    def _summary(self, title='HEALTH'):
+        return PolicySummary.objects.get(user=self.user, title=title)
+
+    def test_policy_and_claim_saves_update_summary(self):
+        """Test creating and updating rows adjusts the totals."""
+        amounts = {
+            'sumAssured': Decimal('1000.00'),
+            'claimedAmt': Decimal('10.00'),
+        }
+        policy = create_policy(self.user, **amounts)
+        create_policy(self.user, premiumAmt=Decimal('50.00'), **amounts)
+        claim = Claim.objects.create(
+            user=self.user, policy=policy, claimedAmt=Decimal('25.00'))
+
+        policy.premiumAmt = Decimal('120.00')
+        policy.save()
+        claim.claimedAmt = Decimal('30.00')
+        claim.save()
+
+        row = self._summary()
+        self.assertEqual(row.policy_count, 2)
+        self.assertEqual(row.premium_total, Decimal('170.00'))
+        self.assertEqual(row.sum_assured_total, Decimal('2000.00'))
+        self.assertEqual(row.claimed_total, Decimal('20.00'))
+        self.assertEqual(row.claim_count, 1)
+        self.assertEqual(row.claim_amount_total, Decimal('30.00'))
+
+    def test_title_change_moves_claims(self):
+        """Test changing a policy title moves it and its claims."""
+        policy = create_policy(self.user)
+        Claim.objects.create(
+            user=self.user, policy=policy, claimedAmt=Decimal('25.00'))
+
+        policy.title = 'TRAVEL'
+        policy.save()
+
+        self.assertEqual(self._summary().policy_count, 0)
+        self.assertEqual(self._summary().claim_count, 0)
+        self.assertEqual(self._summary('TRAVEL').policy_count, 1)
+        self.assertEqual(
+            self._summary('TRAVEL').claim_amount_total, Decimal('25.00'))
+
+    def test_delete_updates_summary(self):
+        """Test deleting a policy removes it and its claims."""
+        policy = create_policy(self.user)
+        Claim.objects.create(
+            user=self.user, policy=policy, claimedAmt=Decimal('25.00'))
+
+        policy.delete()
+
+        row = self._summary()
+        self.assertEqual(row.policy_count, 0)
+        self.assertEqual(row.claim_count, 0)
+        self.assertEqual(row.premium_total, Decimal('0'))
+
+    def test_deleting_user_removes_summary(self):
+        """Test deleting a user cascades cleanly."""
+        create_policy(self.user)
+
+        self.user.delete()
+
+        self.assertFalse(PolicySummary.objects.exists())
+
+    def test_summary_endpoint(self):
+        """Test the summary endpoint returns totals per title."""
+        create_policy(self.user, premiumAmt=Decimal('100.00'))
+        create_policy(
+            self.user, title='TRAVEL', premiumAmt=Decimal('100.00'))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertNumQueries(1):
+            res = client.get(SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['totals']['policy_count'], 2)
+        self.assertEqual(res.data['totals']['premium_total'], '200.00')
+        self.assertEqual(
+            [row['title'] for row in res.data['by_title']],
+            ['HEALTH', 'TRAVEL'],
+        )
+
+    def test_rebuild_command_fixes_drift(self):
+        """Test the command detects and repairs drift."""
+        create_policy(self.user)
+        PolicySummary.objects.update(policy_count=5)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_policy_summary', check=True,
+                         stdout=StringIO())
+        call_command('rebuild_policy_summary', stdout=StringIO())
+
+        self.assertEqual(self._summary().policy_count, 1)
+        call_command('rebuild_policy_summary', check=True, stdout=StringIO())
@@ -0,0 +1,144 @@
+"""
+Tests for interning tags and linking them to new claims.
+"""
+from unittest.mock import patch
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Claim, Tag
+from core.tags import TagCache, tag_cache
+from core.tests.helpers import (
+    create_claim,
+    create_policy,
+    create_user,
+)
+
+
+CLAIM_CREATE_URL = reverse('policy:claim-create-claim')
+
+
+def tag_detail_url(tag_id):
+    """Return the detail URL of a tag."""
+    return reverse('policy:tag-detail', args=[tag_id])
+
+
+class TagCacheTests(TestCase):
+    """Test tag payloads are resolved to ids once."""
+
+    def setUp(self):
+        self.cache = TagCache(ttl=60)
+
+    def test_resolve_creates_missing_tags(self):
+        """Test unknown keys are created and existing ones reused."""
+        existing = Tag.objects.create(claim_status='ACCEPTED')
+
+        ids = self.cache.resolve(
+            [('ACCEPTED', ''), ('REJECTED', 'Fraud')])
+
+        self.assertEqual(ids[('ACCEPTED', '')], existing.id)
+        created = Tag.objects.get(pk=ids[('REJECTED', 'Fraud')])
+        self.assertEqual(created.claim_status, 'REJECTED')
+        self.assertEqual(created.description, 'Fraud')
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_resolve_hits_after_commit(self):
+        """Test committed keys are resolved without queries."""
+        with self.captureOnCommitCallbacks(execute=True):
+            ids = self.cache.resolve([('RAISED', '')])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.cache.resolve([('RAISED', '')]), ids)
+
+    def test_uncommitted_keys_are_not_kept(self):
+        """Test ids read in an uncommitted transaction are not cached."""
+        self.cache.resolve([('RAISED', '')])
+
+        with self.assertNumQueries(1):
+            self.cache.resolve([('RAISED', '')])
+
+    def test_concurrent_insert_is_read_back(self):
+        """Test a key inserted by another worker meanwhile resolves."""
+        other = Tag.objects.create(claim_status='IN_PROGRESS')
+        select = self.cache._select
+        calls = []
+
+        def missed_once(keys):
+            calls.append(keys)
+            return {} if len(calls) == 1 else select(keys)
+
+        with patch.object(self.cache, '_select', missed_once):
+            ids = self.cache.resolve([('IN_PROGRESS', '')])
+
+        self.assertEqual(ids, {('IN_PROGRESS', ''): other.id})
+        self.assertEqual(Tag.objects.count(), 1)
+
+    def test_tag_change_invalidates(self):
+        """Test saving a tag drops the interned ids."""
+        tag = Tag.objects.create(claim_status='IN_PROGRESS')
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_cache.resolve([('IN_PROGRESS', '')])
+
+        tag.description = 'Reviewed'
+        tag.save()
+
+        ids = tag_cache.resolve([('IN_PROGRESS', '')])
+        self.assertNotEqual(ids[('IN_PROGRESS', '')], tag.id)
+
+    def test_duplicate_tags_are_rejected(self):
+        """Test the database keeps one tag per status and description."""
+        Tag.objects.create(claim_status='RAISED', description='New')
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Tag.objects.create(claim_status='RAISED', description='New')
+
+
+class ClaimTagApiTests(TestCase):
+    """Test claims are created with interned tags."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        tag_cache.invalidate()
+
+    def test_create_claim_links_tags(self):
+        """Test creating a claim links its tags in order."""
+        policy = create_policy(self.user)
+        existing = Tag.objects.create(claim_status='IN_PROGRESS')
+        payload = {
+            'policy': policy.id,
+            'claimedAmt': '100.00',
+            'tags': [
+                {'claim_status': 'IN_PROGRESS'},
+                {'claim_status': 'ACCEPTED', 'description': 'Paid'},
+            ],
+        }
+
+        res = self.client.post(CLAIM_CREATE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        claim = Claim.objects.get(pk=res.data['id'])
+        self.assertEqual(claim.status, 'ACCEPTED')
+        tag_ids = list(
+            Claim.tags.through.objects.filter(claim=claim)
+            .order_by('id').values_list('tag_id', flat=True))
+        self.assertEqual(len(tag_ids), 2)
+        self.assertEqual(tag_ids[0], existing.id)
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_edit_tag_into_duplicate(self):
+        """Test a tag cannot be edited into another existing tag."""
+        Tag.objects.create(claim_status='ACCEPTED')
+        tag = Tag.objects.create(claim_status='IN_PROGRESS')
+        create_claim(self.user, create_policy(self.user), tags=[tag])
+
+        res = self.client.patch(
+            tag_detail_url(tag.id), {'claim_status': 'ACCEPTED'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.claim_status, 'IN_PROGRESS')
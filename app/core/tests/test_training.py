@@ -0,0 +1,108 @@
+"""
+Tests for training the claim amount model.
+"""
+import os
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import joblib
+import numpy as np
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core import training
+from core.models import Claim
+from core.prediction import featurize
+from core.tests.helpers import create_policy, create_user
+
+
+class FeaturizeSparseTests(TestCase):
+    """Test the sparse training features."""
+
+    def test_matches_dense_features(self):
+        """Test the sparse matrix holds the prediction features."""
+        rows = [
+            ('HEALTH', Decimal('100.00'), Decimal('1000.00'),
+             date(2024, 1, 1), date(2024, 1, 31)),
+            ('UNKNOWN', Decimal('50.00'), Decimal('500.00'),
+             date(2024, 1, 1), date(2024, 1, 2)),
+        ]
+
+        features = training.featurize_sparse(rows)
+
+        self.assertEqual(features.format, 'csc')
+        np.testing.assert_array_equal(features.toarray(), featurize(rows))
+        self.assertEqual(features.nnz, 7)
+
+
+class TrainClaimModelCommandTests(TestCase):
+    """Test the train_claim_model command."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = os.path.join(self.directory, 'model.joblib')
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        user = create_user()
+        for index in range(6):
+            Claim.objects.create(
+                user=user,
+                policy=create_policy(
+                    user, premiumAmt=Decimal(100 + index)),
+                claimedAmt=Decimal(10 + index),
+            )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def train(self, *args):
+        """Run the command and return its output."""
+        out = StringIO()
+        call_command(
+            'train_claim_model', '--output', self.output,
+            '--cache-dir', self.cache_dir, '--chunk-size', '4',
+            '--n-estimators', '3', '--n-jobs', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_trains_and_saves_model(self):
+        """Test the model is trained in chunks and saved."""
+        out = self.train()
+
+        self.assertIn('Loaded 6 claims in 2 chunks, 0 from the cache', out)
+        self.assertIn('peak RSS', out)
+        model = joblib.load(self.output)
+        self.assertEqual(model.predict(np.zeros((1, 8))).shape, (1,))
+
+    def test_reuses_cached_chunks(self):
+        """Test unchanged chunks are read from the cache."""
+        self.train()
+
+        claim = Claim.objects.order_by('-id').first()
+        claim.claimedAmt = Decimal('99.00')
+        claim.save()
+        out = self.train()
+
+        self.assertIn('2 chunks, 1 from the cache', out)
+
+    def test_cached_chunk_round_trip(self):
+        """Test a cached chunk reads back what was featurized."""
+        start, end, fingerprint = training.chunk_ranges(4)[0]
+        features, target, hit = training.cached_chunk(
+            self.cache_dir, start, end, fingerprint)
+        cached, cached_target, cached_hit = training.cached_chunk(
+            self.cache_dir, start, end, fingerprint)
+
+        self.assertEqual((hit, cached_hit), (False, True))
+        self.assertEqual((cached != features).nnz, 0)
+        np.testing.assert_array_equal(cached_target, target)
+
+    def test_needs_claims(self):
+        """Test training without data fails clearly."""
+        Claim.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            self.train('--no-cache')
@@ -0,0 +1,93 @@
+"""
+Tests for the startup warmup and import profiling.
+"""
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from core import importtime, warmup
+
+
+IMPORTTIME_OUTPUT = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _json
+import time:       800 |        920 |   json.decoder
+import time:       300 |       1220 | json
+import time:        50 |         50 | colorsys
+'''
+
+
+class WarmupTests(TestCase):
+    """Test the warmup steps run before and after forking."""
+
+    def test_process_warmup(self):
+        """Test imports and routes are warmed up."""
+        timings = warmup.warmup_process()
+
+        self.assertEqual(set(timings), {'imports', 'routes'})
+        for count, elapsed in timings.values():
+            self.assertGreater(count, 0)
+            self.assertGreaterEqual(elapsed, 0)
+
+    def test_worker_warmup(self):
+        """Test the database is connected and caches primed."""
+        timings = warmup.warmup_worker()
+
+        self.assertEqual(timings['database'][0], 1)
+        self.assertGreater(timings['caches'][0], 0)
+
+    def test_failing_step_skipped(self):
+        """Test a failing step is logged without stopping the others."""
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertLogs('core.warmup', 'ERROR'):
+            timings = warmup._run([('fail', fail), ('ok', lambda: 1)])
+
+        self.assertEqual(list(timings), ['ok'])
+
+    def test_worker_warmup_after_uwsgi_fork(self):
+        """Test under uWSGI the worker warmup runs after each fork."""
+        uwsgi = SimpleNamespace()
+        with patch.dict(sys.modules, {'uwsgi': uwsgi}):
+            warmup.setup_warmup()
+
+        self.assertIs(uwsgi.post_fork_hook, warmup.warmup_worker)
+
+    @override_settings(WARMUP_ENABLED=False)
+    def test_disabled(self):
+        """Test nothing runs when the warmup is disabled."""
+        uwsgi = SimpleNamespace()
+        with patch.dict(sys.modules, {'uwsgi': uwsgi}), \
+                patch.object(warmup, 'warmup_process') as process:
+            warmup.setup_warmup()
+
+        process.assert_not_called()
+        self.assertFalse(hasattr(uwsgi, 'post_fork_hook'))
+
+
+class ImportTimeTests(TestCase):
+    """Test parsing and running -X importtime profiles."""
+
+    def test_parse(self):
+        """Test modules, depths and times are read from the output."""
+        imports = importtime.parse(IMPORTTIME_OUTPUT)
+
+        self.assertEqual(
+            [(entry['module'], entry['depth']) for entry in imports],
+            [('_json', 2), ('json.decoder', 1), ('json', 0),
+             ('colorsys', 0)],
+        )
+        self.assertEqual(imports[2]['cumulative_us'], 1220)
+        self.assertEqual(
+            importtime.by_package(imports),
+            [('json', 1100), ('_json', 120), ('colorsys', 50)],
+        )
+
+    def test_profile(self):
+        """Test a module is profiled in a fresh interpreter."""
+        imports = importtime.profile('colorsys')
+
+        self.assertIn('colorsys', [entry['module'] for entry in imports])
@@ -0,0 +1,132 @@
+"""
+Chunked training of the claim amount model from the database.
+"""
+import hashlib
+import os
+
+import numpy as np
+from scipy import sparse
+from django.db.models import Count, Max, Min
+
+from core.models import Claim
+from core.prediction import FEATURE_NAMES, SOURCE_FIELDS, TITLE_INDEX, TITLES
+
+
+def featurize_sparse(rows):
+    """Return the sparse feature matrix of rows of SOURCE_FIELDS values.
+
+    The columns are those of prediction.featurize, but only the one
+    title column set per row is stored instead of every title column.
+    """
+    if not rows:
+        return sparse.csc_matrix((0, len(FEATURE_NAMES)))
+    titles, premiums, sums_assured, starts, ends = zip(*rows)
+    count = len(rows)
+    offset = len(TITLES)
+
+    codes = np.array([TITLE_INDEX.get(title, -1) for title in titles])
+    known = np.flatnonzero(codes >= 0)
+    term = (np.array(ends, dtype='datetime64[D]')
+            - np.array(starts, dtype='datetime64[D]')).astype(np.float64)
+    numeric_rows = np.arange(count)
+
+    matrix = sparse.coo_matrix(
+        (
+            np.concatenate([
+                np.ones(len(known)),
+                np.array(premiums, dtype=np.float64),
+                np.array(sums_assured, dtype=np.float64),
+                term,
+            ]),
+            (
+                np.concatenate([known] + [numeric_rows] * 3),
+                np.concatenate([
+                    codes[known],
+                    np.full(count, offset),
+                    np.full(count, offset + 1),
+                    np.full(count, offset + 2),
+                ]),
+            ),
+        ),
+        shape=(count, len(FEATURE_NAMES)),
+    )
+    return matrix.tocsc()
+
+
+def chunk_ranges(chunk_size):
+    """Return [start, end) claim id ranges with their fingerprint.
+
+    The fingerprint changes when a claim or its policy in the range is
+    added, changed or deleted, and names the cached chunk files.
+    """
+    bounds = Claim.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    ranges = []
+    for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+        end = start + chunk_size
+        state = Claim.objects.filter(id__gte=start, id__lt=end).aggregate(
+            count=Count('id'),
+            claim_updated=Max('updated_at'),
+            policy_updated=Max('policy__updated_at'),
+        )
+        fingerprint = hashlib.sha1(
+            repr(sorted(state.items())).encode()).hexdigest()[:16]
+        ranges.append((start, end, fingerprint))
+    return ranges
+
+
+def load_chunk(start, end):
+    """Return (features, target) of the claims with ids in [start, end)."""
+    rows = list(Claim.objects.filter(
+        id__gte=start, id__lt=end).order_by('id').values_list(
+            *SOURCE_FIELDS, 'claimedAmt'))
+    features = featurize_sparse([row[:-1] for row in rows])
+    target = np.array([row[-1] for row in rows], dtype=np.float64)
+    return features, target
+
+
+def _chunk_paths(cache_dir, start, fingerprint):
+    """Return the feature and target file paths of a cached chunk."""
+    stem = os.path.join(cache_dir, f'claims_{start}_{fingerprint}')
+    return f'{stem}.features.npz', f'{stem}.target.npy'
+
+
+def cached_chunk(cache_dir, start, end, fingerprint):
+    """Return (features, target, hit) of a chunk, reading the disk cache.
+
+    Features are stored column-compressed (CSC), so the file is laid out
+    column by column.
+    """
+    features_path, target_path = _chunk_paths(cache_dir, start, fingerprint)
+    if os.path.exists(features_path) and os.path.exists(target_path):
+        return sparse.load_npz(features_path), np.load(target_path), True
+
+    features, target = load_chunk(start, end)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write the target last, it marks the chunk as complete.
+    sparse.save_npz(features_path, features)
+    np.save(target_path, target)
+    return features, target, False
+
+
+def training_data(chunk_size, cache_dir=None):
+    """Return (features, target, stats) of every claim, chunk by chunk."""
+    features = []
+    targets = []
+    stats = {'chunks': 0, 'cached': 0}
+    for start, end, fingerprint in chunk_ranges(chunk_size):
+        if cache_dir:
+            chunk, target, hit = cached_chunk(
+                cache_dir, start, end, fingerprint)
+            stats['cached'] += hit
+        else:
+            chunk, target = load_chunk(start, end)
+        features.append(chunk)
+        targets.append(target)
+        stats['chunks'] += 1
+
+    if not features:
+        return sparse.csc_matrix((0, len(FEATURE_NAMES))), np.empty(0), stats
+    features = sparse.vstack(features, format='csc')
+    return features, np.concatenate(targets), stats
@@ -0,0 +1,47 @@
+"""
+Upload handlers that hash file contents while they are received.
+"""
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class HashingMixin:
+    """Compute the SHA-256 of an upload chunk by chunk.
+
+    The digest is set as ``content_hash`` on the uploaded file, so the
+    storage can name it without reading the file again.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def _hashing(self):
+        return True
+
+    def receive_data_chunk(self, raw_data, start):
+        if self._hashing():
+            self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.content_hash = self.hasher.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(HashingMixin, MemoryFileUploadHandler):
+    """Keep small uploads in memory and hash them."""
+
+    def _hashing(self):
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingMixin,
+                                        TemporaryFileUploadHandler):
+    """Stream large uploads to a temporary file and hash them."""
@@ -0,0 +1,125 @@
+"""
+Warm server processes up before they accept traffic.
+"""
+import importlib
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+
+logger = logging.getLogger(__name__)
+
+# Modules of each installed app imported ahead of the first request.
+APP_MODULES = ('urls', 'views', 'serializers')
+
+
+def iter_patterns(patterns):
+    """Yield every URL pattern below patterns, depth first."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_patterns(pattern.url_patterns)
+        else:
+            yield pattern
+
+
+def import_app_modules():
+    """Import the views, serializers and URLs of every installed app."""
+    imported = 0
+    for app_config in apps.get_app_configs():
+        for name in APP_MODULES:
+            module = f'{app_config.name}.{name}'
+            try:
+                importlib.import_module(module)
+            except ModuleNotFoundError as error:
+                if error.name != module:
+                    raise
+                continue
+            imported += 1
+    return imported
+
+
+def resolve_routes():
+    """Build the URL resolvers and compile every route's regex."""
+    resolver = get_resolver()
+    # Populates the reverse lookups of the resolver and its includes.
+    resolver.reverse_dict
+    patterns = list(iter_patterns(resolver.url_patterns))
+    for pattern in patterns:
+        pattern.pattern.regex
+    return len(patterns)
+
+
+def open_connections():
+    """Connect to every configured database."""
+    for alias in connections:
+        connections[alias].ensure_connection()
+    return len(connections.all())
+
+
+def prime_caches():
+    """Load the content types of every model into their cache."""
+    return len(ContentType.objects.get_for_models(*apps.get_models()))
+
+
+# Steps safe to run before uWSGI forks, and steps each worker runs after.
+# Serializer fields are not built ahead: DRF builds them per serializer
+# instance, so nothing built here would be reused by requests.
+PROCESS_STEPS = [
+    ('imports', import_app_modules),
+    ('routes', resolve_routes),
+]
+WORKER_STEPS = [
+    ('database', open_connections),
+    ('caches', prime_caches),
+]
+
+
+def _run(steps):
+    """Run warmup steps and return their (count, milliseconds) by name.
+
+    A failing step is logged and skipped, the first requests then pay for
+    it as they would without a warmup.
+    """
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            logger.exception('Warmup step %s failed.', name)
+            continue
+        elapsed = (time.perf_counter() - started) * 1000
+        timings[name] = (count, elapsed)
+        logger.info('Warmup %s: %s in %.1f ms.', name, count, elapsed)
+    return timings
+
+
+def warmup_process():
+    """Warm up the parts shared by forked workers, without the database."""
+    return _run(PROCESS_STEPS)
+
+
+def warmup_worker():
+    """Warm up a forked worker's own database connections and caches."""
+    return _run(WORKER_STEPS)
+
+
+def setup_warmup():
+    """Warm up now and run the worker warmup after each uWSGI fork.
+
+    Connections must not be shared between forked processes, so outside
+    uWSGI only the process warmup runs.
+    """
+    if not settings.WARMUP_ENABLED:
+        return
+    warmup_process()
+    try:
+        import uwsgi
+    except ImportError:
+        return
+    uwsgi.post_fork_hook = warmup_worker
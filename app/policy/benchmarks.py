@@ -0,0 +1,309 @@
+"""
+Benchmark scenarios and seed data of the policy and user routes.
+"""
+import itertools
+import random
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import Scenario
+from core.models import Claim, Policy, Tag
+from core.prediction import ModelUnavailable, claim_predictor
+from policy import urls as policy_urls
+from policy.bulk import write_items
+from policy.fieldsets import shape_serializer
+from policy.serializers import PolicyDetailSerializer
+from user import urls as user_urls
+
+
+BENCHMARK_EMAIL = 'benchmark@example.com'
+BENCHMARK_PASSWORD = 'benchmark-pass'
+
+# Routes not exercised, with the reason.
+SKIPPED_ROUTES = {
+    'policy:api-root': 'DRF browsable API index.',
+    'policy:policy-upload-image': 'Policies have no image field.',
+    'policy:claim-upload-image': 'Writes media files, processed in the '
+                                 'background pool.',
+    'policy:tag-upload-image': 'Inherited claim action, not a tag route.',
+    'policy:tag-create-claim': 'Inherited claim action, not a tag route.',
+}
+
+# List scenarios measure computing the response unless named cached.
+UNCACHED = {'RESPONSE_CACHE_ENABLED': False}
+
+
+class BenchmarkContext:
+    """Seeded data the scenarios build their requests from."""
+
+    def __init__(self, user, token, policy_ids, claim_ids, tag_ids):
+        self.user = user
+        self.token = token
+        self.policy_ids = policy_ids
+        self.claim_ids = claim_ids
+        self.tag_ids = tag_ids
+        self.counter = itertools.count()
+
+    def new_policy(self):
+        """Create a policy of the benchmark user and return its id."""
+        return Policy.objects.create(user=self.user, **policy_fields(
+            random.Random(next(self.counter)))).id
+
+    def new_claim(self):
+        """Create a claim on a new policy and return its id."""
+        policy = Policy.objects.get(pk=self.new_policy())
+        return Claim.objects.create(
+            user=self.user, policy=policy, claimedAmt=Decimal('10.00')).id
+
+
+def policy_fields(rng):
+    """Return the fields of a realistic policy."""
+    start = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+    sum_assured = Decimal(rng.randrange(1000, 100000))
+    return {
+        'title': rng.choice(['VEHICLE', 'EMPLOYMENT', 'HEALTH', 'TRAVEL']),
+        'description': 'Benchmark policy',
+        'startDate': start,
+        'endDate': start + timedelta(days=rng.choice([180, 365, 730])),
+        'premiumAmt': Decimal(rng.randrange(50, 5000)),
+        'sumAssured': sum_assured,
+        'claimedAmt': Decimal('0.00'),
+    }
+
+
+def _json(fields):
+    """Return policy fields as a JSON request payload."""
+    return {key: str(value) for key, value in fields.items()}
+
+
+def _request(route, args=(), data=None, **extra):
+    """Return the keyword arguments of a request to a route."""
+    request = {'path': reverse(route, args=args), 'format': 'json'}
+    if data is not None:
+        request['data'] = data
+    request.update(extra)
+    return request
+
+
+def _linked_tag(ctx):
+    """Return a new tag attached to one of the user's claims."""
+    tag, _ = Tag.objects.get_or_create(description='Disposable')
+    Claim.objects.get(pk=ctx.claim_ids[0]).tags.add(tag)
+    return tag.id
+
+
+def _without_model(ctx):
+    """Return why predictions cannot be benchmarked, if they cannot."""
+    try:
+        claim_predictor.load()
+    except ModelUnavailable:
+        return 'No trained claim model, run train_claim_model first.'
+    return None
+
+
+SCENARIOS = [
+    Scenario('policy-list', 'get', 'policy:policy-list',
+             lambda ctx: _request('policy:policy-list'),
+             overrides=UNCACHED),
+    Scenario('policy-list-cached', 'get', 'policy:policy-list',
+             lambda ctx: _request('policy:policy-list')),
+    Scenario('policy-list-sparse', 'get', 'policy:policy-list',
+             lambda ctx: _request('policy:policy-list', data={
+                 'fields': 'id,startDate,endDate'}),
+             overrides=UNCACHED),
+    Scenario('policy-list-expanded', 'get', 'policy:policy-list',
+             lambda ctx: _request('policy:policy-list', data={
+                 'expand': 'claims.tags'}),
+             overrides=UNCACHED),
+    Scenario('policy-list-filtered', 'get', 'policy:policy-list',
+             lambda ctx: _request('policy:policy-list', data={
+                 'tags': ','.join(map(str, ctx.tag_ids[:3]))}),
+             overrides=UNCACHED),
+    Scenario('policy-create', 'post', 'policy:policy-list',
+             lambda ctx: _request('policy:policy-list', data={
+                 **_json(policy_fields(random.Random(next(ctx.counter)))),
+                 'user': ctx.user.id,
+             })),
+    Scenario('policy-detail', 'get', 'policy:policy-detail',
+             lambda ctx: _request(
+                 'policy:policy-detail', args=[ctx.policy_ids[0]])),
+    Scenario('policy-update', 'patch', 'policy:policy-detail',
+             lambda ctx: _request(
+                 'policy:policy-detail', args=[ctx.policy_ids[0]],
+                 data={'description': f'Updated {next(ctx.counter)}'})),
+    Scenario('policy-delete', 'delete', 'policy:policy-detail',
+             lambda ctx: _request(
+                 'policy:policy-detail', args=[ctx.new_policy()])),
+    Scenario('policy-export', 'get', 'policy:policy-export',
+             lambda ctx: _request('policy:policy-export')),
+    Scenario('policy-bulk', 'post', 'policy:policy-bulk',
+             lambda ctx: _request('policy:policy-bulk', data=[
+                 _json(policy_fields(random.Random(next(ctx.counter))))
+                 for _ in range(20)
+             ])),
+    Scenario('policy-summary', 'get', 'policy:policy-summary',
+             lambda ctx: _request('policy:policy-summary')),
+    Scenario('claim-list', 'get', 'policy:claim-list',
+             lambda ctx: _request('policy:claim-list'),
+             overrides=UNCACHED),
+    Scenario('claim-update', 'patch', 'policy:claim-detail',
+             lambda ctx: _request(
+                 'policy:claim-detail', args=[ctx.claim_ids[0]],
+                 data={'claimedAmt': f'{next(ctx.counter) % 100}.00'})),
+    Scenario('claim-delete', 'delete', 'policy:claim-detail',
+             lambda ctx: _request(
+                 'policy:claim-detail', args=[ctx.new_claim()])),
+    Scenario('claim-create', 'post', 'policy:claim-create-claim',
+             lambda ctx: _request('policy:claim-create-claim', data={
+                 'policy': ctx.new_policy(), 'claimedAmt': '25.00'})),
+    Scenario('claim-export', 'get', 'policy:claim-export',
+             lambda ctx: _request('policy:claim-export')),
+    Scenario('claim-predict', 'get', 'policy:claim-predict',
+             lambda ctx: _request('policy:claim-predict'),
+             skip=_without_model),
+    Scenario('tag-list', 'get', 'policy:tag-list',
+             lambda ctx: _request('policy:tag-list'),
+             overrides=UNCACHED),
+    Scenario('tag-update', 'patch', 'policy:tag-detail',
+             lambda ctx: _request(
+                 'policy:tag-detail', args=[ctx.tag_ids[0]],
+                 data={'description': 'Benchmark tag'})),
+    Scenario('tag-delete', 'delete', 'policy:tag-detail',
+             lambda ctx: _request(
+                 'policy:tag-detail', args=[_linked_tag(ctx)])),
+    Scenario('tag-export', 'get', 'policy:tag-export',
+             lambda ctx: _request('policy:tag-export')),
+    Scenario('user-create', 'post', 'user:create_user',
+             lambda ctx: _request('user:create_user', data={
+                 'email': f'new{next(ctx.counter)}@example.com',
+                 'password': BENCHMARK_PASSWORD,
+                 'name': 'New user',
+             })),
+    Scenario('user-token', 'post', 'user:token',
+             lambda ctx: _request('user:token', data={
+                 'email': BENCHMARK_EMAIL, 'password': BENCHMARK_PASSWORD})),
+    Scenario('user-me', 'get', 'user:me',
+             lambda ctx: _request('user:me')),
+    Scenario('user-me-update', 'patch', 'user:me',
+             lambda ctx: _request('user:me', data={'name': 'Benchmark'})),
+]
+
+
+def route_names():
+    """Return the names of every route in the policy and user URLs."""
+    names = set()
+    for module in (policy_urls, user_urls):
+        patterns = module.urlpatterns
+        if module is policy_urls:
+            patterns = module.router.urls
+        names.update(
+            f'{module.app_name}:{pattern.name}'
+            for pattern in patterns if pattern.name
+        )
+    return names
+
+
+def uncovered_routes(scenarios=SCENARIOS):
+    """Return the routes neither benchmarked nor deliberately skipped."""
+    covered = {scenario.route for scenario in scenarios}
+    return sorted(route_names() - covered - set(SKIPPED_ROUTES))
+
+
+def seed(users=20, policies_per_user=500, claim_ratio=0.5, tags=10,
+         random_seed=0):
+    """Create benchmark data and return the context of its main user.
+
+    Data left by an earlier run, in a kept database, is reused as is.
+    """
+    User = get_user_model()
+    user = User.objects.filter(email=BENCHMARK_EMAIL).first()
+    if user is None:
+        user = _create_data(
+            users, policies_per_user, claim_ratio, tags, random_seed)
+
+    policy_ids = list(Policy.objects.filter(
+        user=user).order_by('-id').values_list('id', flat=True))
+    claim_ids = list(Claim.objects.filter(
+        user=user).order_by('-id').values_list('id', flat=True))
+    tag_ids = list(Tag.objects.filter(
+        claim__user=user).distinct().values_list('id', flat=True))
+    token, _ = Token.objects.get_or_create(user=user)
+    return BenchmarkContext(user, token, policy_ids, claim_ids, tag_ids)
+
+
+def _create_data(users, policies_per_user, claim_ratio, tags, random_seed):
+    """Create the benchmark users and their data, return the main user."""
+    rng = random.Random(random_seed)
+    password = make_password(BENCHMARK_PASSWORD)
+    User = get_user_model()
+    accounts = User.objects.bulk_create([
+        User(email=BENCHMARK_EMAIL, name='Benchmark', password=password)
+    ] + [
+        User(email=f'user{index}@example.com', password=password)
+        for index in range(1, users)
+    ])
+    if connection.features.can_return_rows_from_bulk_insert:
+        user = accounts[0]
+    else:
+        user = User.objects.get(email=BENCHMARK_EMAIL)
+        accounts = list(User.objects.order_by('id'))
+
+    statuses = [status for status, _ in Tag.CLAIM_STATUS_CHOICES]
+    tag_keys = [
+        {'claim_status': statuses[index % len(statuses)],
+         'description': f'Tag {index}'}
+        for index in range(tags)
+    ]
+    for account in accounts:
+        items = []
+        for _ in range(policies_per_user):
+            item = policy_fields(rng)
+            item['claims'] = []
+            if rng.random() < claim_ratio:
+                item['claims'].append({
+                    'claimedAmt': Decimal(rng.randrange(0, 1000)),
+                    'description': 'Benchmark claim',
+                    'tags': rng.sample(tag_keys, k=min(2, len(tag_keys))),
+                })
+            items.append(item)
+        write_items(account, items)
+    return user
+
+
+def json_payloads(policies=10000, seed=0):
+    """Return policy list payloads without touching the database.
+
+    serialized is what the list endpoint renders, with decimals and UUIDs
+    already turned into strings. values holds the raw Decimal, UUID and
+    date objects of the same rows.
+    """
+    rng = random.Random(seed)
+    rows = [
+        Policy(
+            id=index,
+            user_id=1,
+            policy_id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            **policy_fields(rng),
+        )
+        for index in range(1, policies + 1)
+    ]
+    serializer = PolicyDetailSerializer(rows, many=True)
+    shape_serializer(
+        serializer, set(serializer.child.fields) - {'claims'})
+    fields = [
+        'id', 'user_id', 'title', 'policy_id', 'description', 'startDate',
+        'endDate', 'premiumAmt', 'sumAssured', 'claimedAmt',
+    ]
+    return {
+        'serialized': serializer.data,
+        'values': [
+            {field: getattr(row, field) for field in fields} for row in rows
+        ],
+    }
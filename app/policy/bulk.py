@@ -0,0 +1,107 @@
+"""
+Bulk creation of policies with nested claims and tags.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from core import summary
+from core.claim_status import status_for_tags
+from core.models import Policy, Claim
+from core.response_cache import response_cache
+from core.tags import link_claim_tags, tag_cache, tag_key
+from policy.serializers import BulkPolicySerializer
+
+
+def validate_items(items):
+    """Validate every item and return (validated, errors)."""
+    validated = []
+    errors = []
+    for index, item in enumerate(items):
+        serializer = BulkPolicySerializer(data=item)
+        if serializer.is_valid():
+            validated.append(serializer.validated_data)
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    return validated, errors
+
+
+def write_items(user, validated):
+    """Insert validated policies, claims and tag links in bulk."""
+    batch_size = settings.BULK_BATCH_SIZE
+    policies = []
+    claims_data = []
+    for data in validated:
+        data = dict(data)
+        claims_data.append(data.pop('claims', []))
+        policies.append(Policy(user=user, **data))
+
+    tag_keys = {
+        tag_key(tag_data)
+        for claims in claims_data
+        for claim_data in claims
+        for tag_data in claim_data.get('tags', [])
+    }
+
+    with transaction.atomic():
+        tag_ids = tag_cache.resolve(tag_keys)
+        Policy.objects.bulk_create(policies, batch_size=batch_size)
+
+        claims = []
+        claim_tags = []
+        for policy, policy_claims in zip(policies, claims_data):
+            for claim_data in policy_claims:
+                claim_data = dict(claim_data)
+                tags_data = claim_data.pop('tags', [])
+                # Linked in this order, so the last tag sets the status.
+                keys = list(dict.fromkeys(
+                    tag_key(tag_data) for tag_data in tags_data))
+                claims.append(Claim(
+                    user=user,
+                    policy=policy,
+                    claim_id=f'{policy.policy_id}',
+                    status=status_for_tags(keys),
+                    **claim_data,
+                ))
+                claim_tags.append([tag_ids[key] for key in keys])
+        Claim.objects.bulk_create(claims, batch_size=batch_size)
+
+        link_claim_tags(zip(claims, claim_tags), batch_size=batch_size)
+
+        # bulk_create skips the post_save handlers keeping the summary.
+        summary.apply(summary.merge(
+            *(summary.policy_contribution(policy) for policy in policies),
+            *(summary.claim_contribution(claim, user.id, claim.policy.title)
+              for claim in claims),
+        ))
+        response_cache.invalidate(user.id)
+
+    return policies, claims
+
+
+def bulk_create_policies(user, items):
+    """Validate and create items, returning (created, report).
+
+    Nothing is written unless every item is valid. The report lists the
+    errors per item index and the write throughput in rows per second.
+    """
+    start = time.perf_counter()
+    validated, errors = validate_items(items)
+    report = {'received': len(items), 'created': 0, 'errors': errors}
+    if errors:
+        return False, report
+
+    policies, claims = write_items(user, validated)
+    elapsed = time.perf_counter() - start
+    rows = len(policies) + len(claims)
+    report.update({
+        'created': len(policies),
+        'claims_created': len(claims),
+        'ids': [policy.id for policy in policies],
+        'elapsed_ms': round(elapsed * 1000, 2),
+        'rows_per_sec': round(rows / elapsed, 1) if elapsed else None,
+    })
+
+    return True, report
@@ -0,0 +1,73 @@
+"""
+Response caching for the list actions of the policy viewsets.
+"""
+import random
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.replicas import current_read_alias
+from core.response_cache import (
+    RESPONSE_CACHE_HITS,
+    RESPONSE_CACHE_MISSES,
+    RESPONSE_CACHE_STALE,
+    response_cache,
+)
+
+
+class CachedListMixin:
+    """Serve list responses from the per-user response cache.
+
+    Entries are keyed on the user, the view and the normalized query
+    parameters, and are invalidated by the core signal handlers. Only
+    responses read from the primary are stored: a lagging replica may
+    still return data from before the last invalidation, which would then
+    be served for the whole TTL.
+    """
+    # Comma separated lists whose order does not matter.
+    cache_id_params = ['tags', 'claims', 'fields', 'expand']
+
+    def get_cache_params(self, request):
+        """Return the query parameters in a canonical form."""
+        params = []
+        for name in sorted(request.query_params):
+            values = request.query_params.getlist(name)
+            if name in self.cache_id_params:
+                values = [
+                    ','.join(sorted(set(value.split(','))))
+                    for value in values
+                ]
+            params.append((name, tuple(values)))
+
+        # Pagination links are absolute URLs.
+        return (request.scheme, request.get_host(), request.path,
+                tuple(params))
+
+    def list(self, request, *args, **kwargs):
+        """List from the response cache when possible."""
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+
+        key = response_cache.key(
+            request.user, self.basename, self.get_cache_params(request))
+        data = response_cache.get(key)
+        if data is not None:
+            RESPONSE_CACHE_HITS.labels(view=self.basename).inc()
+            if random.random() >= settings.RESPONSE_CACHE_VERIFY_RATE:
+                return Response(data)
+
+            # Compare a sample of hits with fresh data to measure how
+            # often stale responses are served.
+            response = super().list(request, *args, **kwargs)
+            if response.data != data and current_read_alias() is None:
+                RESPONSE_CACHE_STALE.labels(view=self.basename).inc()
+                response_cache.set(key, response.data)
+            return response
+
+        RESPONSE_CACHE_MISSES.labels(view=self.basename).inc()
+        response = super().list(request, *args, **kwargs)
+        if (response.status_code == status.HTTP_200_OK
+                and current_read_alias() is None):
+            response_cache.set(key, response.data)
+        return response
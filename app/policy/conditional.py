@@ -0,0 +1,124 @@
+"""
+Conditional GET support for the policy viewsets.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalMixin:
+    """Answer GET with 304 when the client copy is current.
+
+    The validators come from an aggregate over the queryset (row count
+    and latest ``updated_at``), so an unchanged resource is answered
+    without running the serializer. On requests read from a replica the
+    aggregate reads the same snapshot as the body, so the validators
+    describe what is served.
+    """
+    version_lookups = ['updated_at']
+
+    def get_version_aggregates(self):
+        """Return the aggregates identifying the current data."""
+        if not self.version_lookups:
+            return None
+        aggregates = {'count': Count('pk', distinct=True)}
+        for lookup in self.version_lookups:
+            aggregates[f'max_{lookup}'] = Max(lookup)
+            relation, _, _ = lookup.rpartition('__')
+            if relation:
+                # Deleting a related row changes no timestamp.
+                aggregates[f'count_{relation}'] = Count(
+                    f'{relation}__pk', distinct=True)
+        return aggregates
+
+    def _validators(self, request, versions):
+        """Return (etag, last_modified) for the aggregated versions."""
+        timestamps = [
+            value for key, value in versions.items()
+            if key.startswith('max_') and value is not None
+        ]
+        last_modified = max(timestamps) if timestamps else None
+
+        parts = [
+            self.basename,
+            self.action,
+            str(request.user.pk),
+            request.accepted_media_type or '',
+            request.GET.urlencode(),
+            *(f'{key}={value}' for key, value in sorted(versions.items())),
+        ]
+        digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        return quote_etag(digest), last_modified
+
+    def _not_modified(self, request, etag, last_modified):
+        """Return True if the request's validators match."""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in etags
+
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since and last_modified:
+            return int(last_modified.timestamp()) <= if_modified_since
+        return False
+
+    def _conditional(self, request, queryset, respond, require_rows=False):
+        """Return a 304 or the response of respond with validators set."""
+        aggregates = self.get_version_aggregates()
+        if aggregates is None:
+            return respond()
+        versions = queryset.order_by().aggregate(**aggregates)
+        if require_rows and not versions['count']:
+            return respond()
+
+        etag, last_modified = self._validators(request, versions)
+        if self._not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = respond()
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+
+class ConditionalListMixin(ConditionalMixin):
+    """Add validators and 304 responses to list."""
+
+    def list(self, request, *args, **kwargs):
+        """List with ETag and Last-Modified validators."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._conditional(
+            request, queryset,
+            lambda: super(ConditionalListMixin, self).list(
+                request, *args, **kwargs),
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalMixin):
+    """Add validators and 304 responses to retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve with ETag and Last-Modified validators."""
+        def respond():
+            return super(ConditionalRetrieveMixin, self).retrieve(
+                request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, ValidationError):
+            return respond()
+        return self._conditional(
+            request, queryset, respond, require_rows=True)
@@ -0,0 +1,65 @@
+"""
+Streaming export of policy data as NDJSON or CSV.
+"""
+import csv
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+
+class Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def _encode_ndjson(fields, rows):
+    """Encode rows as newline delimited JSON objects."""
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def _encode_csv(fields, rows):
+    """Encode rows as CSV with a header line."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', _encode_ndjson),
+    'csv': ('text/csv', _encode_csv),
+}
+
+
+def _buffered(lines, size):
+    """Join encoded lines into blocks of size lines."""
+    lines = iter(lines)
+    while True:
+        block = ''.join(islice(lines, size))
+        if not block:
+            return
+        yield block
+
+
+def stream_export(queryset, fields, export_format, filename, chunk_size):
+    """Return a streaming response with the queryset rows encoded.
+
+    Rows are read through a server-side cursor as tuples, so memory use
+    does not depend on the number of rows exported.
+    """
+    content_type, encode = EXPORT_FORMATS[export_format]
+    rows = queryset.prefetch_related(None).values_list(
+        *fields).iterator(chunk_size=chunk_size)
+    response = StreamingHttpResponse(
+        _buffered(encode(fields, rows), chunk_size),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{export_format}"')
+
+    return response
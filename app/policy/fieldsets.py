@@ -0,0 +1,109 @@
+"""
+Sparse fieldsets and opt-in expansion of nested serializers.
+"""
+from rest_framework import serializers
+
+
+def _param_set(request, name):
+    """Return the comma separated values of a query parameter, or None."""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+def _nested(field):
+    """Return the serializer rendering a field's items, or None."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def _expandable(serializer, prefix=''):
+    """Return the dotted paths of every nested serializer field."""
+    paths = set()
+    for name, field in serializer.fields.items():
+        nested = _nested(field)
+        if nested is not None:
+            path = f'{prefix}{name}'
+            paths.add(path)
+            paths |= _expandable(nested, f'{path}.')
+    return paths
+
+
+def _collapse(serializer, expand, prefix=''):
+    """Replace nested serializers not in expand with primary keys."""
+    for name, field in list(serializer.fields.items()):
+        nested = _nested(field)
+        if nested is None:
+            continue
+        path = f'{prefix}{name}'
+        if path in expand:
+            _collapse(nested, expand, f'{path}.')
+            continue
+        kwargs = {'many': nested is not field, 'read_only': True}
+        if field.source != name:
+            kwargs['source'] = field.source
+        serializer.fields[name] = serializers.PrimaryKeyRelatedField(
+            **kwargs)
+
+
+def shape_serializer(serializer, fields=None, expand=()):
+    """Keep the chosen top level fields and collapse unexpanded relations.
+
+    Nested relations render as primary keys unless their dotted path,
+    e.g. ``claims`` or ``claims.tags``, is in expand. Expanding a path
+    expands its parents. Unknown names raise a ValidationError.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    if fields is not None:
+        unknown = fields - set(serializer.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {'fields': f'Unknown fields: {", ".join(sorted(unknown))}.'})
+        for name in list(serializer.fields):
+            if name not in fields:
+                del serializer.fields[name]
+
+    expand = set(expand)
+    unknown = expand - _expandable(serializer)
+    if unknown:
+        raise serializers.ValidationError(
+            {'expand': f'Cannot expand: {", ".join(sorted(unknown))}.'})
+    for path in list(expand):
+        parts = path.split('.')
+        expand.update('.'.join(parts[:end]) for end in range(1, len(parts)))
+    _collapse(serializer, expand)
+
+
+class FieldsetMixin:
+    """Render only what the client asks for on reads.
+
+    ``?fields=`` picks the top level fields and ``?expand=`` the nested
+    relations to embed, other relations are rendered as ids. The planned
+    queryset loads only the columns and prefetches those fields need.
+    """
+    fieldset_actions = ['list', 'retrieve']
+
+    @property
+    def shapes_fields(self):
+        """Return True if the current action renders a fieldset."""
+        # The schema documents the expanded representation.
+        if getattr(self, 'swagger_fake_view', False):
+            return False
+        return self.action in self.fieldset_actions
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer shaped by the fields and expand params."""
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.shapes_fields:
+            shape_serializer(
+                serializer,
+                _param_set(self.request, 'fields'),
+                _param_set(self.request, 'expand') or (),
+            )
+        return serializer
@@ -0,0 +1,132 @@
+"""
+Django command to benchmark the API routes in-process.
+"""
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from core import benchmarks
+from policy.benchmarks import SCENARIOS, seed, uncovered_routes
+
+
+class Command(BaseCommand):
+    """Django command to measure route latency against a baseline."""
+
+    help = ('Seed a throwaway test database, request every policy and '
+            'user route in-process and record latency percentiles, '
+            'throughput, query counts and allocated memory as JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this path.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON results of an earlier run to compare against.',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.2,
+            help='Allowed relative growth of p95 latency and memory.',
+        )
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--policies-per-user', type=int, default=500)
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            help='Only run the named scenarios.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the benchmark database and its data between runs.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        for route in uncovered_routes():
+            self.stderr.write(f'No benchmark scenario for route {route}.')
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)['results']
+
+        try:
+            results, meta = self._run(options)
+        except benchmarks.BenchmarkError as error:
+            raise CommandError(str(error))
+        for name, result in results.items():
+            if 'skipped' in result:
+                self.stdout.write(f'{name:24} skipped: {result["skipped"]}')
+                continue
+            self.stdout.write(
+                f'{name:24} p50 {result["p50_ms"]:8.2f} ms  '
+                f'p95 {result["p95_ms"]:8.2f} ms  '
+                f'p99 {result["p99_ms"]:8.2f} ms  '
+                f'{result["throughput_rps"]:8.1f} req/s  '
+                f'{result["queries"]:3} queries  '
+                f'{result["peak_alloc_kb"]:9.1f} KiB')
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({'meta': meta, 'results': results}, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
+
+        if baseline is None:
+            return
+        regressions = benchmarks.compare(
+            results, baseline, options['threshold'])
+        for regression in regressions:
+            self.stderr.write(
+                f'{regression["scenario"]}: {regression["metric"]} '
+                f'{regression["baseline"]} -> {regression["current"]}')
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} measurements regressed past the '
+                'baseline.')
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def _run(self, options):
+        """Seed a test database and return (results, meta)."""
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            context = seed(
+                users=options['users'],
+                policies_per_user=options['policies_per_user'],
+            )
+            results = benchmarks.run(
+                context,
+                SCENARIOS,
+                iterations=options['iterations'],
+                only=options['only'],
+            )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        meta = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': options['iterations'],
+            'users': options['users'],
+            'policies_per_user': options['policies_per_user'],
+        }
+        return results, meta
@@ -0,0 +1,49 @@
+"""
+Django command to compare the JSON renderers and parsers.
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import benchmarks
+from policy.benchmarks import json_payloads
+
+
+class Command(BaseCommand):
+    """Django command to time rendering and parsing a policy list."""
+
+    help = ('Render and parse a policy list payload with the DRF JSON '
+            'renderer and parser and with their orjson counterparts, '
+            'check the output is identical and report the timings.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policies', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--output',
+            help='Write the results as JSON to this path.',
+        )
+
+    def handle(self, *args, **options):
+        """Entry Point for command."""
+        results = benchmarks.run_json(
+            json_payloads(options['policies']), options['repeat'])
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name}: {result["items"]} policies, '
+                f'{result["bytes"]} bytes')
+            drf = result['drf']
+            for codec in benchmarks.JSON_CODECS:
+                timing = result[codec]
+                line = (f'  {codec:6} render {timing["render_ms"]:9.3f} ms '
+                        f'({drf["render_ms"] / timing["render_ms"]:5.1f}x)  '
+                        f'parse {timing["parse_ms"]:9.3f} ms '
+                        f'({drf["parse_ms"] / timing["parse_ms"]:5.1f}x)')
+                if not timing['identical']:
+                    line += '  OUTPUT DIFFERS'
+                self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}.')
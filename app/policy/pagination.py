@@ -0,0 +1,17 @@
+"""
+Pagination classes for the policy APIs.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """Keyset pagination over the descending primary key.
+
+    The cursor holds the last id seen, so every page is an indexed range
+    scan instead of an OFFSET that grows with the page number.
+    """
+    ordering = '-id'
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
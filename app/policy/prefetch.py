@@ -0,0 +1,101 @@
+"""
+Prefetch planning for nested serializers.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _get_relation(model, source):
+    """Return the relation field named by source, or None."""
+    if '.' in source or source == '*':
+        return None
+    try:
+        field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def _columns(model, serializer):
+    """Return the model fields serializer reads, or None if unknown.
+
+    Reverse and many-to-many relations have no column and are left to
+    their prefetch.
+    """
+    columns = []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if '.' in field.source or field.source == '*':
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if not (model_field.many_to_many or model_field.one_to_many):
+            columns.append(model_field.name)
+    return columns
+
+
+def _collect(model, serializer, prefix='', only=False):
+    """Walk the serializer fields and collect related lookups."""
+    select_related = []
+    prefetch_related = []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        relation = _get_relation(model, field.source)
+        if relation is None:
+            continue
+
+        lookup = f'{prefix}{field.source}'
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            child = field
+        else:
+            child = None
+
+        if relation.many_to_one or relation.one_to_one:
+            # Primary key fields read the local column, no join needed.
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                continue
+            select_related.append(lookup)
+            if child is not None:
+                nested_select, nested_prefetch = _collect(
+                    relation.related_model, child, f'{lookup}__', only)
+                select_related.extend(nested_select)
+                prefetch_related.extend(nested_prefetch)
+        else:
+            queryset = relation.related_model._default_manager.all()
+            # Prefetched rows are matched to their parent by this column.
+            required = [relation.field.name] if relation.one_to_many else []
+            if child is not None:
+                queryset = plan_queryset(queryset, child, only, required)
+            elif only:
+                queryset = queryset.only(*required)
+            prefetch_related.append(Prefetch(lookup, queryset=queryset))
+
+    return select_related, prefetch_related
+
+
+def plan_queryset(queryset, serializer, only=False, required=()):
+    """Apply the related lookups needed to render serializer.
+
+    With only, columns serializer does not render are deferred, except
+    for the required ones.
+    """
+    select_related, prefetch_related = _collect(
+        queryset.model, serializer, only=only)
+    if only:
+        columns = _columns(queryset.model, serializer)
+        if columns is not None:
+            queryset = queryset.only(*columns, *required)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    return queryset
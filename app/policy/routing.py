@@ -0,0 +1,45 @@
+"""
+Read replica routing for the policy viewsets.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+from core.replicas import (
+    choose_read_alias,
+    current_read_alias,
+    iterate_routed,
+    pin_to_primary,
+    read_scope,
+    route_reads,
+)
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from a read replica.
+
+    A user's successful writes pin their following reads to the primary
+    for DB_REPLICA_PIN_SECONDS, so they read their own writes. Streaming
+    responses keep reading from the replica while they are iterated.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        """Handle the request in its own routing scope."""
+        with read_scope():
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        """Route the reads of an authenticated safe request."""
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            route_reads(choose_read_alias(request.user.pk))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Pin the user to the primary after a successful write."""
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            pin_to_primary(request.user.pk)
+        alias = current_read_alias()
+        if alias is not None and response.streaming:
+            response.streaming_content = iterate_routed(
+                response.streaming_content, alias)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,5 +1,8 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers, viewsets, permissions
-from core.models import Policy, Tag, Claim, Company
+from core.claim_status import status_for_tags
+from core.models import Policy, Tag, Claim, Company, PolicySummary
+from core.tags import link_claim_tags, tag_cache, tag_key
 
 class CompanySerializer(serializers.ModelSerializer):
     """Serializer for Company."""
@@ -17,30 +20,88 @@ class TagSerializer(serializers.ModelSerializer):
         model = Tag
         fields = '__all__'
         read_only_fields = ['id']
-        
+
+    def validate(self, attrs):
+        """Reject edits of a tag into another tag's status and description.
+
+        Nested tag payloads name existing tags, so only a tag edited on
+        its own is checked.
+        """
+        if self.root is self:
+            key = tag_key({**self._current(), **attrs})
+            duplicates = Tag.objects.filter(
+                claim_status=key[0], description=key[1])
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError(
+                    'A tag with this status and description exists.')
+        return attrs
+
+    def _current(self):
+        """Return the edited tag's current values, if any."""
+        if self.instance is None:
+            return {}
+        return {
+            'claim_status': self.instance.claim_status,
+            'description': self.instance.description,
+        }
 
 
 class ClaimSerializer(serializers.ModelSerializer):
     """Serializer for Claims."""
     tags = TagSerializer(many=True, required=False)
+    # The uploaded original keeps its EXIF data, only the copy is served.
+    image = serializers.ImageField(source='image_stripped', read_only=True)
 
     class Meta:
         model = Claim
         fields = '__all__'
         read_only_fields = [
             'id', 'user',
-            'claim_id', 'description', 'image']
+            'claim_id', 'description',
+            'status', 'status_changed_at']
 
     def create(self, validated_data):
         """Create a claim."""
         tags_data = validated_data.pop('tags', [])
-        claim = Claim.objects.create(**validated_data)
-        for tag_data in tags_data:
-            tag, _ = Tag.objects.get_or_create(**tag_data)
-            claim.tags.add(tag)
+        keys = list(dict.fromkeys(tag_key(tag_data) for tag_data in tags_data))
+        tag_ids = tag_cache.resolve(keys)
+        # Created in the status of its tags, so linking them needs none of
+        # the m2m_changed handlers.
+        claim = Claim.objects.create(
+            status=status_for_tags(keys), **validated_data)
+        link_claim_tags([(claim, [tag_ids[key] for key in keys])])
         return claim
 
 
+class ClaimImageSerializer(serializers.ModelSerializer):
+    """Serializer for uploading images to claims."""
+
+    class Meta:
+        model = Claim
+        fields = ['id', 'image', 'image_status', 'image_width',
+                  'image_height', 'thumbnail', 'image_webp',
+                  'image_stripped']
+        read_only_fields = ['id', 'image_status', 'image_width',
+                            'image_height', 'thumbnail', 'image_webp',
+                            'image_stripped']
+        extra_kwargs = {'image': {'required': True}}
+
+    def to_representation(self, instance):
+        """Serve the stripped copy as the image, empty until processed."""
+        data = super().to_representation(instance)
+        data['image'] = data['image_stripped']
+        return data
+
+
+class ClaimPredictionSerializer(serializers.Serializer):
+    """Serializer for predicted claim amounts."""
+    id = serializers.IntegerField()
+    predicted_amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2)
+
+
 class PolicySerializer(serializers.ModelSerializer):
     """Serializer for policies."""
     claims = ClaimSerializer(many=True, required=False)
@@ -54,19 +115,60 @@ class PolicySerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Create a policy."""
-        tags_data = validated_data.pop('tags', [])
         claims_data = validated_data.pop('claims', [])
         policy = Policy.objects.create(**validated_data)
-        for tag_data in tags_data:
-            tag, _ = Tag.objects.get_or_create(**tag_data)
-            policy.tags.add(tag)
         for claim_data in claims_data:
-            claim = Claim.objects.create(**claim_data, policy=policy)
-            policy.claims.add(claim)
+            self.fields['claims'].child.create(
+                {**claim_data, 'user': policy.user, 'policy': policy})
         return policy
 
 class PolicyDetailSerializer(PolicySerializer):
     """Serializer for policy detail view."""
 
     class Meta(PolicySerializer.Meta):
-        fields = PolicySerializer.Meta.fields + ['description']
\ No newline at end of file
+        fields = PolicySerializer.Meta.fields + ['description']
+
+
+class BulkClaimSerializer(serializers.ModelSerializer):
+    """Serializer for claims nested in a bulk policy upload."""
+    tags = TagSerializer(many=True, required=False)
+
+    class Meta:
+        model = Claim
+        fields = ['claimedAmt', 'description', 'tags']
+
+
+class BulkPolicySerializer(serializers.ModelSerializer):
+    """Serializer validating one policy of a bulk upload."""
+    claims = BulkClaimSerializer(many=True, required=False)
+
+    class Meta:
+        model = Policy
+        fields = ['title', 'description', 'startDate', 'endDate',
+                  'premiumAmt', 'sumAssured', 'claimedAmt', 'claims']
+
+    def validate(self, attrs):
+        """Apply the Policy.clean rules and the one claim per policy rule."""
+        fields = {k: v for k, v in attrs.items() if k != 'claims'}
+        try:
+            Policy(**fields).clean()
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict)
+
+        # Claim ids are derived from the policy id and must be unique.
+        if len(attrs.get('claims', [])) > 1:
+            raise serializers.ValidationError(
+                {'claims': 'A policy can have at most one claim.'})
+
+        return attrs
+
+
+class PolicySummarySerializer(serializers.ModelSerializer):
+    """Serializer for the policy portfolio summary."""
+
+    class Meta:
+        model = PolicySummary
+        fields = ['title', 'policy_count', 'premium_total',
+                  'sum_assured_total', 'claimed_total', 'claim_count',
+                  'claim_amount_total']
+        read_only_fields = fields
@@ -0,0 +1,90 @@
+"""
+Tests for the policy and user benchmark scenarios.
+"""
+from unittest.mock import patch
+
+from django.test import TestCase
+from prometheus_client import REGISTRY
+
+from core import benchmarks
+from core.prediction import ClaimPredictor
+from policy.benchmarks import (
+    SCENARIOS,
+    json_payloads,
+    seed,
+    uncovered_routes,
+)
+
+
+def cache_hits(view):
+    """Return the response cache hits of a view."""
+    return REGISTRY.get_sample_value(
+        'response_cache_hits_total', {'view': view}) or 0
+
+
+class BenchmarkScenarioTests(TestCase):
+    """Test the scenarios cover and measure the API routes."""
+
+    def test_every_route_covered(self):
+        """Test each policy and user route is benchmarked or skipped."""
+        self.assertEqual(uncovered_routes(), [])
+
+    def test_run_records_measurements(self):
+        """Test a scenario run records latency, queries and memory."""
+        context = seed(users=2, policies_per_user=5)
+        only = {'policy-list', 'policy-create', 'claim-export'}
+
+        results = benchmarks.run(context, SCENARIOS, iterations=3, only=only)
+
+        self.assertEqual(set(results), only)
+        self.assertEqual(results['policy-create']['status'], [201])
+        for result in results.values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['peak_alloc_kb'], 0)
+
+    def test_seed_reuses_kept_data(self):
+        """Test seeding a kept database reuses the data of the first run."""
+        first = seed(users=2, policies_per_user=3)
+
+        second = seed(users=2, policies_per_user=3)
+
+        self.assertEqual(second.user, first.user)
+        self.assertEqual(second.token, first.token)
+        self.assertEqual(second.policy_ids, first.policy_ids)
+        self.assertEqual(second.claim_ids, first.claim_ids)
+
+    def test_lists_bypass_response_cache(self):
+        """Test list scenarios compute every response unless cached."""
+        context = seed(users=1, policies_per_user=5)
+        before = cache_hits('policy')
+
+        benchmarks.run(
+            context, SCENARIOS, iterations=3, only={'policy-list'})
+        self.assertEqual(cache_hits('policy'), before)
+
+        benchmarks.run(
+            context, SCENARIOS, iterations=3, only={'policy-list-cached'})
+        self.assertGreater(cache_hits('policy'), before)
+
+    def test_predict_skipped_without_model(self):
+        """Test predictions are skipped rather than timing a 503."""
+        context = seed(users=1, policies_per_user=2)
+        predictor = ClaimPredictor('/nonexistent/claim_model.joblib')
+
+        with patch('policy.benchmarks.claim_predictor', predictor):
+            results = benchmarks.run(
+                context, SCENARIOS, iterations=2, only={'claim-predict'})
+
+        self.assertIn('train_claim_model', results['claim-predict']['skipped'])
+
+    def test_run_json(self):
+        """Test each JSON codec renders the payloads like DRF."""
+        results = benchmarks.run_json(json_payloads(20), repeat=1)
+
+        self.assertEqual(set(results), {'serialized', 'values'})
+        for result in results.values():
+            self.assertEqual(result['items'], 20)
+            for codec in benchmarks.JSON_CODECS:
+                self.assertTrue(result[codec]['identical'])
+                self.assertGreater(result[codec]['render_ms'], 0)
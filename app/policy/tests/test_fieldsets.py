@@ -0,0 +1,117 @@
+"""
+Tests for sparse fieldsets and expansion of nested relations.
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from core.tests.helpers import (
+    create_claim,
+    create_policy,
+    create_user,
+    detail_url,
+)
+
+
+POLICIES_URL = reverse('policy:policy-list')
+CLAIMS_URL = reverse('policy:claim-list')
+
+
+def select_sql(queries, table):
+    """Return the SELECT statements of queries reading from table."""
+    return [
+        query['sql'] for query in queries
+        if query['sql'].startswith('SELECT') and f'FROM "{table}"' in (
+            query['sql'])
+    ]
+
+
+class FieldsetTests(TestCase):
+    """Test clients choose the fields and relations they receive."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tag = Tag.objects.create(claim_status='IN_PROGRESS')
+        self.policy = create_policy(self.user)
+        self.claim = create_claim(self.user, self.policy, tags=[self.tag])
+
+    def test_relations_default_to_ids(self):
+        """Test nested relations are ids unless expanded."""
+        res = self.client.get(POLICIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['claims'], [self.claim.id])
+
+    def test_expand_claims(self):
+        """Test expanding claims embeds them with tag ids."""
+        res = self.client.get(POLICIES_URL, {'expand': 'claims'})
+
+        claim = res.data['results'][0]['claims'][0]
+        self.assertEqual(claim['id'], self.claim.id)
+        self.assertEqual(claim['tags'], [self.tag.id])
+
+    def test_expand_claim_tags(self):
+        """Test expanding claims.tags embeds claims and their tags."""
+        res = self.client.get(
+            detail_url(self.policy.id), {'expand': 'claims.tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        tag = res.data['claims'][0]['tags'][0]
+        self.assertEqual(tag['claim_status'], 'IN_PROGRESS')
+
+    def test_fields_limit_output_and_columns(self):
+        """Test only the chosen fields are read and rendered."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(POLICIES_URL, {'fields': 'id,startDate'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(res.data['results'][0]), {'id', 'startDate'})
+        policy_sql = select_sql(queries.captured_queries, 'core_policy')
+        self.assertTrue(policy_sql)
+        for sql in policy_sql:
+            self.assertNotIn('"description"', sql)
+        self.assertEqual(
+            select_sql(queries.captured_queries, 'core_claim'), [])
+
+    def test_claim_ids_read_no_claim_columns(self):
+        """Test claims rendered as ids prefetch only their keys."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(POLICIES_URL, {'fields': 'id,claims'})
+
+        claim_sql = select_sql(queries.captured_queries, 'core_claim')
+        self.assertEqual(len(claim_sql), 1)
+        self.assertNotIn('"claimedAmt"', claim_sql[0])
+
+    def test_claim_fields(self):
+        """Test the claim list takes fields and expand too."""
+        res = self.client.get(
+            CLAIMS_URL, {'fields': 'id,status,tags', 'expand': 'tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        claim = res.data['results'][0]
+        self.assertEqual(set(claim), {'id', 'status', 'tags'})
+        self.assertEqual(claim['tags'][0]['id'], self.tag.id)
+
+    def test_unknown_names_rejected(self):
+        """Test unknown fields and relations are a bad request."""
+        for params in ({'fields': 'id,secret'}, {'expand': 'owner'}):
+            res = self.client.get(POLICIES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_keep_full_representation(self):
+        """Test fields and expand only shape reads."""
+        res = self.client.patch(
+            f'{detail_url(self.policy.id)}?fields=id',
+            {'description': 'Updated'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['description'], 'Updated')
+        self.assertEqual(res.data['claims'][0]['id'], self.claim.id)
@@ -0,0 +1,339 @@
+"""
+Tests for the policy API.
+"""
+import csv
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Policy, Claim, Tag
+from core.tests.helpers import (
+    bulk_item,
+    create_claim,
+    create_policy,
+    create_user,
+    detail_url,
+)
+from policy.pagination import IdCursorPagination
+
+
+POLICIES_URL = reverse('policy:policy-list')
+CLAIMS_URL = reverse('policy:claim-list')
+POLICY_EXPORT_URL = reverse('policy:policy-export')
+CLAIM_EXPORT_URL = reverse('policy:claim-export')
+POLICY_BULK_URL = reverse('policy:policy-bulk')
+
+# Query budgets per endpoint, with every relation expanded. The number of
+# queries must not grow with the number of rows returned, raising a budget
+# needs a good reason.
+QUERY_BUDGETS = {
+    'policy:policy-list': 4,
+    'policy:policy-detail': 4,
+    'policy:claim-list': 3,
+    # With a cold tag cache, missing tags are read back after inserting.
+    'policy:policy-bulk': 16,
+}
+
+
+class PrivatePolicyApiTests(TestCase):
+    """Test authenticated policy API requests."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tags = [
+            Tag.objects.create(claim_status='RAISED'),
+            Tag.objects.create(claim_status='IN_PROGRESS'),
+        ]
+
+    def _seed(self, count):
+        """Create count policies, each with a tagged claim."""
+        for _ in range(count):
+            policy = create_policy(self.user)
+            create_claim(self.user, policy, tags=self.tags)
+
+    def test_list_policies_nested_claims(self):
+        """Test listing policies returns nested claims and tags."""
+        self._seed(2)
+
+        res = self.client.get(POLICIES_URL, {'expand': 'claims.tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(results[0]['claims']), 1)
+        self.assertEqual(len(results[0]['claims'][0]['tags']), 2)
+
+    def test_list_policies_limited_to_user(self):
+        """Test list of policies is limited to authenticated user."""
+        other = create_user(email='other@example.com')
+        create_policy(other)
+        create_policy(self.user)
+
+        res = self.client.get(POLICIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_policy_list_query_budget(self):
+        """Test listing policies runs a fixed number of queries."""
+        for count in (1, 10):
+            self._seed(count)
+            with self.assertNumQueries(QUERY_BUDGETS['policy:policy-list']):
+                res = self.client.get(
+                    POLICIES_URL, {'expand': 'claims.tags'})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_policy_detail_query_budget(self):
+        """Test retrieving a policy runs a fixed number of queries."""
+        self._seed(1)
+        policy = Policy.objects.get()
+
+        with self.assertNumQueries(QUERY_BUDGETS['policy:policy-detail']):
+            res = self.client.get(
+                detail_url(policy.id), {'expand': 'claims.tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_claim_list_query_budget(self):
+        """Test listing claims runs a fixed number of queries."""
+        for count in (1, 10):
+            self._seed(count)
+            with self.assertNumQueries(QUERY_BUDGETS['policy:claim-list']):
+                res = self.client.get(CLAIMS_URL, {'expand': 'tags'})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class PolicyPaginationTests(TestCase):
+    """Test cursor pagination of the policy APIs."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.policies = [create_policy(self.user) for _ in range(5)]
+
+    def test_pages_follow_id_order(self):
+        """Test walking the cursors returns every policy once."""
+        seen = []
+        url = f'{POLICIES_URL}?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen.extend(item['id'] for item in res.data['results'])
+            url = res.data['next']
+
+        expected = sorted((p.id for p in self.policies), reverse=True)
+        self.assertEqual(seen, expected)
+
+    def test_page_size_capped(self):
+        """Test page_size cannot exceed the configured maximum."""
+        with patch.object(IdCursorPagination, 'max_page_size', 2):
+            res = self.client.get(f'{POLICIES_URL}?page_size=100')
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_next_page_uses_keyset(self):
+        """Test later pages filter on id instead of using OFFSET."""
+        res = self.client.get(f'{POLICIES_URL}?page_size=2')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(res.data['next'])
+
+        # The first query computes the conditional GET validators.
+        sql = ctx.captured_queries[1]['sql']
+        self.assertIn('"core_policy"."id" <', sql)
+        self.assertNotIn('OFFSET', sql)
+
+
+class ExportApiTests(TestCase):
+    """Test the streaming export endpoints."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.policies = [create_policy(self.user) for _ in range(3)]
+        create_policy(create_user(email='other@example.com'))
+
+    def test_export_policies_ndjson(self):
+        """Test exporting the user's policies as NDJSON."""
+        res = self.client.get(POLICY_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        body = b''.join(res.streaming_content).decode()
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 3)
+        latest = self.policies[-1]
+        self.assertEqual(rows[0]['id'], latest.id)
+        self.assertEqual(rows[0]['policy_id'], str(latest.policy_id))
+        self.assertEqual(rows[0]['premiumAmt'], '120.50')
+
+    def test_export_claims_csv(self):
+        """Test exporting the user's claims as CSV."""
+        create_claim(self.user, self.policies[0])
+
+        res = self.client.get(CLAIM_EXPORT_URL, {'export_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = b''.join(res.streaming_content).decode()
+        rows = list(csv.reader(body.splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'user', 'policy'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][4], '250.00')
+
+    def test_export_invalid_format(self):
+        """Test an unknown export format returns an error."""
+        res = self.client.get(POLICY_EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkCreateApiTests(TestCase):
+    """Test the bulk policy upload endpoint."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating policies, claims and tags in bulk."""
+        Tag.objects.create(claim_status='RAISED')
+        items = [bulk_item() for _ in range(3)]
+
+        res = self.client.post(POLICY_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['created'], 3)
+        self.assertEqual(res.data['claims_created'], 3)
+        self.assertIn('rows_per_sec', res.data)
+        self.assertEqual(Policy.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(Tag.objects.count(), 1)
+        for claim in Claim.objects.all():
+            self.assertEqual(claim.claim_id, str(claim.policy.policy_id))
+            self.assertEqual(claim.tags.count(), 1)
+
+    def test_bulk_create_query_count(self):
+        """Test the number of queries does not grow with the batch."""
+        items = [bulk_item() for _ in range(20)]
+
+        with self.assertNumQueries(QUERY_BUDGETS['policy:policy-bulk']):
+            res = self.client.post(POLICY_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_reports_errors(self):
+        """Test invalid items are reported and nothing is written."""
+        items = [
+            bulk_item(),
+            bulk_item(claimedAmt='9000.00'),
+            bulk_item(endDate='2023-01-01'),
+        ]
+
+        res = self.client.post(POLICY_BULK_URL, items, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error['index'] for error in res.data['errors']], [1, 2])
+        self.assertIn('claimedAmt', res.data['errors'][0]['errors'])
+        self.assertIn('endDate', res.data['errors'][1]['errors'])
+        self.assertFalse(Policy.objects.exists())
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and Last-Modified handling."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.policy = create_policy(self.user)
+        self.claim = create_claim(self.user, self.policy)
+
+    def test_detail_not_modified(self):
+        """Test a matching If-None-Match skips the serializer."""
+        res = self.client.get(detail_url(self.policy.id))
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(self.policy.id), HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(res.content)
+
+    def test_claim_change_changes_policy_etag(self):
+        """Test changing a nested claim or its tags changes the ETag."""
+        etag = self.client.get(detail_url(self.policy.id))['ETag']
+
+        self.claim.claimedAmt = Decimal('1.00')
+        self.claim.save()
+        res = self.client.get(
+            detail_url(self.policy.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        etag = res['ETag']
+        self.claim.tags.add(Tag.objects.create())
+        res = self.client.get(
+            detail_url(self.policy.id), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_tag_delete_changes_claim_etag(self):
+        """Test deleting a tag changes the ETag of its claims."""
+        tag = Tag.objects.create(description='Deleted')
+        self.claim.tags.add(tag)
+        params = {'expand': 'tags'}
+        etag = self.client.get(CLAIMS_URL, params)['ETag']
+
+        tag.delete()
+        res = self.client.get(CLAIMS_URL, params, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+    def test_list_etag_changes_on_delete(self):
+        """Test deleting a row changes the list ETag."""
+        other = create_policy(self.user)
+        etag = self.client.get(POLICIES_URL)['ETag']
+
+        res = self.client.get(POLICIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        other.delete()
+        res = self.client.get(POLICIES_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_depends_on_query(self):
+        """Test different query parameters give different ETags."""
+        first = self.client.get(POLICIES_URL)['ETag']
+        second = self.client.get(POLICIES_URL, {'page_size': 1})['ETag']
+
+        self.assertNotEqual(first, second)
+
+    def test_claim_list_if_modified_since(self):
+        """Test the claims list honours If-Modified-Since."""
+        res = self.client.get(CLAIMS_URL)
+
+        res = self.client.get(
+            CLAIMS_URL, HTTP_IF_MODIFIED_SINCE=res['Last-Modified'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_policy_not_found(self):
+        """Test retrieving an unknown policy still returns 404."""
+        res = self.client.get(detail_url(self.policy.id + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,72 @@
+"""
+Tests for the query plans of the policy API querysets.
+"""
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Policy, Claim, Tag
+from core.tests.helpers import create_claim, create_policy, explain
+
+
+POLICIES_URL = reverse('policy:policy-list')
+TAGS_URL = reverse('policy:tag-list')
+
+
+class QueryPlanTests(TestCase):
+    """Test the list querysets use the composite indexes."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_policy_list_uses_user_id_index(self):
+        """Test the user's policies are read through (user_id, id DESC)."""
+        queryset = Policy.objects.filter(
+            user=self.user, id__lt=1000).order_by('-id')
+
+        self.assertIn('policy_user_id_desc', explain(queryset))
+
+    def test_claim_list_uses_user_id_index(self):
+        """Test the user's claims are read through (user_id, id DESC)."""
+        queryset = Claim.objects.filter(
+            user=self.user, id__lt=1000).order_by('-id')
+
+        self.assertIn('claim_user_id_desc', explain(queryset))
+
+    def test_filters_do_not_need_distinct(self):
+        """Test tag and claim filters return each policy once."""
+        tags = [
+            Tag.objects.create(),
+            Tag.objects.create(claim_status='IN_PROGRESS'),
+        ]
+        policy = create_policy(self.user)
+        claim = create_claim(self.user, policy, tags=tags)
+        create_policy(self.user)
+
+        res = self.client.get(POLICIES_URL, {
+            'tags': ','.join(str(tag.id) for tag in tags),
+            'claims': str(claim.id),
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [policy.id])
+
+    def test_tags_limited_to_user_claims(self):
+        """Test the tag list returns tags on the user's claims once."""
+        tag = Tag.objects.create()
+        Tag.objects.create(claim_status='IN_PROGRESS')
+        for _ in range(2):
+            create_claim(self.user, create_policy(self.user), tags=[tag])
+
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['id'] for item in res.data['results']], [tag.id])
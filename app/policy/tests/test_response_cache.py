@@ -0,0 +1,134 @@
+"""
+Tests for the per-user list response cache.
+"""
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Claim, Tag
+from core.tests.helpers import (
+    bulk_item,
+    create_claim,
+    create_policy,
+    create_user,
+)
+
+
+POLICIES_URL = reverse('policy:policy-list')
+CLAIMS_URL = reverse('policy:claim-list')
+TAGS_URL = reverse('policy:tag-list')
+POLICY_BULK_URL = reverse('policy:policy-bulk')
+
+
+def sample(name, view):
+    """Return the value of a response cache counter."""
+    return REGISTRY.get_sample_value(name, {'view': view}) or 0
+
+
+class ResponseCacheTests(TestCase):
+    """Test list responses are cached and invalidated per user."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.policy = create_policy(self.user)
+        self.tag = Tag.objects.create(description='Pending review')
+        self.claim = create_claim(self.user, self.policy, tags=[self.tag])
+
+    def test_repeated_list_served_from_cache(self):
+        """Test a repeated list only runs the validator query."""
+        hits = sample('response_cache_hits_total', 'policy')
+        first = self.client.get(POLICIES_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(POLICIES_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(
+            sample('response_cache_hits_total', 'policy'), hits + 1)
+
+    def test_id_params_normalized(self):
+        """Test the order of ids in a filter does not change the key."""
+        other = Tag.objects.create(description='Other')
+        self.claim.tags.add(other)
+        self.client.get(POLICIES_URL, {'tags': f'{self.tag.id},{other.id}'})
+
+        with self.assertNumQueries(1):
+            self.client.get(
+                POLICIES_URL, {'tags': f'{other.id},{self.tag.id}'})
+
+    def test_claim_change_invalidates_policy_list(self):
+        """Test saving a claim invalidates the nested policy list."""
+        self.client.get(POLICIES_URL, {'expand': 'claims'})
+
+        self.claim.claimedAmt = Decimal('75.00')
+        self.claim.save()
+        res = self.client.get(POLICIES_URL, {'expand': 'claims'})
+
+        claim = res.data['results'][0]['claims'][0]
+        self.assertEqual(claim['claimedAmt'], '75.00')
+
+    def test_tag_change_invalidates_lists(self):
+        """Test renaming a tag invalidates the claim and tag lists."""
+        self.client.get(CLAIMS_URL, {'expand': 'tags'})
+        self.client.get(TAGS_URL)
+
+        self.tag.description = 'Approved'
+        self.tag.save()
+        claims = self.client.get(CLAIMS_URL, {'expand': 'tags'})
+        tags = self.client.get(TAGS_URL)
+
+        self.assertEqual(
+            claims.data['results'][0]['tags'][0]['description'], 'Approved')
+        self.assertEqual(tags.data['results'][0]['description'], 'Approved')
+
+    def test_tag_unlink_invalidates_tag_list(self):
+        """Test removing a tag from a claim invalidates the tag list."""
+        self.client.get(TAGS_URL)
+
+        self.tag.claim_set.remove(self.claim)
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_other_user_change_keeps_cache(self):
+        """Test changes of another user do not invalidate the cache."""
+        self.client.get(POLICIES_URL)
+
+        other = create_user(email='other@example.com')
+        create_claim(other, create_policy(other))
+
+        with self.assertNumQueries(1):
+            self.client.get(POLICIES_URL)
+
+    def test_bulk_upload_invalidates(self):
+        """Test the bulk upload, which sends no signals, invalidates."""
+        self.client.get(POLICIES_URL)
+
+        res = self.client.post(
+            POLICY_BULK_URL, [bulk_item()], format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(POLICIES_URL)
+
+        self.assertEqual(len(res.data['results']), 2)
+
+    @override_settings(RESPONSE_CACHE_VERIFY_RATE=1)
+    def test_stale_serve_counted(self):
+        """Test a verified hit that differs counts as a stale serve."""
+        stale = sample('response_cache_stale_serves_total', 'claim')
+        self.client.get(CLAIMS_URL)
+
+        # A queryset update sends no signal, so the entry is now stale.
+        Claim.objects.filter(pk=self.claim.pk).update(description='Changed')
+        res = self.client.get(CLAIMS_URL)
+
+        self.assertEqual(res.data['results'][0]['description'], 'Changed')
+        self.assertEqual(
+            sample('response_cache_stale_serves_total', 'claim'), stale + 1)
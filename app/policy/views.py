@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -7,11 +9,71 @@ from drf_spectacular.utils import (
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Policy, Tag, Claim
+from core.authentication import CachedTokenAuthentication
+from core.images import schedule_claim_image
+from core.models import Policy, Tag, Claim, PolicySummary
+from core.prediction import ModelUnavailable, SOURCE_FIELDS, claim_predictor
+from core.summary import SUMMARY_FIELDS
 from policy import serializers
+from policy.caching import CachedListMixin
+from policy.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from policy.bulk import bulk_create_policies
+from policy.export import EXPORT_FORMATS, stream_export
+from policy.fieldsets import FieldsetMixin
+from policy.pagination import IdCursorPagination
+from policy.prefetch import plan_queryset
+from policy.routing import ReplicaReadMixin
+
+ClaimTag = Claim.tags.through
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return.',
+    ),
+    OpenApiParameter(
+        'expand',
+        OpenApiTypes.STR,
+        description='Comma separated list of nested relations to embed, '
+                    'e.g. claims,claims.tags. Others are returned as ids.',
+    ),
+]
+
+
+class ExportMixin:
+    """Add a streaming export action to a viewset."""
+    export_fields = []
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'export_format',
+                OpenApiTypes.STR, enum=list(EXPORT_FORMATS),
+                description='Output format, defaults to ndjson.',
+            )
+        ],
+        responses={(status.HTTP_200_OK, 'application/x-ndjson'): bytes},
+    )
+    @action(detail=False, methods=['GET'])
+    def export(self, request):
+        """Stream every row visible to the user as NDJSON or CSV."""
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'export_format': f'Must be one of {list(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return stream_export(
+            self.get_queryset(),
+            self.export_fields,
+            export_format,
+            filename=self.basename,
+            chunk_size=settings.EXPORT_CHUNK_SIZE,
+        )
 
 
 # Define a decorator to extend schema view for API documentation
@@ -27,16 +89,30 @@ from policy import serializers
                 'claims',
                 OpenApiTypes.STR,
                 description='Comma separated list of IDs to filter',
-            )
+            ),
+            *FIELDSET_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
 )
-class PolicyViewSet(viewsets.ModelViewSet):
+class PolicyViewSet(ReplicaReadMixin,
+                    FieldsetMixin,
+                    ExportMixin,
+                    ConditionalListMixin,
+                    ConditionalRetrieveMixin,
+                    CachedListMixin,
+                    viewsets.ModelViewSet):
     """View for managing policy APIs."""
     serializer_class = serializers.PolicyDetailSerializer
     queryset = Policy.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+    version_lookups = ['updated_at', 'claims__updated_at']
+    export_fields = [
+        'id', 'user', 'title', 'policy_id', 'description', 'startDate',
+        'endDate', 'premiumAmt', 'sumAssured', 'claimedAmt',
+    ]
 
     # Helper method to convert string IDs to integers
     def _params_to_ints(self, qs):
@@ -57,21 +133,72 @@ class PolicyViewSet(viewsets.ModelViewSet):
             # If user is not staff, return policies associated with the user
             queryset = self.queryset.filter(user=user)
 
-        # Apply tag and claim filters
+        # Apply tag and claim filters as EXISTS subqueries, so no join
+        # multiplies the rows and no DISTINCT is needed.
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = queryset.filter(Exists(ClaimTag.objects.filter(
+                claim__policy=OuterRef('pk'), tag_id__in=tag_ids)))
         if claims:
             claim_ids = self._params_to_ints(claims)
-            queryset = queryset.filter(claims__id__in=claim_ids)
+            queryset = queryset.filter(Exists(Claim.objects.filter(
+                policy=OuterRef('pk'), id__in=claim_ids)))
 
-        return queryset.order_by('-id').distinct()
+        queryset = queryset.order_by('-id')
+        return plan_queryset(
+            queryset, self.get_serializer(), only=self.shapes_fields)
 
     # Override perform_create to associate policy with authenticated user
     def perform_create(self, serializer):
         """Create a new policy."""
         serializer.save(user=self.request.user)
 
+    @extend_schema(
+        request=serializers.BulkPolicySerializer(many=True),
+        responses={
+            status.HTTP_201_CREATED: OpenApiTypes.OBJECT,
+            status.HTTP_400_BAD_REQUEST: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        """Create a batch of policies with nested claims and tags."""
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {'detail': 'Expected a list of policies.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(items) > settings.BULK_MAX_ITEMS:
+            return Response(
+                {'detail': f'At most {settings.BULK_MAX_ITEMS} policies '
+                           'can be created per request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created, report = bulk_create_policies(request.user, items)
+        if not created:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    @action(detail=False, methods=['GET'])
+    def summary(self, request):
+        """Return the user's portfolio totals overall and per title."""
+        rows = PolicySummary.objects.filter(
+            user=request.user).order_by('title')
+        by_title = serializers.PolicySummarySerializer(rows, many=True).data
+        totals = {field: 0 for field in SUMMARY_FIELDS}
+        for row in rows:
+            for field in SUMMARY_FIELDS:
+                totals[field] += getattr(row, field)
+
+        return Response({
+            'totals': serializers.PolicySummarySerializer(totals).data,
+            'by_title': [row for row in by_title if row['policy_count']],
+        })
+
     # Define custom action for uploading images to policies
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=1):
@@ -94,7 +221,14 @@ class PolicyViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes.',
-            )
+            ),
+            OpenApiParameter(
+                'status',
+                OpenApiTypes.STR,
+                enum=[choice for choice, _ in Tag.CLAIM_STATUS_CHOICES],
+                description='Filter by claim status.',
+            ),
+            *FIELDSET_PARAMETERS,
         ]
     )
 )
@@ -103,8 +237,17 @@ class BasePolicyAttrViewSet(mixins.DestroyModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Base viewset class for managing policy attributes."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
+
+    def _filter_user(self, queryset):
+        """Limit queryset to rows owned by the authenticated user."""
+        return queryset.filter(user=self.request.user)
+
+    def _filter_assigned(self, queryset):
+        """Limit queryset to rows assigned to a policy."""
+        return queryset.filter(policy__isnull=False)
 
     # Override get_queryset to filter by authenticated user and assigned status
     def get_queryset(self):
@@ -113,17 +256,37 @@ class BasePolicyAttrViewSet(mixins.DestroyModelMixin,
             self.request.query_params.get('assigned_only', 0)))
         queryset = self.queryset.all()
         if assigned_only:
-            queryset = queryset.filter(policy__isnull=False)
+            queryset = self._filter_assigned(queryset)
 
-        return queryset.filter(
-            user=self.request.user).order_by('-id').distinct()
+        queryset = self._filter_user(queryset).order_by('-id')
+        return plan_queryset(
+            queryset, self.get_serializer(), only=self.shapes_fields)
 
 
 # Define viewset classes for managing tags and claims
-class ClaimViewSet(BasePolicyAttrViewSet):
+class ClaimViewSet(ReplicaReadMixin,
+                   FieldsetMixin,
+                   ExportMixin,
+                   ConditionalListMixin,
+                   CachedListMixin,
+                   BasePolicyAttrViewSet):
     """Manage claims in the database."""
     serializer_class = serializers.ClaimSerializer
     queryset = Claim.objects.all()
+    export_fields = [
+        'id', 'user', 'policy', 'claim_id', 'claimedAmt', 'description',
+        'image_stripped',
+    ]
+    # Field matched by the status query parameter.
+    status_field = 'status'
+
+    def get_queryset(self):
+        """Filter queryset to the requested status, if any."""
+        queryset = super().get_queryset()
+        claim_status = self.request.query_params.get('status')
+        if claim_status:
+            queryset = queryset.filter(**{self.status_field: claim_status})
+        return queryset
 
     def perform_create(self, serializer):
         """Create a new claim."""
@@ -132,13 +295,55 @@ class ClaimViewSet(BasePolicyAttrViewSet):
     # Override get_serializer_class to dynamically select serializer
     def get_serializer_class(self):
         """Return the serializer class based on the action."""
-        if self.action == 'list':
-            return serializers.ClaimSerializer
-        elif self.action == 'upload_image':
+        if self.action == 'upload_image':
             return serializers.ClaimImageSerializer
+        if self.action == 'predict':
+            return serializers.ClaimPredictionSerializer
 
         return self.serializer_class
     
+    @action(methods=['POST'], detail=True, url_path='upload-image')
+    def upload_image(self, request, pk=None):
+        """Upload an image to a claim, variants are made in the background."""
+        claim = self.get_object()
+        serializer = self.get_serializer(claim, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        claim = serializer.save()
+        schedule_claim_image(claim)
+
+        response_status = status.HTTP_202_ACCEPTED
+        if claim.image_status == Claim.IMAGE_READY:
+            response_status = status.HTTP_200_OK
+        return Response(
+            self.get_serializer(claim).data, status=response_status)
+
+    @extend_schema(
+        responses={
+            status.HTTP_200_OK: serializers.ClaimPredictionSerializer(
+                many=True),
+            status.HTTP_503_SERVICE_UNAVAILABLE: OpenApiTypes.OBJECT,
+        },
+    )
+    @action(detail=False, methods=['GET'])
+    def predict(self, request):
+        """Predict the amount of the user's claims, a page at a time."""
+        try:
+            claim_predictor.load()
+        except ModelUnavailable:
+            return Response(
+                {'detail': 'Claim prediction model is not available.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        rows = self.paginate_queryset(
+            self.get_queryset().values('id', *SOURCE_FIELDS))
+        amounts = claim_predictor.predict_rows(rows)
+        serializer = self.get_serializer([
+            {'id': row['id'], 'predicted_amount': amount}
+            for row, amount in zip(rows, amounts)
+        ], many=True)
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
         request=serializers.ClaimSerializer,
         responses={status.HTTP_201_CREATED: serializers.ClaimSerializer}
@@ -156,4 +361,21 @@ class TagViewSet(ClaimViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    export_fields = ['id', 'claim_status', 'description']
+    status_field = 'claim_status'
+    # Tags carry no timestamp to build validators from.
+    version_lookups = []
+    # Predictions are made for claims only.
+    predict = None
+
+    def _filter_user(self, queryset):
+        """Limit queryset to tags on the authenticated user's claims."""
+        return queryset.filter(Exists(ClaimTag.objects.filter(
+            tag=OuterRef('pk'), claim__user=self.request.user)))
+
+    def _filter_assigned(self, queryset):
+        """Limit queryset to tags attached to a claim."""
+        return queryset.filter(
+            Exists(ClaimTag.objects.filter(tag=OuterRef('pk'))))
+
     
\ No newline at end of file
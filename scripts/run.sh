@@ -6,5 +6,12 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
+# Workers write their metrics to files in this directory and /metrics
+# aggregates them. Keep it on tmpfs, and start from an empty directory so
+# metrics of a previous run are not counted again.
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+find "$PROMETHEUS_MULTIPROC_DIR" -mindepth 1 -delete
+
 # tcp socket 9000 used to connect to nginx server
 uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file